@@ -123,6 +123,7 @@ setup(
             'addzope2user=Zope2.utilities.adduser:main',
             'runwsgi=Zope2.Startup.serve:main',
             'mkwsgiinstance=Zope2.utilities.mkwsgiinstance:main',
+            'warmtemplatecache=Zope2.utilities.warmtemplatecache:main',
         ],
     },
 )
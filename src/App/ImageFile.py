@@ -21,6 +21,7 @@ from AccessControl.class_init import InitializeClass
 from AccessControl.SecurityInfo import ClassSecurityInfo
 from Acquisition import Explicit
 from App import bbb
+from App import filewatch
 from App.Common import package_home
 from App.Common import rfc1123_date
 from App.config import getConfiguration
@@ -81,11 +82,23 @@ class ImageFile(Explicit):
             self.content_type = 'image/%s' % ext
 
         self.__name__ = os.path.split(path)[-1]
-        stat_info = os.stat(path)
+        self._readFileInfo()
+        filewatch.watch(path, self)
+
+    def _readFileInfo(self):
+        stat_info = os.stat(self.path)
         self.size = stat_info[stat.ST_SIZE]
         self.lmt = float(stat_info[stat.ST_MTIME]) or time.time()
         self.lmh = rfc1123_date(self.lmt)
 
+    def _fileChanged(self):
+        # Called by App.filewatch.
+        try:
+            self._readFileInfo()
+        except OSError:
+            # The file was removed, it may be written again soon.
+            pass
+
     def index_html(self, REQUEST, RESPONSE):
         """Default document"""
         # HTTP If-Modified-Since header handling. This is duplicated
@@ -0,0 +1,258 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Tell objects made from files when their files change.
+
+Templates and images read from files register themselves with `watch`.
+Once `start` was called, a thread watches the files with inotify where
+it is available, otherwise by checking their modification times every
+`poll_interval` seconds. It calls the `_fileChanged` method of the
+objects of a file when the file changes, so the objects do not need to
+check their files whenever they are used.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import weakref
+
+logger = logging.getLogger('App.filewatch')
+
+# Seconds between two checks of the modification times of the files,
+# if inotify is not available.
+poll_interval = 1.0
+
+_lock = threading.Lock()
+_watched = {}
+_watcher = None
+
+
+def watch(path, ob):
+    """Call `ob._fileChanged()` whenever the file `path` changes.
+
+    Only a weak reference to `ob` is kept.
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        obs = _watched.get(path)
+        if obs is None:
+            obs = _watched[path] = weakref.WeakSet()
+        obs.add(ob)
+        watcher = _watcher
+    if watcher is not None:
+        watcher.add(path)
+
+
+def unwatch(path, ob):
+    """Stop telling `ob` about changes of `path`."""
+    path = os.path.abspath(path)
+    with _lock:
+        obs = _watched.get(path)
+        if obs is not None:
+            obs.discard(ob)
+
+
+def isWatching():
+    """Check whether changes of the watched files are noticed."""
+    return _watcher is not None
+
+
+def fileChanged(path):
+    """Tell the objects of the file `path` that it changed."""
+    with _lock:
+        obs = _watched.get(path)
+        obs = list(obs) if obs is not None else ()
+    for ob in obs:
+        try:
+            ob._fileChanged()
+        except Exception:
+            logger.exception('Could not reload %s', path)
+
+
+def _watchedPaths():
+    with _lock:
+        for path, obs in list(_watched.items()):
+            if not obs:
+                del _watched[path]
+        return list(_watched)
+
+
+class PollingWatcher(object):
+    """Notice changes by comparing the modification times and sizes of
+    the files.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = poll_interval if interval is None else interval
+        self._stats = {}
+        self._stopped = threading.Event()
+
+    def _stat(self, path):
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        return info.st_mtime, info.st_size
+
+    def add(self, path):
+        if path not in self._stats:
+            self._stats[path] = self._stat(path)
+
+    def check(self):
+        """Tell the objects of the files changed since the last check."""
+        stats = self._stats
+        for path in _watchedPaths():
+            stat = self._stat(path)
+            if path not in stats:
+                stats[path] = stat
+            elif stats[path] != stat:
+                stats[path] = stat
+                fileChanged(path)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
+
+
+class InotifyWatcher(object):
+    """Notice changes with the Linux inotify API.
+
+    The directories of the files are watched, so files which are
+    replaced by renaming another file, like editors do, are noticed.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_CLOEXEC = 0o2000000
+    mask = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO |
+            IN_CREATE | IN_DELETE)
+    event_header = struct.Struct('iIII')
+
+    def __init__(self):
+        libc = self._findLibc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self._libc = libc
+        self._fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._directories = {}
+        self._descriptors = {}
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _findLibc():
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                               use_errno=True)
+        except OSError:
+            return None
+        if not hasattr(libc, 'inotify_init1'):
+            return None
+        return libc
+
+    def add(self, path):
+        directory = os.path.dirname(path)
+        if directory in self._directories:
+            return
+        wd = self._libc.inotify_add_watch(
+            self._fd, directory.encode(sys.getfilesystemencoding()),
+            self.mask)
+        if wd < 0:
+            logger.warning('Could not watch %s: %s', directory,
+                           os.strerror(ctypes.get_errno()))
+            return
+        self._directories[directory] = wd
+        self._descriptors[wd] = directory
+
+    def _read(self):
+        data = os.read(self._fd, 65536)
+        header = self.event_header
+        offset = 0
+        changed = set()
+        while offset + header.size <= len(data):
+            wd, mask, cookie, length = header.unpack_from(data, offset)
+            offset += header.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            directory = self._descriptors.get(wd)
+            if directory is not None and name:
+                changed.add(os.path.join(
+                    directory, name.decode(sys.getfilesystemencoding())))
+        return changed
+
+    def run(self):
+        try:
+            while not self._stopped.is_set():
+                readable = select.select([self._fd], [], [], 1.0)[0]
+                if not readable:
+                    continue
+                changed = self._read()
+                if changed:
+                    for path in sorted(changed & set(_watchedPaths())):
+                        fileChanged(path)
+        finally:
+            os.close(self._fd)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start(use_inotify=True):
+    """Start watching the files in a thread."""
+    global _watcher
+    with _lock:
+        if _watcher is not None:
+            return _watcher
+    watcher = None
+    if use_inotify:
+        try:
+            watcher = InotifyWatcher()
+        except OSError:
+            logger.info('inotify is not available, polling files instead')
+    if watcher is None:
+        watcher = PollingWatcher()
+    for path in _watchedPaths():
+        watcher.add(path)
+    thread = threading.Thread(target=watcher.run, name='filewatch')
+    thread.daemon = True
+    watcher.thread = thread
+    with _lock:
+        _watcher = watcher
+    thread.start()
+    return watcher
+
+
+def stop():
+    """Stop watching the files."""
+    global _watcher
+    with _lock:
+        watcher = _watcher
+        _watcher = None
+    if watcher is not None:
+        watcher.stop()
+        watcher.thread.join()
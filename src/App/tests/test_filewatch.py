@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class Dummy(object):
+
+    changed = 0
+
+    def _fileChanged(self):
+        self.changed += 1
+
+
+class FileWatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'file.txt')
+        self._write(b'one')
+
+    def tearDown(self):
+        from App import filewatch
+        filewatch.stop()
+        shutil.rmtree(self.directory)
+
+    def _write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_fileChanged(self):
+        from App import filewatch
+        ob = Dummy()
+        filewatch.watch(self.path, ob)
+        filewatch.fileChanged(self.path)
+        self.assertEqual(ob.changed, 1)
+        filewatch.unwatch(self.path, ob)
+        filewatch.fileChanged(self.path)
+        self.assertEqual(ob.changed, 1)
+
+    def test_weak_references(self):
+        import gc
+        from App import filewatch
+        filewatch.watch(self.path, Dummy())
+        gc.collect()
+        self.assertFalse(self.path in filewatch._watchedPaths())
+
+    def test_polling(self):
+        from App import filewatch
+        ob = Dummy()
+        filewatch.watch(self.path, ob)
+        watcher = filewatch.PollingWatcher()
+        watcher.check()
+        self.assertEqual(ob.changed, 0)
+        self._write(b'three')
+        watcher.check()
+        self.assertEqual(ob.changed, 1)
+        watcher.check()
+        self.assertEqual(ob.changed, 1)
+        os.remove(self.path)
+        watcher.check()
+        self.assertEqual(ob.changed, 2)
+
+    def test_start_stop(self):
+        from App import filewatch
+        self.assertFalse(filewatch.isWatching())
+        watcher = filewatch.start(use_inotify=False)
+        self.assertTrue(isinstance(watcher, filewatch.PollingWatcher))
+        self.assertTrue(filewatch.isWatching())
+        self.assertTrue(filewatch.start() is watcher)
+        filewatch.stop()
+        self.assertFalse(filewatch.isWatching())
+        self.assertFalse(watcher.thread.is_alive())
+
+    def test_inotify(self):
+        from App import filewatch
+        if filewatch.InotifyWatcher._findLibc() is None:
+            return
+        ob = Dummy()
+        filewatch.watch(self.path, ob)
+        watcher = filewatch.start()
+        self.assertTrue(isinstance(watcher, filewatch.InotifyWatcher))
+        # Replace the file like editors do.
+        temp = os.path.join(self.directory, 'file.tmp')
+        with open(temp, 'wb') as f:
+            f.write(b'two')
+        os.rename(temp, self.path)
+        deadline = time.time() + 10
+        while not ob.changed and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(ob.changed)
+
+    def test_image_file(self):
+        from App import filewatch
+        from App.ImageFile import ImageFile
+        image = ImageFile(self.path)
+        self.assertEqual(image.size, 3)
+        self._write(b'three')
+        filewatch.fileChanged(self.path)
+        self.assertEqual(image.size, 5)
@@ -0,0 +1,382 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""'Folder' storing its items in a BTree.
+
+Folders keep their items as attributes and list them in an `_objects`
+tuple, which is rewritten by every add or delete. A BTree folder stores
+its items in an OOBTree instead, together with an index of ids by
+meta_type and a length counter, so that adding an item to a large folder
+only writes a few buckets.
+"""
+
+from AccessControl.class_init import InitializeClass
+from AccessControl.Permissions import access_contents_information
+from AccessControl.SecurityInfo import ClassSecurityInfo
+from AccessControl.SecurityManagement import getSecurityManager
+from Acquisition import aq_base
+from Acquisition import aq_inner
+from Acquisition import aq_parent
+from App.special_dtml import DTMLFile
+from BTrees.Length import Length
+from BTrees.OIBTree import OIBTree
+from BTrees.OOBTree import OOBTree
+from zExceptions import BadRequest
+from zope.container.contained import notifyContainerModified
+from zope.event import notify
+from zope.lifecycleevent import ObjectAddedEvent
+
+from OFS.event import ObjectWillBeAddedEvent
+from OFS.CopySupport import _batchable
+from OFS.Folder import Folder
+from OFS.ObjectManager import NOT_REPLACEABLE
+from OFS.ObjectManager import ObjectManager
+from OFS.ObjectManager import REPLACEABLE
+from OFS.subscribers import compatibilityCall
+from ZTUtils.Lazy import LazyMap
+
+_marker = []
+
+manage_addBTreeFolderForm = DTMLFile('dtml/addBTreeFolder', globals())
+
+
+def manage_addBTreeFolder(self, id, title='', REQUEST=None):
+    """Add a new BTree Folder object with id *id*.
+    """
+    ob = BTreeFolder(id)
+    ob.title = title
+    self._setObject(id, ob)
+    ob = self._getOb(id)
+    if REQUEST is not None:
+        return self.manage_main(self, REQUEST)
+
+
+class BTreeObjectManager(ObjectManager):
+
+    """ObjectManager storing its items in a BTree.
+
+    Items are kept in the `_tree` OOBTree instead of instance attributes,
+    `_mt_index` maps meta types to an OIBTree of ids and `_count` holds
+    the number of items. The `_objects` tuple is not used and always
+    empty. Items are listed ordered by id.
+    """
+
+    security = ClassSecurityInfo()
+
+    _tree = None
+    _mt_index = None
+    _count = None
+
+    def __init__(self, id=None):
+        if id is not None:
+            self.id = str(id)
+        self._initBTrees()
+
+    def _initBTrees(self):
+        self._tree = OOBTree()
+        self._mt_index = OOBTree()
+        self._count = Length()
+
+    def __getattr__(self, name):
+        # Acquisition prefers attributes over items, so make the items
+        # available as attributes for traversal and restrictedTraverse.
+        if name[:1] != '_':
+            tree = self._tree
+            if tree is not None:
+                ob = tree.get(name, _marker)
+                if ob is not _marker:
+                    return ob
+        raise AttributeError(name)
+
+    def _checkId(self, id, allow_dup=0):
+        if (not allow_dup and isinstance(id, str) and
+                self._tree.has_key(id)):  # NOQA
+            flags = getattr(self._tree[id], '__replaceable__',
+                            NOT_REPLACEABLE)
+            if not flags & REPLACEABLE:
+                raise BadRequest(
+                    'The id "%s" is invalid - it is already in use.' % id)
+            allow_dup = 1
+        return ObjectManager._checkId(self, id, allow_dup)
+
+    def _index(self, id, meta_type):
+        ids = self._mt_index.get(meta_type)
+        if ids is None:
+            ids = self._mt_index[meta_type] = OIBTree()
+        ids[id] = 1
+
+    def _unindex(self, id, meta_type):
+        ids = self._mt_index.get(meta_type)
+        if ids is not None and ids.has_key(id):  # NOQA
+            del ids[id]
+            if not ids:
+                del self._mt_index[meta_type]
+
+    def _setOb(self, id, object):
+        tree = self._tree
+        if tree.has_key(id):  # NOQA
+            self._unindex(id, getattr(tree[id], 'meta_type', None))
+        else:
+            self._count.change(1)
+        tree[id] = object
+        self._index(id, getattr(object, 'meta_type', None))
+
+    def _delOb(self, id):
+        tree = self._tree
+        ob = tree[id]
+        self._unindex(id, getattr(ob, 'meta_type', None))
+        del tree[id]
+        self._count.change(-1)
+
+    def _getOb(self, id, default=_marker):
+        ob = self._tree.get(id, _marker) if id[:1] != '_' else _marker
+        if ob is _marker:
+            if default is _marker:
+                raise AttributeError(id)
+            return default
+        if hasattr(ob, '__of__'):
+            return ob.__of__(self)
+        return ob
+
+    def hasObject(self, id):
+        if (id in ('.', '..') or
+                id.startswith('_') or
+                id.startswith('aq_') or
+                id.endswith('__')):
+            return False
+        return self._tree.has_key(id)  # NOQA
+
+    def _setObject(self, id, object, roles=None, user=None, set_owner=1,
+                   suppress_events=False):
+        """Set an object into this container.
+
+        Also sends IObjectWillBeAddedEvent and IObjectAddedEvent.
+        """
+        ob = object  # better name, keep original function signature
+        v = self._checkId(id)
+        if v is not None:
+            id = v
+
+        # If an object by the given id already exists, remove it.
+        if self._tree.has_key(id):  # NOQA
+            self._delObject(id)
+
+        if not suppress_events:
+            notify(ObjectWillBeAddedEvent(ob, self, id))
+
+        self._setOb(id, ob)
+        ob = self._getOb(id)
+
+        if set_owner:
+            # TODO: eventify manage_fixupOwnershipAfterAdd
+            # This will be called for a copy/clone, or a normal _setObject.
+            ob.manage_fixupOwnershipAfterAdd()
+
+            # Try to give user the local role "Owner", but only if
+            # no local roles have been set on the object yet.
+            if getattr(ob, '__ac_local_roles__', _marker) is None:
+                user = getSecurityManager().getUser()
+                if user is not None:
+                    userid = user.getId()
+                    if userid is not None:
+                        ob.manage_setLocalRoles(userid, ['Owner'])
+
+        if not suppress_events:
+            notify(ObjectAddedEvent(ob, self, id))
+            notifyContainerModified(self)
+
+        compatibilityCall('manage_afterAdd', ob, ob, self)
+
+        return id
+
+    # The batch methods of ObjectManager store the objects with _setOb
+    # and _delOb, so they work with the tree. _setObjects is named here
+    # as _setObject is overridden, there is no list of objects to change.
+    def _setObjects(self, items, set_owner=1, suppress_events=False):
+        return ObjectManager._setObjects(self, items, set_owner,
+                                         suppress_events)
+
+    def _addObjectInfos(self, infos):
+        pass
+
+    def _removeObjectInfos(self, ids):
+        pass
+
+    def objectIds(self, spec=None):
+        # Returns a list of subobject ids of the current object.
+        # If 'spec' is specified, returns objects whose meta_type
+        # matches 'spec'.
+        if spec is None:
+            return list(self._tree.keys())
+        if isinstance(spec, str):
+            spec = [spec]
+        result = []
+        for meta_type in spec:
+            ids = self._mt_index.get(meta_type)
+            if ids is not None:
+                result.extend(ids.keys())
+        if len(spec) > 1:
+            result.sort()
+        return result
+
+    def iterObjectIds(self, spec=None):
+        if spec is None and _batchable(self, 'objectIds', 'iterObjectIds'):
+            return iter(self._tree.keys())
+        return iter(self.objectIds(spec))
+
+    def _sliceIds(self, start, size, spec):
+        if spec is not None or not _batchable(self, 'objectIds', '_sliceIds'):
+            return ObjectManager._sliceIds(self, start, size, spec)
+        keys = self._tree.keys()
+        if size is None:
+            return list(keys[start:])
+        return list(keys[start:start + size])
+
+    def lazyObjectItems(self, spec=None):
+        # The keys of the tree are a lazy sequence themselves.
+        if (spec is not None or
+                not _batchable(self, 'objectIds', 'lazyObjectItems')):
+            return ObjectManager.lazyObjectItems(self, spec)
+        return LazyMap(lambda id: (id, self._getOb(id)), self._tree.keys())
+
+    def objectMap(self):
+        # Return a tuple of mappings containing subobject meta-data.
+        # The meta types are taken from the index, without loading the
+        # subobjects.
+        result = []
+        for meta_type, ids in self._mt_index.items():
+            for id in ids.keys():
+                result.append({'id': id, 'meta_type': meta_type})
+        result.sort(key=lambda d: d['id'])
+        return tuple(result)
+
+    def iterObjectMap(self):
+        return iter(self.objectMap())
+
+    def objectMap_d(self, t=None):
+        n = getattr(self, '_reserved_names', ())
+        return [d for d in self.objectMap() if d['id'] not in n]
+
+    def superValues(self, t):
+        # Return all of the objects of a given type located in
+        # this object and containing objects.
+        if isinstance(t, str):
+            t = (t,)
+        obj = self
+        seen = {}
+        vals = []
+        relativePhysicalPath = ()
+        x = 0
+        while x < 100:
+            if not hasattr(obj, '_getOb'):
+                break
+            if isinstance(aq_base(obj), BTreeObjectManager):
+                ids = obj.objectIds(t)
+            else:
+                ids = [i['id'] for i in getattr(obj, '_objects', ())
+                       if i['meta_type'] in t]
+            for id in ids:
+                physicalPath = relativePhysicalPath + (id,)
+                if physicalPath not in seen:
+                    try:
+                        vals.append(obj._getOb(id))
+                    except Exception:
+                        continue
+                    seen[physicalPath] = 1
+
+            if hasattr(obj, '__parent__'):
+                obj = aq_parent(obj)
+                relativePhysicalPath = ('..',) + relativePhysicalPath
+            else:
+                return vals
+            x = x + 1
+        return vals
+
+    def __contains__(self, name):
+        return self._tree.has_key(name)  # NOQA
+
+    def __iter__(self):
+        return iter(self._tree.keys())
+
+    def __len__(self):
+        return self._count()
+
+    security.declareProtected(access_contents_information, 'objectCount')
+    def objectCount(self):
+        """Return the number of items in the folder."""
+        return self._count()
+
+
+class BTreeFolder(BTreeObjectManager, Folder):
+
+    """A Folder storing its items in a BTree, for folders with many items.
+    """
+    meta_type = 'BTree Folder'
+
+    manage_options = Folder.manage_options
+
+    def __init__(self, id=None):
+        BTreeObjectManager.__init__(self, id)
+
+InitializeClass(BTreeFolder)
+
+
+def migrateFolder(folder):
+    """Convert a Folder in place into a BTreeFolder.
+
+    The items are moved from attributes into the BTrees and the class of
+    the folder is changed, its oid and everything else stays the same.
+    No events are sent, as no item is added or removed. The items are
+    indexed with the meta types recorded in `_objects`, so they are not
+    loaded from the database.
+
+    If `folder` is acquisition wrapped, the reference to it held by its
+    container is rewritten, so that it is loaded with its new class.
+    Otherwise the caller has to take care of that.
+    """
+    ob = aq_base(folder)
+    if type(ob) is not Folder:
+        raise TypeError('Only Folder instances can be migrated, not %r'
+                        % type(ob))
+
+    objects = ob._objects
+    items = []
+    for info in objects:
+        id = info['id']
+        items.append((id, info['meta_type'], ob.__dict__[id]))
+
+    for id, meta_type, item in items:
+        delattr(ob, id)
+    if '_objects' in ob.__dict__:
+        del ob._objects
+
+    ob.__class__ = BTreeFolder
+    ob._initBTrees()
+    tree = ob._tree
+    for id, meta_type, item in items:
+        tree[id] = item
+        ob._index(id, meta_type)
+    ob._count.change(len(items))
+    ob._p_changed = True
+
+    container = aq_parent(aq_inner(folder))
+    if container is not None:
+        container = aq_base(container)
+        id = ob.getId()
+        if isinstance(container, BTreeObjectManager):
+            if container._tree.get(id) is ob:
+                # Rewrite the bucket holding the reference.
+                del container._tree[id]
+                container._tree[id] = ob
+        elif container.__dict__.get(id) is ob:
+            container._p_changed = True
+    return folder
@@ -28,6 +28,7 @@ from Acquisition import aq_get
 from Acquisition import aq_inner
 from Acquisition import aq_parent
 from App.special_dtml import DTMLFile
+from zope.globalrequest import getRequest
 
 ZCM_MANAGERS = '__ZCacheManager_ids__'
 
@@ -75,10 +76,48 @@ def getVerifiedManagerIds(container):
     return tuple(rval)
 
 
-# Anytime a CacheManager is added or removed, all _v_ZCacheable_cache
-# attributes must be invalidated.  manager_timestamp is a way to do
-# that.
+# Anytime a CacheManager is added or removed, the _v_ZCacheable_cache
+# attributes referring to a manager with its id must be invalidated.
+# manager_timestamps maps manager ids to the time they last changed,
+# manager_timestamp is the time any manager last changed.
 manager_timestamp = 0
+manager_timestamps = {}
+
+
+def managersChanged(manager_id):
+    '''
+    Invalidates the cache lookups of objects associated with manager_id.
+    '''
+    global manager_timestamp
+    manager_timestamp = manager_timestamps[manager_id] = time.time()
+
+
+def _containmentPath(ob):
+    '''
+    Returns the physical path of the container in which the cache
+    managers of ob are looked up, or None if it can't be determined.
+    '''
+    if hasattr(aq_base(ob), ZCM_MANAGERS):
+        return None
+    parent = aq_parent(aq_inner(ob))
+    if parent is None or not hasattr(parent, 'getPhysicalPath'):
+        return None
+    return parent.getPhysicalPath()
+
+
+def _requestMemo():
+    '''
+    Returns the mapping of (manager_id, containment path) to
+    (timestamp, cache) for the current request, if there is one.
+    '''
+    request = getRequest()
+    if request is None:
+        return None
+    # Avoid request.__getattr__, it looks up form variables.
+    memo = request.__dict__.get('_ZCacheable_caches')
+    if memo is None:
+        memo = request.__dict__['_ZCacheable_caches'] = {}
+    return memo
 
 
 class Cacheable(object):
@@ -120,21 +159,41 @@ class Cacheable(object):
     def ZCacheable_getCache(self):
         '''Gets the cache associated with this object.
         '''
-        if self.__manager_id is None:
+        manager_id = self.__manager_id
+        if manager_id is None:
             return None
+        timestamp = manager_timestamps.get(manager_id, 0)
         c = self._v_ZCacheable_cache
         if c is not None:
             # We have a volatile reference to the cache.
-            if self._v_ZCacheable_manager_timestamp == manager_timestamp:
+            if self._v_ZCacheable_manager_timestamp == timestamp:
                 return aq_base(c)
+        # Objects in the same container share the lookup during a request.
+        memo = _requestMemo()
+        key = None
+        if memo is not None:
+            path = _containmentPath(self)
+            if path is not None:
+                key = (manager_id, path)
+                entry = memo.get(key)
+                if entry is not None and entry[0] == timestamp:
+                    c = entry[1]
+                    if c is not None:
+                        self._v_ZCacheable_cache = c
+                        self._v_ZCacheable_manager_timestamp = timestamp
+                    return c
         manager = self.ZCacheable_getManager()
         if manager is not None:
             c = aq_base(manager.ZCacheManager_getCache())
         else:
+            c = None
+        if key is not None:
+            memo[key] = (timestamp, c)
+        if c is None:
             return None
         # Set a volatile reference to the cache then return it.
         self._v_ZCacheable_cache = c
-        self._v_ZCacheable_manager_timestamp = manager_timestamp
+        self._v_ZCacheable_manager_timestamp = timestamp
         return c
 
     security.declarePrivate('ZCacheable_isCachingEnabled')
@@ -226,10 +285,13 @@ class Cacheable(object):
             # Allow mtime_func to influence the mod time.
             mtime = mtime_func()
         base = aq_base(self)
-        mtime = max(getattr(base, '_p_mtime', mtime), mtime)
         klass = getattr(base, '__class__', None)
-        if klass:
-            mtime = max(getattr(klass, '_p_mtime', mtime), mtime)
+        for ob in (base, klass):
+            # _p_mtime is None for objects not stored yet, and a
+            # descriptor on the class of persistent objects.
+            ob_mtime = getattr(ob, '_p_mtime', None)
+            if isinstance(ob_mtime, (int, float)):
+                mtime = max(ob_mtime, mtime)
         return mtime
 
     security.declareProtected(ViewManagementScreensPermission,
@@ -426,8 +488,7 @@ class CacheManager(object):
             id = self.getId()
             if id not in ids:
                 setattr(container, ZCM_MANAGERS, ids + (id,))
-                global manager_timestamp
-                manager_timestamp = time.time()
+                managersChanged(id)
 
     def manage_beforeDelete(self, item, container):
         # Removes self from the list of cache managers.
@@ -440,8 +501,7 @@ class CacheManager(object):
                     setattr(container, ZCM_MANAGERS, manager_ids)
                 elif getattr(aq_base(self), ZCM_MANAGERS, None) is not None:
                     delattr(self, ZCM_MANAGERS)
-                global manager_timestamp
-                manager_timestamp = time.time()
+                managersChanged(id)
 
     security.declareProtected(ChangeCacheSettingsPermission,
                               'ZCacheManager_associate')
@@ -45,6 +45,7 @@ from zope.lifecycleevent import ObjectCopiedEvent
 from zope.lifecycleevent import ObjectMovedEvent
 from zope.container.contained import notifyContainerModified
 
+from OFS.copier import copyObject
 from OFS.event import ObjectWillBeMovedEvent
 from OFS.event import ObjectClonedEvent
 from OFS.interfaces import ICopyContainer
@@ -163,6 +164,21 @@ class CopyContainer(Base):
             id = 'copy%s_of_%s' % (n and n + 1 or '', orig_id)
             n = n + 1
 
+    def _get_unique_id(self, id, taken):
+        # Return an id for a copy of the object id which is neither used
+        # in this container nor in the set taken, and add it to taken.
+        id = self._get_id(id)
+        while id in taken:
+            match = copy_re.match(id)
+            if match:
+                id = 'copy%s_of_%s' % (int(match.group(1) or '1') + 1,
+                                       match.group(2))
+            else:
+                id = 'copy_of_%s' % id
+            id = self._get_id(id)
+        taken.add(id)
+        return id
+
     security.declareProtected(view_management_screens, 'manage_pasteObjects')
     def manage_pasteObjects(self, cb_copy_data=None, REQUEST=None):
         """Paste previously copied objects into the current object.
@@ -200,7 +216,10 @@ class CopyContainer(Base):
 
         result = []
         if op == 0:
-            # Copy operation
+            # Copy operation. All copies are made before they are added,
+            # so the container is changed and written once.
+            copies = []
+            taken = set()
             for ob in oblist:
                 orig_id = ob.getId()
                 if not ob.cb_isCopyable():
@@ -213,15 +232,22 @@ class CopyContainer(Base):
                 except Exception:
                     raise CopyError('Copy Error')
 
-                id = self._get_id(orig_id)
+                id = self._get_unique_id(orig_id, taken)
                 result.append({'id': orig_id, 'new_id': id})
 
                 orig_ob = ob
                 ob = ob._getCopy(self)
                 ob._setId(id)
                 notify(ObjectCopiedEvent(ob, orig_ob))
+                copies.append((id, ob))
+
+            if _batchable(self, '_setObject', '_setObjects'):
+                self._setObjects(copies)
+            else:
+                for id, ob in copies:
+                    self._setObject(id, ob)
 
-                self._setObject(id, ob)
+            for id, orig_ob in copies:
                 ob = self._getOb(id)
                 ob.wl_clearLocks()
 
@@ -235,7 +261,10 @@ class CopyContainer(Base):
                 return self.manage_main(self, REQUEST, cb_dataValid=1)
 
         elif op == 1:
-            # Move operation
+            # Move operation. The objects are removed from each of their
+            # containers and added to this one at once.
+            moves = []
+            taken = set()
             for ob in oblist:
                 orig_id = ob.getId()
                 if not ob.cb_isMoveable():
@@ -254,10 +283,15 @@ class CopyContainer(Base):
                 orig_container = aq_parent(aq_inner(ob))
                 if aq_base(orig_container) is aq_base(self):
                     id = orig_id
+                    taken.add(id)
                 else:
-                    id = self._get_id(orig_id)
+                    id = self._get_unique_id(orig_id, taken)
                 result.append({'id': orig_id, 'new_id': id})
+                moves.append((ob, orig_container, orig_id, id))
 
+            containers = []
+            removed = {}
+            for ob, orig_container, orig_id, id in moves:
                 notify(ObjectWillBeMovedEvent(ob, orig_container, orig_id,
                                               self, id))
 
@@ -265,31 +299,31 @@ class CopyContainer(Base):
                 # along to the new location if needed.
                 ob.manage_changeOwnershipType(explicit=1)
 
-                try:
-                    orig_container._delObject(orig_id, suppress_events=True)
-                except TypeError:
-                    orig_container._delObject(orig_id)
-                    warnings.warn(
-                        "%s._delObject without suppress_events is discouraged."
-                        % orig_container.__class__.__name__,
-                        DeprecationWarning)
+                key = _key(orig_container)
+                if key not in removed:
+                    containers.append(orig_container)
+                    removed[key] = []
+                removed[key].append(orig_id)
+
+            for orig_container in containers:
+                _removeMoved(orig_container, removed[_key(orig_container)])
+            items = []
+            for ob, orig_container, orig_id, id in moves:
                 ob = aq_base(ob)
                 ob._setId(id)
+                items.append((id, ob))
+            _addMoved(self, items)
 
-                try:
-                    self._setObject(id, ob, set_owner=0, suppress_events=True)
-                except TypeError:
-                    self._setObject(id, ob, set_owner=0)
-                    warnings.warn(
-                        "%s._setObject without suppress_events is discouraged."
-                        % self.__class__.__name__, DeprecationWarning)
+            for ob, orig_container, orig_id, id in moves:
                 ob = self._getOb(id)
-
                 notify(ObjectMovedEvent(ob, orig_container, orig_id, self, id))
+            for orig_container in containers:
                 notifyContainerModified(orig_container)
-                if aq_base(orig_container) is not aq_base(self):
-                    notifyContainerModified(self)
+            if _key(self) not in removed:
+                notifyContainerModified(self)
 
+            for ob, orig_container, orig_id, id in moves:
+                ob = self._getOb(id)
                 ob._postCopy(self, op=1)
                 # try to make ownership implicit if possible
                 ob.manage_changeOwnershipType(explicit=0)
@@ -312,12 +346,72 @@ class CopyContainer(Base):
         """Rename several sub-objects"""
         if len(ids) != len(new_ids):
             raise BadRequest('Please rename each listed object.')
-        for i in range(len(ids)):
-            if ids[i] != new_ids[i]:
-                self.manage_renameObject(ids[i], new_ids[i], REQUEST)
+        renames = [(id, new_id) for id, new_id in zip(ids, new_ids)
+                   if id != new_id]
+        if not _batchable(self, 'manage_renameObject',
+                          'manage_renameObjects'):
+            # A subclass renames single objects differently.
+            for id, new_id in renames:
+                self.manage_renameObject(id, new_id, REQUEST)
+        elif renames:
+            self._renameObjects(renames)
         if REQUEST is not None:
             return self.manage_main(self, REQUEST)
 
+    def _renameObjects(self, renames):
+        # Rename the objects of the (id, new_id) pairs of renames at once,
+        # sending one IContainerModifiedEvent.
+        old_ids = set([id for id, new_id in renames])
+        new_ids = set()
+        for id, new_id in renames:
+            try:
+                # An object being renamed may leave its id to another one.
+                self._checkId(new_id, allow_dup=new_id in old_ids)
+            except Exception:
+                raise CopyError('Invalid Id')
+            if new_id in new_ids:
+                raise CopyError('Invalid Id')
+            new_ids.add(new_id)
+
+        obs = []
+        for id, new_id in renames:
+            ob = self._getOb(id)
+
+            if ob.wl_isLocked():
+                raise ResourceLockedError('Object "%s" is locked' % ob.getId())
+            if not ob.cb_isMoveable():
+                raise CopyError('Not Supported')
+            self._verifyObjectPaste(ob)
+
+            try:
+                ob._notifyOfCopyTo(self, op=1)
+            except ConflictError:
+                raise
+            except Exception:
+                raise CopyError('Rename Error')
+            obs.append(ob)
+
+        for ob, (id, new_id) in zip(obs, renames):
+            notify(ObjectWillBeMovedEvent(ob, self, id, self, new_id))
+
+        _removeMoved(self, [id for id, new_id in renames])
+        items = []
+        for ob, (id, new_id) in zip(obs, renames):
+            ob = aq_base(ob)
+            ob._setId(new_id)
+            items.append((new_id, ob))
+        # Note - because a rename always keeps the same context, we
+        # can just leave the ownership info unchanged.
+        _addMoved(self, items)
+
+        obs = [self._getOb(new_id) for id, new_id in renames]
+        for ob, (id, new_id) in zip(obs, renames):
+            notify(ObjectMovedEvent(ob, self, id, self, new_id))
+        notifyContainerModified(self)
+
+        for ob in obs:
+            ob._postCopy(self, op=1)
+
     security.declareProtected(view_management_screens, 'manage_renameObject')
     def manage_renameObject(self, id, new_id, REQUEST=None):
         """Rename a particular sub-object.
@@ -528,10 +622,13 @@ class CopySource(Base):
                 'Container "%r" needs to be in the database' % container)
 
         # Ask an object for a new copy of itself.
-        with tempfile.TemporaryFile() as f:
-            self._p_jar.exportFile(self._p_oid, f)
-            f.seek(0)
-            ob = container._p_jar.importFile(f)
+        if self._p_jar is container._p_jar:
+            ob = copyObject(self)
+        else:
+            with tempfile.TemporaryFile() as f:
+                self._p_jar.exportFile(self._p_oid, f)
+                f.seek(0)
+                ob = container._p_jar.importFile(f)
 
         # Cleanup the copy.  It may contain private objects that the current
         # user is not allowed to see.
@@ -669,3 +766,53 @@ def cookie_path(request):
     # Return a "path" value for use in a cookie that refers
     # to the root of the Zope object space.
     return request['BASEPATH1'] or "/"
+
+
+def _batchable(ob, name, batch_name):
+    # Check whether the method batch_name of ob does for several objects
+    # at once what the method name does for one. It does not if a
+    # subclass overrides name, but not batch_name. The same goes for
+    # the lazy variants of listing methods, like iterObjectIds.
+    single = batch = None
+    for klass in ob.__class__.__mro__:
+        if single is None and name in klass.__dict__:
+            single = klass
+        if batch is None and batch_name in klass.__dict__:
+            batch = klass
+    return (single is not None and batch is not None and
+            issubclass(batch, single))
+
+
+def _key(container):
+    return id(aq_base(container))
+
+
+def _removeMoved(container, ids):
+    # Remove the objects being moved from container without events.
+    if _batchable(container, '_delObject', '_delObjects'):
+        container._delObjects(ids, suppress_events=True)
+        return
+    for id in ids:
+        try:
+            container._delObject(id, suppress_events=True)
+        except TypeError:
+            container._delObject(id)
+            warnings.warn(
+                "%s._delObject without suppress_events is discouraged."
+                % container.__class__.__name__, DeprecationWarning)
+
+
+def _addMoved(container, items):
+    # Add the (id, object) pairs of the objects being moved to container
+    # without events.
+    if _batchable(container, '_setObject', '_setObjects'):
+        container._setObjects(items, set_owner=0, suppress_events=True)
+        return
+    for id, ob in items:
+        try:
+            container._setObject(id, ob, set_owner=0, suppress_events=True)
+        except TypeError:
+            container._setObject(id, ob, set_owner=0)
+            warnings.warn(
+                "%s._setObject without suppress_events is discouraged."
+                % container.__class__.__name__, DeprecationWarning)
@@ -12,6 +12,9 @@
 ##############################################################################
 """Find support
 """
+from itertools import chain
+import time
+
 from AccessControl import ClassSecurityInfo
 from AccessControl.class_init import InitializeClass
 from AccessControl.Permission import getPermissionIdentifier
@@ -26,6 +29,7 @@ from DocumentTemplate.security import RestrictedDTML
 from ExtensionClass import Base
 from zope.interface import implementer
 
+from OFS.CopySupport import _batchable
 from OFS.interfaces import IFindSupport
 import collections
 
@@ -53,21 +57,41 @@ class FindSupport(Base):
         {'label': 'Find', 'action': 'manage_findForm'},
     )
 
+    # Limits of a search made with the management screens. The search
+    # stops after this many objects are found or after this many
+    # seconds. None means no limit.
+    find_limit = 1000
+    find_time_budget = 30
+
     security.declareProtected(view_management_screens, 'ZopeFind')
     def ZopeFind(self, obj, obj_ids=None, obj_metatypes=None,
                  obj_searchterm=None, obj_expr=None,
                  obj_mtime=None, obj_mspec=None,
                  obj_permission=None, obj_roles=None,
                  search_sub=0,
-                 REQUEST=None, result=None, pre=''):
+                 REQUEST=None, result=None, pre='',
+                 limit=None, max_objects_visited=None, time_budget=None):
         """Zope Find interface"""
+        if (result is None and not obj_searchterm and not obj_expr and
+                not (obj_permission and obj_roles)):
+            # Ids and meta types can be looked up in a find index, if
+            # there is one.
+            from OFS.findindex import findWithIndex
+            found = findWithIndex(
+                obj, obj_ids=obj_ids, obj_metatypes=obj_metatypes,
+                obj_mtime=obj_mtime, obj_mspec=obj_mspec,
+                search_sub=search_sub, pre=pre, limit=limit)
+            if found is not None:
+                return found
         return self.ZopeFindAndApply(
             obj, obj_ids=obj_ids,
             obj_metatypes=obj_metatypes, obj_searchterm=obj_searchterm,
             obj_expr=obj_expr, obj_mtime=obj_mtime, obj_mspec=obj_mspec,
             obj_permission=obj_permission, obj_roles=obj_roles,
             search_sub=search_sub, REQUEST=REQUEST, result=result,
-            pre=pre, apply_func=None, apply_path='')
+            pre=pre, apply_func=None, apply_path='', limit=limit,
+            max_objects_visited=max_objects_visited,
+            time_budget=time_budget)
 
     security.declareProtected(view_management_screens, 'ZopeFindAndApply')
     def ZopeFindAndApply(self, obj, obj_ids=None, obj_metatypes=None,
@@ -76,88 +100,249 @@ class FindSupport(Base):
                          obj_permission=None, obj_roles=None,
                          search_sub=0,
                          REQUEST=None, result=None, pre='',
-                         apply_func=None, apply_path=''):
+                         apply_func=None, apply_path='',
+                         limit=None, max_objects_visited=None,
+                         time_budget=None):
         """Zope Find interface and apply"""
 
         if result is None:
             result = []
+            finder = ObjectFinder.fromQuery(
+                obj_ids, obj_metatypes, obj_searchterm, obj_expr,
+                obj_mtime, obj_mspec, obj_permission, obj_roles,
+                search_sub, limit, max_objects_visited, time_budget)
+        else:
+            # A search continued with the criteria already prepared.
+            finder = ObjectFinder(
+                obj_ids, obj_metatypes, obj_searchterm, obj_expr,
+                obj_mtime, obj_mspec, obj_permission, obj_roles,
+                search_sub, limit, max_objects_visited, time_budget)
 
-            if obj_metatypes and 'all' in obj_metatypes:
-                obj_metatypes = None
+        try:
+            add_result = result.append
+        except Exception:
+            raise AttributeError(repr(result))
 
-            if obj_mtime and isinstance(obj_mtime, str):
-                obj_mtime = DateTime(obj_mtime).timeTime()
+        if apply_func:
+            # The objects found are not kept, so they are deactivated
+            # again like the others.
+            finder.keep = False
+            for p, ob in finder.find(obj, pre):
+                apply_func(ob, (apply_path + '/' + p))
+        else:
+            for item in finder.find(obj, pre):
+                add_result(item)
+
+        if finder.stopped and REQUEST is not None:
+            REQUEST.set('find_stopped', finder.stopped)
+        return result
 
-            if obj_permission:
-                obj_permission = getPermissionIdentifier(obj_permission)
+    security.declareProtected(view_management_screens, 'ZopeFindIter')
+    def ZopeFindIter(self, obj, obj_ids=None, obj_metatypes=None,
+                     obj_searchterm=None, obj_expr=None,
+                     obj_mtime=None, obj_mspec=None,
+                     obj_permission=None, obj_roles=None,
+                     search_sub=0, pre='',
+                     limit=None, max_objects_visited=None, time_budget=None):
+        """Iterate over the (path, object) tuples found"""
+        finder = ObjectFinder.fromQuery(
+            obj_ids, obj_metatypes, obj_searchterm, obj_expr,
+            obj_mtime, obj_mspec, obj_permission, obj_roles,
+            search_sub, limit, max_objects_visited, time_budget)
+        return finder.find(obj, pre)
 
-            if obj_roles and isinstance(obj_roles, str):
-                obj_roles = [obj_roles]
+InitializeClass(FindSupport)
 
-            if obj_expr:
-                # Setup expr machinations
-                md = td()
-                obj_expr = (Eval(obj_expr), md, md._push, md._pop)
 
-        base = aq_base(obj)
+class ObjectFinder(object):
+    """Find the objects matching a query in a tree of containers.
 
-        if not hasattr(base, 'objectItems'):
-            return result
-        try:
-            items = obj.objectItems()
-        except Exception:
-            return result
+    The items of a container are visited one at a time. If the query
+    asks for ids or meta types, the items ruled out by the ids and meta
+    types the container keeps of them are not loaded, unless they are
+    containers to be searched themselves. The search stops after `limit`
+    objects are found, `max_objects_visited` items are visited or
+    `time_budget` seconds, and `stopped` is set to 'limit', 'visited' or
+    'time' then.
+    """
+
+    # Whether objects found are kept active.
+    keep = True
 
+    def __init__(self, obj_ids=None, obj_metatypes=None,
+                 obj_searchterm=None, obj_expr=None,
+                 obj_mtime=None, obj_mspec=None,
+                 obj_permission=None, obj_roles=None,
+                 search_sub=0, limit=None, max_objects_visited=None,
+                 time_budget=None):
+        self.obj_ids = obj_ids
+        self.obj_metatypes = obj_metatypes
+        self.obj_searchterm = obj_searchterm
+        self.obj_expr = obj_expr
+        self.obj_mtime = obj_mtime
+        self.obj_mspec = obj_mspec
+        self.obj_permission = obj_permission
+        self.obj_roles = obj_roles
+        self.search_sub = search_sub
+        self.limit = limit
+        self.max_objects_visited = max_objects_visited
+        self.time_budget = time_budget
+        self.found = 0
+        self.visited = 0
+        self.stopped = None
+
+    @classmethod
+    def fromQuery(cls, obj_ids=None, obj_metatypes=None,
+                  obj_searchterm=None, obj_expr=None,
+                  obj_mtime=None, obj_mspec=None,
+                  obj_permission=None, obj_roles=None,
+                  search_sub=0, limit=None, max_objects_visited=None,
+                  time_budget=None):
+        """Make a finder for the criteria as given in a request."""
+        if obj_metatypes and 'all' in obj_metatypes:
+            obj_metatypes = None
+
+        if obj_mtime and isinstance(obj_mtime, str):
+            obj_mtime = DateTime(obj_mtime).timeTime()
+
+        if obj_permission:
+            obj_permission = getPermissionIdentifier(obj_permission)
+
+        if obj_roles and isinstance(obj_roles, str):
+            obj_roles = [obj_roles]
+
+        if obj_expr:
+            # Setup expr machinations
+            md = td()
+            obj_expr = (Eval(obj_expr), md, md._push, md._pop)
+
+        return cls(obj_ids, obj_metatypes, obj_searchterm, obj_expr,
+                   obj_mtime, obj_mspec, obj_permission, obj_roles,
+                   search_sub, limit, max_objects_visited, time_budget)
+
+    def find(self, obj, pre=''):
+        """Iterate over the (path, object) tuples found in `obj`."""
+        if self.time_budget is None:
+            self._deadline = None
+        else:
+            self._deadline = time.time() + self.time_budget
+        return self._find(obj, pre)
+
+    def _items(self, obj):
+        # Return the items of the container as (id, object, candidate)
+        # tuples, candidate being false for items the container already
+        # rules out. The ids are only looked at without loading the
+        # objects if the container lists them the way objectItems does.
+        base = aq_base(obj)
+        obj_ids = self.obj_ids
+        obj_metatypes = self.obj_metatypes
+        if ((obj_ids or obj_metatypes) and
+                hasattr(base, 'iterObjectIds') and hasattr(base, '_getOb') and
+                _batchable(base, 'objectIds', 'iterObjectIds') and
+                _batchable(base, 'objectItems', 'iterObjectIds')):
+            if obj_metatypes:
+                candidates = set(obj.iterObjectIds(obj_metatypes))
+            else:
+                candidates = None
+            for id in obj.iterObjectIds():
+                candidate = ((candidates is None or id in candidates) and
+                             (not obj_ids or id in obj_ids))
+                ob = obj._getOb(id, None)
+                if ob is not None:
+                    yield id, ob, candidate
+        else:
+            for id, ob in obj.objectItems():
+                yield id, ob, True
+
+    def _stop(self, reason):
+        self.stopped = reason
+        return True
+
+    def _exhausted(self):
+        if self.limit is not None and self.found >= self.limit:
+            return self._stop('limit')
+        if (self.max_objects_visited is not None and
+                self.visited >= self.max_objects_visited):
+            return self._stop('visited')
+        if self._deadline is not None and time.time() >= self._deadline:
+            return self._stop('time')
+        return False
+
+    def _find(self, obj, pre):
+        if not hasattr(aq_base(obj), 'objectItems'):
+            return
         try:
-            add_result = result.append
+            items = self._items(obj)
+            # Fail here for containers failing to list their items.
+            first = next(items, None)
         except Exception:
-            raise AttributeError(repr(result))
+            return
+        if first is None:
+            return
+        items = chain((first, ), items)
+
+        search_sub = self.search_sub
+        for id, ob, candidate in items:
+            if self.stopped or self._exhausted():
+                return
+            self.visited += 1
 
-        for id, ob in items:
             if pre:
                 p = "%s/%s" % (pre, id)
             else:
                 p = id
 
+            bs = aq_base(ob)
+            # Look at the class, a ghost is not loaded by that.
+            container = search_sub and _isContainer(bs)
+            if not candidate and not container:
+                continue
+
             dflag = 0
-            if hasattr(ob, '_p_changed') and (ob._p_changed is None):
+            if hasattr(bs, '_p_changed') and (bs._p_changed is None):
                 dflag = 1
 
-            bs = aq_base(ob)
-            if ((not obj_ids or absattr(bs.getId()) in obj_ids) and
-                (not obj_metatypes or (hasattr(bs, 'meta_type') and
-                 bs.meta_type in obj_metatypes)) and
-                (not obj_searchterm or
-                 (hasattr(ob, 'PrincipiaSearchSource') and
-                  obj_searchterm in ob.PrincipiaSearchSource()) or
-                 (hasattr(ob, 'SearchableText') and
-                  obj_searchterm in ob.SearchableText())
-                 ) and
-                (not obj_expr or expr_match(ob, obj_expr)) and
-                (not obj_mtime or mtime_match(ob, obj_mtime, obj_mspec)) and
-                ((not obj_permission or not obj_roles) or
-                 role_match(ob, obj_permission, obj_roles))):
-
-                if apply_func:
-                    apply_func(ob, (apply_path + '/' + p))
-                else:
-                    add_result((p, ob))
+            if candidate and self._match(ob, bs):
+                self.found += 1
+                yield p, ob
+                if self.keep:
                     dflag = 0
 
-            if search_sub and hasattr(bs, 'objectItems'):
-                self.ZopeFindAndApply(ob, obj_ids, obj_metatypes,
-                                      obj_searchterm, obj_expr,
-                                      obj_mtime, obj_mspec,
-                                      obj_permission, obj_roles,
-                                      search_sub,
-                                      REQUEST, result, p,
-                                      apply_func, apply_path)
+            if container:
+                for item in self._find(ob, p):
+                    yield item
             if dflag:
                 ob._p_deactivate()
 
-        return result
-
-InitializeClass(FindSupport)
+    def _match(self, ob, bs):
+        obj_ids = self.obj_ids
+        obj_metatypes = self.obj_metatypes
+        obj_searchterm = self.obj_searchterm
+        obj_expr = self.obj_expr
+        obj_mtime = self.obj_mtime
+        obj_permission = self.obj_permission
+        obj_roles = self.obj_roles
+        return (
+            (not obj_ids or absattr(bs.getId()) in obj_ids) and
+            (not obj_metatypes or (hasattr(bs, 'meta_type') and
+             bs.meta_type in obj_metatypes)) and
+            (not obj_searchterm or
+             (hasattr(ob, 'PrincipiaSearchSource') and
+              obj_searchterm in ob.PrincipiaSearchSource()) or
+             (hasattr(ob, 'SearchableText') and
+              obj_searchterm in ob.SearchableText())
+             ) and
+            (not obj_expr or expr_match(ob, obj_expr)) and
+            (not obj_mtime or mtime_match(ob, obj_mtime, self.obj_mspec)) and
+            ((not obj_permission or not obj_roles) or
+             role_match(ob, obj_permission, obj_roles)))
+
+
+def _isContainer(ob):
+    # Simple items list no sub-objects, although they have objectItems.
+    klass = type(ob)
+    return (hasattr(klass, 'objectItems') and
+            getattr(klass, 'isPrincipiaFolderish', True))
 
 
 class td(RestrictedDTML, TemplateDict):
@@ -15,6 +15,7 @@
 
 from email.generator import _make_boundary
 from io import BytesIO
+import re
 import struct
 
 from AccessControl.class_init import InitializeClass
@@ -27,9 +28,14 @@ from Acquisition import Implicit
 from DateTime.DateTime import DateTime
 from Persistence import Persistent
 from six import binary_type
+from six import indexbytes
 from six import PY2
 from six import text_type
+import transaction
 from zExceptions import Redirect, ResourceLockedError
+from ZODB.utils import p64
+from ZODB.utils import u64
+from ZODB.utils import z64
 from zope.contenttype import guess_content_type
 from zope.event import notify
 from zope.interface import implementer
@@ -46,6 +52,7 @@ from OFS.role import RoleManager
 from OFS.SimpleItem import Item_w__name__
 from ZPublisher import HTTPRangeSupport
 from ZPublisher.HTTPRequest import FileUpload
+from ZPublisher.Iterators import IStreamIterator
 
 try:
     from html import escape
@@ -103,6 +110,7 @@ class File(Persistent, Implicit, PropertyManager,
 
     precondition = ''
     size = None
+    _pdata_index = None
 
     manage_editForm = DTMLFile('dtml/fileEdit', globals(),
                                Kind='File', kind='file')
@@ -252,30 +260,8 @@ class File(Persistent, Implicit, PropertyManager,
                         return True
 
                     # Linked Pdata objects. Urgh.
-                    pos = 0
-                    while data is not None:
-                        l = len(data.data)
-                        pos = pos + l
-                        if pos > start:
-                            # We are within the range
-                            lstart = l - (pos - start)
-
-                            if lstart < 0:
-                                lstart = 0
-
-                            # find the endpoint
-                            if end <= pos:
-                                lend = l - (pos - end)
-
-                                # Send and end transmission
-                                RESPONSE.write(data[lstart:lend])
-                                break
-
-                            # Not yet at the end, transmit what we have.
-                            RESPONSE.write(data[lstart:])
-
-                        data = data.next
-
+                    pos, data = self._find_pdata(data, start)
+                    self._write_pdata_range(RESPONSE, data, pos, start, end)
                     return True
 
                 else:
@@ -306,6 +292,7 @@ class File(Persistent, Implicit, PropertyManager,
                     RESPONSE.setStatus(206)  # Partial content
 
                     data = self.data
+                    index = self._get_pdata_index(data)
                     # The Pdata map allows us to jump into the Pdata chain
                     # arbitrarily during out-of-order range searching.
                     pdata_map = {}
@@ -329,6 +316,12 @@ class File(Persistent, Implicit, PropertyManager,
                         if isinstance(data, binary_type):
                             RESPONSE.write(data[start:end])
 
+                        elif index is not None:
+                            # Jump straight to the first record of the range.
+                            pos, data = self._find_pdata(pdata_map[0], start)
+                            self._write_pdata_range(
+                                RESPONSE, data, pos, start, end)
+
                         else:
                             # Yippee. Linked Pdata objects. The following
                             # calculations allow us to fast-forward through the
@@ -379,6 +372,52 @@ class File(Persistent, Implicit, PropertyManager,
                         b'\r\n--' + boundary.encode('ascii') + b'--\r\n')
                     return True
 
+    def _get_pdata_index(self, data):
+        # Return the offset index of the Pdata chain starting at data.
+        # Copies of a file get new oids for their chain but share the
+        # index of the original, which can be detected by its head.
+        index = self._pdata_index
+        if (index is None or self._p_jar is None or
+                isinstance(data, binary_type) or
+                index.get_oid(0) != data._p_oid):
+            return None
+        return index
+
+    def _find_pdata(self, data, start):
+        # Return the Pdata record of the chain starting at data which
+        # contains the byte at start, and the offset of that record.
+        index = self._get_pdata_index(data)
+        if index is None:
+            return 0, data
+        pos, oid = index.find(start)
+        return pos, self._p_jar.get(oid)
+
+    def _write_pdata_range(self, RESPONSE, data, pos, start, end):
+        # Write the bytes from start to end out of the Pdata chain, where
+        # data is the record at offset pos.
+        while data is not None:
+            l = len(data.data)
+            pos = pos + l
+            if pos > start:
+                # We are within the range
+                lstart = l - (pos - start)
+
+                if lstart < 0:
+                    lstart = 0
+
+                # find the endpoint
+                if end <= pos:
+                    lend = l - (pos - end)
+
+                    # Send and end transmission
+                    RESPONSE.write(data[lstart:lend])
+                    break
+
+                # Not yet at the end, transmit what we have.
+                RESPONSE.write(data[lstart:])
+
+            data = data.next
+
     security.declareProtected(View, 'index_html')
     def index_html(self, REQUEST, RESPONSE):
         """
@@ -433,6 +472,12 @@ class File(Persistent, Implicit, PropertyManager,
             RESPONSE.setBase(None)
             return data
 
+        if self._p_jar is not None and _is_committed(data):
+            # Let the server pull the chunks after the request is done,
+            # so they don't all end up in the object cache.
+            return PdataStreamIterator(
+                self._p_jar.db(), data._p_oid, self.size)
+
         while data is not None:
             RESPONSE.write(data.data)
             data = data.next
@@ -465,6 +510,7 @@ class File(Persistent, Implicit, PropertyManager,
             size = len(data)
         self.size = size
         self.data = data
+        self._update_pdata_index(data)
         self.ZCacheable_invalidate()
         self.ZCacheable_set(None)
         self.http__refreshEtag()
@@ -529,9 +575,17 @@ class File(Persistent, Implicit, PropertyManager,
                 getattr(file, 'filename', id), body, content_type)
         return content_type
 
-    def _read_data(self, file):
-        import transaction
+    def _update_pdata_index(self, data):
+        # Keep the index built by _read_data if it belongs to data.
+        index = getattr(self, '_v_pdata_index', None)
+        self._v_pdata_index = None
+        if index is not None and index.get_oid(0) == getattr(
+                data, '_p_oid', None):
+            self._pdata_index = index
+        elif self._pdata_index is not None:
+            self._pdata_index = None
 
+    def _read_data(self, file):
         n = 1 << 16
 
         if isinstance(file, text_type):
@@ -577,6 +631,8 @@ class File(Persistent, Implicit, PropertyManager,
         # and to allow us to get things out of memory as soon as
         # possible.
         _next = None
+        offsets = []
+        oids = []
         while end > 0:
             pos = end - n
             if pos < n:
@@ -597,9 +653,15 @@ class File(Persistent, Implicit, PropertyManager,
             assert data._p_oid is not None
             assert data._p_state == -1
 
+            offsets.append(pos)
+            oids.append(data._p_oid)
             _next = data
             end = pos
 
+        offsets.reverse()
+        oids.reverse()
+        self._v_pdata_index = PdataIndex(offsets, oids)
+
         return (_next, size)
 
     security.declareProtected(View, 'get_size')
@@ -731,8 +793,97 @@ def manage_addImage(self, id, file, title='', precondition='', content_type='',
     return id
 
 
+_svg_match = re.compile(
+    br'\s*(?:<\?xml[^>]*>\s*)?(?:<!--.*?-->\s*)*'
+    br'(?:<!DOCTYPE[^>]*>\s*)?(?:<!--.*?-->\s*)*<svg\b([^>]*)>',
+    re.S).match
+_svg_length_search = {
+    name: re.compile(
+        br'\s' + name + br'\s*=\s*["\']\s*([0-9.]+)\s*(?:px)?\s*["\']').search
+    for name in (b'width', b'height')
+}
+_svg_viewbox_search = re.compile(
+    br'\sviewBox\s*=\s*["\']\s*[-0-9.]+[\s,]+[-0-9.]+[\s,]+'
+    br'([0-9.]+)[\s,]+([0-9.]+)\s*["\']').search
+
+
+def _leading_bytes(data, size):
+    # Return at least the first size bytes of data and whether that is
+    # all of it. Of a Pdata chain only the needed records are loaded.
+    if isinstance(data, bytes):
+        return data, True
+    if not hasattr(data, 'next'):
+        return bytes(data), True
+    chunks = []
+    length = 0
+    while data is not None and length < size:
+        chunks.append(data.data)
+        length += len(data.data)
+        data = data.next
+    return b''.join(chunks), data is None
+
+
+def _jpeg_size(data):
+    # Walk the JPEG markers up to the first start of frame marker.
+    # Return None if data ends before the walk is done.
+    size = len(data)
+    pos = 2
+    while True:
+        pos = data.find(b'\xff', pos)
+        if pos < 0:
+            return None
+        while pos < size and indexbytes(data, pos) == 0xFF:
+            pos += 1
+        if pos + 1 >= size:
+            return None
+        marker = indexbytes(data, pos)
+        pos += 1
+        if marker == 0xDA:
+            # Start of scan, there is no frame header.
+            return -1, -1
+        if 0xC0 <= marker <= 0xC3:
+            if pos + 7 > size:
+                return None
+            h, w = struct.unpack_from('>HH', data, pos + 3)
+            return w, h
+        if pos + 2 > size:
+            return None
+        pos += struct.unpack_from('>H', data, pos)[0]
+
+
+def _webp_size(data):
+    kind = data[12:16]
+    if kind == b'VP8 ' and len(data) >= 30:
+        w, h = struct.unpack_from('<HH', data, 26)
+        return w & 0x3FFF, h & 0x3FFF
+    if kind == b'VP8L' and len(data) >= 25:
+        bits = struct.unpack_from('<L', data, 21)[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if kind == b'VP8X' and len(data) >= 30:
+        w = struct.unpack('<L', data[24:27] + b'\0')[0]
+        h = struct.unpack('<L', data[27:30] + b'\0')[0]
+        return w + 1, h + 1
+    return -1, -1
+
+
+def _svg_size(attributes):
+    width = _svg_length_search[b'width'](attributes)
+    height = _svg_length_search[b'height'](attributes)
+    if width is not None and height is not None:
+        return (int(round(float(width.group(1)))),
+                int(round(float(height.group(1)))))
+    match = _svg_viewbox_search(attributes)
+    if match is not None:
+        return tuple(int(round(float(v))) for v in match.groups())
+    return -1, -1
+
+
 def getImageInfo(data):
-    data = bytes(data)
+    # Only the leading bytes of the data are needed to find out the
+    # type and dimensions of an image, so chunked data is read one
+    # record at a time as far as needed.
+    full_data = data
+    data, complete = _leading_bytes(data, 1 << 12)
     size = len(data)
     height = -1
     width = -1
@@ -767,33 +918,33 @@ def getImageInfo(data):
     # handle JPEGs
     elif (size >= 2) and (data[:2] == b'\377\330'):
         content_type = 'image/jpeg'
-        jpeg = BytesIO(data)
-        jpeg.read(2)
-        b = jpeg.read(1)
-        try:
-            while (b and ord(b) != 0xDA):
-                while (ord(b) != 0xFF):
-                    b = jpeg.read(1)
-                while (ord(b) == 0xFF):
-                    b = jpeg.read(1)
-                if (ord(b) >= 0xC0 and ord(b) <= 0xC3):
-                    jpeg.read(3)
-                    h, w = struct.unpack(">HH", jpeg.read(4))
-                    break
-                else:
-                    jpeg.read(int(struct.unpack(">H", jpeg.read(2))[0]) - 2)
-                b = jpeg.read(1)
-            width = int(w)
-            height = int(h)
-        except Exception:
-            pass
+        while True:
+            dimensions = _jpeg_size(data)
+            if dimensions is not None or complete:
+                break
+            # The frame header comes after a large metadata segment.
+            data, complete = _leading_bytes(full_data, len(data) * 2)
+        if dimensions is not None:
+            width, height = dimensions
+
+    # handle WebP
+    elif (size >= 16) and data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        content_type = 'image/webp'
+        width, height = _webp_size(data)
+
+    # handle SVG
+    else:
+        match = _svg_match(data[:1 << 16])
+        if match is not None:
+            content_type = 'image/svg+xml'
+            width, height = _svg_size(match.group(1))
 
     return content_type, width, height
 
 
 class Image(File):
-    """Image objects can be GIF, PNG or JPEG and have the same methods
-    as File objects.  Images also have a string representation that
+    """Image objects can be GIF, PNG, JPEG, WebP or SVG and have the same
+    methods as File objects.  Images also have a string representation that
     renders an HTML 'IMG' tag.
     """
     meta_type = 'Image'
@@ -857,6 +1008,7 @@ class Image(File):
 
         self.size = size
         self.data = data
+        self._update_pdata_index(data)
 
         ct, width, height = getImageInfo(data)
         if ct:
@@ -954,6 +1106,9 @@ class Pdata(Persistent, Implicit):
     # Wrapper for possibly large data
 
     next = None
+    # Records are never changed once they are stored, so copies of a
+    # file share them with the original, see OFS.copier.
+    _copy_shared = True
 
     def __init__(self, data):
         self.data = data
@@ -984,3 +1139,95 @@ class Pdata(Persistent, Implicit):
 
     if PY2:
         __str__ = __bytes__
+
+
+class PdataIndex(Persistent):
+    """Offsets and oids of the records of a Pdata chain.
+
+    Both are kept as strings of packed 8-byte integers. This keeps the
+    index small, even for files with thousands of records, and allows
+    a binary search for the record containing a given offset.
+    """
+
+    _copy_shared = True
+
+    def __init__(self, offsets, oids):
+        self.offsets = b''.join([p64(offset) for offset in offsets])
+        self.oids = b''.join(oids)
+
+    def __len__(self):
+        return len(self.oids) >> 3
+
+    def get_offset(self, i):
+        return u64(self.offsets[i << 3:(i + 1) << 3])
+
+    def get_oid(self, i):
+        return self.oids[i << 3:(i + 1) << 3]
+
+    def find(self, pos):
+        """Return offset and oid of the record containing pos.
+        """
+        lo, hi = 0, len(self)
+        while hi - lo > 1:
+            mid = (lo + hi) >> 1
+            if self.get_offset(mid) <= pos:
+                lo = mid
+            else:
+                hi = mid
+        return self.get_offset(lo), self.get_oid(lo)
+
+
+def _is_committed(pdata):
+    # Pdata records are never changed once they are written, so a chain
+    # can be read from another connection if its head is committed.
+    if pdata._p_oid is None:
+        return False
+    pdata._p_activate()
+    return pdata._p_serial != z64
+
+
+@implementer(IStreamIterator)
+class PdataStreamIterator(object):
+    """Stream iterator over a committed chain of Pdata records.
+
+    The request only hands over the oid of the first record. The chunks
+    are loaded from a private connection while the server pulls them
+    and are turned into ghosts again once they are sent, so only one
+    chunk per download is kept in memory.
+    """
+
+    def __init__(self, db, oid, size):
+        self.db = db
+        self.size = size
+        self._oid = oid
+        self._connection = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._oid is None:
+            self.close()
+            raise StopIteration
+
+        if self._connection is None:
+            self._connection = self.db.open(
+                transaction_manager=transaction.TransactionManager())
+
+        pdata = self._connection.get(self._oid)
+        data = pdata.data
+        _next = pdata.next
+        self._oid = None if _next is None else _next._p_oid
+        pdata._p_deactivate()
+        return data
+
+    next = __next__
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        self._oid = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
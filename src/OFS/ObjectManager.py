@@ -55,6 +55,7 @@ from App.Management import Navigation
 from App.Management import Tabs
 from App.special_dtml import DTMLFile
 from OFS import bbb
+from OFS.CopySupport import _batchable
 from OFS.CopySupport import CopyContainer
 from OFS.interfaces import IObjectManager
 from OFS.Traversable import Traversable
@@ -62,6 +63,8 @@ from OFS.event import ObjectWillBeAddedEvent
 from OFS.event import ObjectWillBeRemovedEvent
 from OFS.Lockable import LockableItem
 from OFS.subscribers import compatibilityCall
+from ZTUtils.Lazy import LazyMap
+from ZTUtils.Zope import Batch
 
 try:
     from html import escape
@@ -185,6 +188,7 @@ class ObjectManager(CopyContainer,
     isAnObjectManager = 1
     isPrincipiaFolderish = 1
     has_order_support = 0  # See OrderSupport.py
+    manage_main_batch_size = 1000  # Items per page of manage_main
 
     # IPossibleSite API
     _components = None
@@ -362,6 +366,74 @@ class ObjectManager(CopyContainer,
 
         return id
 
+    def _setObjects(self, items, set_owner=1, suppress_events=False):
+        """Set several objects into this container at once.
+
+        'items' is a sequence of (id, object) pairs. The list of objects
+        is changed once, the IObjectWillBeAddedEvents are sent for all
+        objects before they are added, the IObjectAddedEvents after, and
+        only one IContainerModifiedEvent is sent. Returns the ids.
+        """
+        if not _batchable(self, '_setObject', '_setObjects'):
+            # A subclass handles single objects differently.
+            return [self._setObject(id, ob, set_owner=set_owner,
+                                    suppress_events=suppress_events)
+                    for id, ob in items]
+        ids = []
+        obs = []
+        for id, ob in items:
+            v = self._checkId(id)
+            if v is not None:
+                id = v
+            ids.append(id)
+            obs.append(ob)
+        if len(set(ids)) != len(ids):
+            raise BadRequest('The ids of the objects are not unique.')
+
+        # If objects by the given ids already exist, remove them.
+        existing = [id for id in ids if self.hasObject(id)]
+        if existing:
+            self._delObjects(existing)
+
+        if not suppress_events:
+            for id, ob in zip(ids, obs):
+                notify(ObjectWillBeAddedEvent(ob, self, id))
+
+        self._addObjectInfos([{'id': id,
+                               'meta_type': getattr(ob, 'meta_type', None)}
+                              for id, ob in zip(ids, obs)])
+        for id, ob in zip(ids, obs):
+            self._setOb(id, ob)
+        obs = [self._getOb(id) for id in ids]
+
+        if set_owner:
+            user = getSecurityManager().getUser()
+            userid = user.getId() if user is not None else None
+            for ob in obs:
+                ob.manage_fixupOwnershipAfterAdd()
+                if (userid is not None and
+                        getattr(ob, '__ac_local_roles__', _marker) is None):
+                    ob.manage_setLocalRoles(userid, ['Owner'])
+
+        if not suppress_events:
+            for id, ob in zip(ids, obs):
+                notify(ObjectAddedEvent(ob, self, id))
+            notifyContainerModified(self)
+
+        for ob in obs:
+            compatibilityCall('manage_afterAdd', ob, ob, self)
+
+        return ids
+
+    def _addObjectInfos(self, infos):
+        # Add the meta data of new objects to the list of objects.
+        self._objects = self._objects + tuple(infos)
+
+    def _removeObjectInfos(self, ids):
+        # Remove the meta data of objects from the list of objects.
+        self._objects = tuple([i for i in self._objects
+                               if i['id'] not in ids])
+
     def manage_afterAdd(self, item, container):
         # Don't do recursion anymore, a subscriber does that.
         pass
@@ -407,6 +479,45 @@ class ObjectManager(CopyContainer,
             notify(ObjectRemovedEvent(ob, self, id))
             notifyContainerModified(self)
 
+    def _delObjects(self, ids, dp=1, suppress_events=False):
+        """Delete several objects from this container at once.
+
+        The list of objects is changed once, the
+        IObjectWillBeRemovedEvents are sent for all objects before they
+        are removed, the IObjectRemovedEvents after, and only one
+        IContainerModifiedEvent is sent.
+        """
+        if not _batchable(self, '_delObject', '_delObjects'):
+            # A subclass handles single objects differently.
+            for id in ids:
+                self._delObject(id, dp, suppress_events=suppress_events)
+            return
+        ids = list(ids)
+        obs = [self._getOb(id) for id in ids]
+
+        for ob in obs:
+            compatibilityCall('manage_beforeDelete', ob, ob, self)
+
+        if not suppress_events:
+            for id, ob in zip(ids, obs):
+                notify(ObjectWillBeRemovedEvent(ob, self, id))
+
+        self._removeObjectInfos(set(ids))
+        for id in ids:
+            self._delOb(id)
+
+        for ob in obs:
+            # See _delObject.
+            try:
+                ob._v__object_deleted__ = 1
+            except Exception:
+                pass
+
+        if not suppress_events:
+            for id, ob in zip(ids, obs):
+                notify(ObjectRemovedEvent(ob, self, id))
+            notifyContainerModified(self)
+
     security.declareProtected(access_contents_information, 'objectIds')
     def objectIds(self, spec=None):
         # Returns a list of subobject ids of the current object.
@@ -440,6 +551,69 @@ class ObjectManager(CopyContainer,
         # Return a tuple of mappings containing subobject meta-data
         return tuple(d.copy() for d in self._objects)
 
+    security.declareProtected(access_contents_information, 'iterObjectIds')
+    def iterObjectIds(self, spec=None):
+        # Iterate over the subobject ids of the current object, without
+        # loading the subobjects. If 'spec' is specified, yields only ids
+        # of objects whose meta_type matches 'spec'.
+        if not _batchable(self, 'objectIds', 'iterObjectIds'):
+            # A subclass lists its subobjects in its own objectIds.
+            return iter(self.objectIds(spec))
+        return self._iterObjectIds(spec)
+
+    def _iterObjectIds(self, spec):
+        if isinstance(spec, str):
+            spec = [spec]
+        for d in self._objects:
+            if spec is None or d['meta_type'] in spec:
+                yield d['id']
+
+    def iterObjectMap(self):
+        # Iterate over mappings containing subobject meta-data, without
+        # loading the subobjects.
+        if not _batchable(self, 'objectMap', 'iterObjectMap'):
+            return iter(self.objectMap())
+        return (d.copy() for d in self._objects)
+
+    security.declareProtected(access_contents_information,
+                              'objectValuesSlice')
+    def objectValuesSlice(self, start=0, size=None, spec=None):
+        # Returns a list of at most 'size' subobjects, starting with the
+        # one at position 'start'. Only these subobjects are loaded.
+        return [self._getOb(id)
+                for id in self._sliceIds(start, size, spec)]
+
+    security.declareProtected(access_contents_information,
+                              'objectItemsSlice')
+    def objectItemsSlice(self, start=0, size=None, spec=None):
+        # Returns a list of at most 'size' (id, subobject) tuples,
+        # starting with the one at position 'start'. Only these
+        # subobjects are loaded.
+        return [(id, self._getOb(id))
+                for id in self._sliceIds(start, size, spec)]
+
+    def _sliceIds(self, start, size, spec):
+        ids = self.objectIds(spec)
+        if size is None:
+            return ids[start:]
+        return ids[start:start + size]
+
+    security.declareProtected(access_contents_information, 'lazyObjectItems')
+    def lazyObjectItems(self, spec=None):
+        # Returns a lazy sequence of (id, subobject) tuples. A subobject
+        # is loaded when its item is accessed.
+        return LazyMap(lambda id: (id, self._getOb(id)),
+                       self.objectIds(spec))
+
+    security.declareProtected(access_contents_information,
+                              'objectItemsBatch')
+    def objectItemsBatch(self, start=0, size=None, spec=None):
+        # Returns a ZTUtils Batch of (id, subobject) tuples, used by
+        # manage_main to page through large folders.
+        if size is None:
+            size = self.manage_main_batch_size
+        return Batch(self.lazyObjectItems(spec), size, start)
+
     security.declareProtected(access_contents_information, 'objectIds_d')
     def objectIds_d(self, t=None):
         if hasattr(self, '_reserved_names'):
@@ -533,18 +707,19 @@ class ObjectManager(CopyContainer,
         for n in ids:
             if n in p:
                 raise BadRequest('Not Deletable')
-        while ids:
-            id = ids[-1]
-            v = self._getOb(id, self)
+        # Check all objects first, then delete them at once.
+        seen = set()
+        for id in ids:
+            v = self._getOb(id, self) if id not in seen else self
+
+            if v is self:
+                raise BadRequest('%s does not exist' % escape(id, True))
 
             if v.wl_isLocked():
                 raise ResourceLockedError(
                     'Object "%s" is locked.' % v.getId())
-
-            if v is self:
-                raise BadRequest('%s does not exist' % escape(ids[-1], True))
-            self._delObject(id)
-            del ids[-1]
+            seen.add(id)
+        self._delObjects(ids)
         if REQUEST is not None:
             return self.manage_main(self, REQUEST)
 
@@ -568,7 +743,12 @@ class ObjectManager(CopyContainer,
             obj_ids.sort()
             for id in obj_ids:
                 o = self._getOb(id)
-                if hasattr(aq_base(o), 'isPrincipiaFolderish') and \
+                base = aq_base(o)
+                if getattr(base, '_p_changed', 0) is None:
+                    # Don't load ghosts just to find they aren't folders.
+                    if not getattr(type(base), 'isPrincipiaFolderish', 0):
+                        continue
+                if hasattr(base, 'isPrincipiaFolderish') and \
                    o.isPrincipiaFolderish:
                     r.append(o)
         return r
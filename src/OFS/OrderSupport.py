@@ -129,7 +129,6 @@ class OrderSupport(object):
         # Move specified sub-objects by delta.
         if isinstance(ids, basestring):
             ids = (ids,)
-        min_position = 0
         objects = list(self._objects)
         if subset_ids is None:
             subset_ids = self.getIdsSubset(objects)
@@ -140,17 +139,10 @@ class OrderSupport(object):
             ids = list(ids)
             ids.reverse()
             subset_ids.reverse()
-        counter = 0
-
-        for id in ids:
-            old_position = subset_ids.index(id)
-            new_position = max(old_position - abs(delta), min_position)
-            if new_position == min_position:
-                min_position += 1
-            if not old_position == new_position:
-                subset_ids.remove(id)
-                subset_ids.insert(new_position, id)
-                counter += 1
+        if abs(delta) >= len(subset_ids) and len(set(ids)) == len(ids):
+            subset_ids, counter = _moveToTop(subset_ids, ids)
+        else:
+            counter = _moveUp(subset_ids, ids, abs(delta))
 
         if counter > 0:
             if delta > 0:
@@ -158,9 +150,12 @@ class OrderSupport(object):
             obj_dict = {}
             for obj in objects:
                 obj_dict[obj['id']] = obj
+            # Put the objects of the subset into the positions of the
+            # subset in their new order.
+            subset = set(subset_ids)
             pos = 0
             for i in range(len(objects)):
-                if objects[i]['id'] in subset_ids:
+                if objects[i]['id'] in subset:
                     try:
                         objects[i] = obj_dict[subset_ids[pos]]
                         pos += 1
@@ -197,12 +192,31 @@ class OrderSupport(object):
     security.declareProtected(manage_properties, 'orderObjects')
     def orderObjects(self, key, reverse=None):
         # Order sub-objects by key and direction.
-        ids = [id for id, obj in sort(
-            self.objectItems(), ((key, 'cmp', 'asc'), ))]
+        ids = self._getIdsOrderedBy(key)
         if reverse:
             ids.reverse()
         return self.moveObjectsByDelta(ids, -len(self._objects))
 
+    def _getIdsOrderedBy(self, key):
+        # Return the ids of the sub-objects ordered by key. Keys kept in
+        # the metadata of all sub-objects, like 'meta_type', are sorted
+        # without loading the sub-objects. Subclasses can override this
+        # to sort by an index of other attributes.
+        objects = self._objects
+        if all(key in obj for obj in objects):
+            # sorted is stable, like sort, so equal keys keep their order.
+            # _setObject stores None for objects without a meta_type, it
+            # is ordered first as by sort.
+            try:
+                return [obj['id'] for obj in sorted(
+                    objects, key=lambda obj: (obj[key] is not None,
+                                              obj[key]))]
+            except TypeError:
+                # Leave values which cannot be compared to sort.
+                pass
+        return [id for id, obj in sort(
+            self.objectItems(), ((key, 'cmp', 'asc'), ))]
+
     security.declareProtected(access_contents_information,
                               'getObjectPosition')
     def getObjectPosition(self, id):
@@ -240,6 +254,18 @@ class OrderSupport(object):
                                   suppress_events=True)
         return result
 
+    def manage_renameObjects(self, ids=[], new_ids=[], REQUEST=None):
+        """ Rename several sub-objects without changing their positions.
+        """
+        old_ids = [obj['id'] for obj in self._objects]
+        super(OrderSupport, self).manage_renameObjects(ids, new_ids)
+        renamed = dict(zip(ids, new_ids))
+        objects = dict((obj['id'], obj) for obj in self._objects)
+        self._objects = tuple([objects[renamed.get(id, id)]
+                               for id in old_ids])
+        if REQUEST is not None:
+            return self.manage_main(self, REQUEST)
+
     def tpValues(self):
         # Return a list of subobjects, used by tree tag.
         r = []
@@ -268,3 +294,51 @@ class OrderSupport(object):
 
 
 InitializeClass(OrderSupport)
+
+
+def _moveUp(subset_ids, ids, delta):
+    # Move each of ids up by delta in subset_ids, in place. An id does
+    # not pass the ids moved to the top before it. Return the number of
+    # ids moved.
+    positions = dict((id, i) for i, id in enumerate(subset_ids))
+    min_position = 0
+    counter = 0
+    for id in ids:
+        old_position = positions.get(id)
+        if old_position is None:
+            raise ValueError('The object with the id "%s" does not '
+                             'exist.' % id)
+        new_position = max(old_position - delta, min_position)
+        if new_position == min_position:
+            min_position += 1
+        if old_position != new_position:
+            del subset_ids[old_position]
+            subset_ids.insert(new_position, id)
+            # Only the positions between the old and the new one changed.
+            for i in range(min(old_position, new_position),
+                           max(old_position, new_position) + 1):
+                positions[subset_ids[i]] = i
+            counter += 1
+    return counter
+
+
+def _moveToTop(subset_ids, ids):
+    # Return subset_ids with the unique ids moved to the top in their
+    # order, and the number of ids moved like _moveUp would move them.
+    # When an id is moved, the ids moved before it are at the top and
+    # the others follow in their old order, so the id is already in
+    # place if it is the first of the others.
+    subset = set(subset_ids)
+    moved = set()
+    head = 0
+    counter = 0
+    for id in ids:
+        if id not in subset:
+            raise ValueError('The object with the id "%s" does not '
+                             'exist.' % id)
+        while subset_ids[head] in moved:
+            head += 1
+        if subset_ids[head] != id:
+            counter += 1
+        moved.add(id)
+    return list(ids) + [id for id in subset_ids if id not in moved], counter
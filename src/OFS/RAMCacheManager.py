@@ -0,0 +1,295 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""RAM cache manager.
+
+Keeps the data cached for the objects associated with it in memory,
+shared by all threads of the process. Once the total size of the
+entries exceeds a limit, the least recently used ones are evicted.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+import time
+import uuid
+
+from AccessControl.class_init import InitializeClass
+from AccessControl.Permissions import view_management_screens
+from AccessControl.SecurityInfo import ClassSecurityInfo
+from Acquisition import aq_base
+from Acquisition import aq_get
+from App.special_dtml import DTMLFile
+from six import binary_type
+from six import text_type
+from six.moves.cPickle import dumps
+from six.moves.cPickle import HIGHEST_PROTOCOL
+from zope.globalrequest import getRequest
+
+from OFS.Cache import Cache
+from OFS.Cache import CacheManager
+from OFS.Cache import ChangeCacheSettingsPermission
+from OFS.SimpleItem import SimpleItem
+
+# Maps the cache ids of the managers to their RAMCache.
+caches = {}
+caches_lock = Lock()
+
+
+def getDataSize(data):
+    '''
+    Returns the approximate size of data in bytes, or None if data
+    can't be pickled.
+    '''
+    if isinstance(data, (binary_type, text_type)):
+        return len(data)
+    try:
+        return len(dumps(data, HIGHEST_PROTOCOL))
+    except Exception:
+        return None
+
+
+class CacheEntry(object):
+
+    __slots__ = ('path', 'data', 'size', 'mtime', 'created')
+
+    def __init__(self, path, data, size, mtime):
+        self.path = path
+        self.data = data
+        self.size = size
+        self.mtime = mtime
+        self.created = time.time()
+
+
+class RAMCache(Cache):
+    '''
+    A cache of at most max_size bytes, evicting the least recently used
+    entries first. Entries expire after max_age seconds, unless max_age
+    is 0, or when the modification time of their object changes.
+    '''
+
+    def __init__(self, max_size=10 << 20, max_age=3600, request_vars=()):
+        self._lock = Lock()
+        # Least recently used entries come first.
+        self._entries = OrderedDict()
+        # Maps object paths to the keys of their entries.
+        self._paths = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(max_size, max_age, request_vars)
+
+    def configure(self, max_size, max_age, request_vars):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.request_vars = tuple(request_vars)
+        with self._lock:
+            self._evict()
+
+    def makeKey(self, ob, view_name, keywords):
+        path = ob.getPhysicalPath()
+        if keywords:
+            keywords = tuple(sorted(
+                (str(k), str(v)) for k, v in keywords.items()))
+        else:
+            keywords = ()
+        values = ()
+        if self.request_vars:
+            request = getRequest()
+            if request is None:
+                request = aq_get(ob, 'REQUEST', None)
+            if request is not None:
+                values = tuple(str(request.get(name, ''))
+                               for name in self.request_vars)
+        return path, (path, view_name, keywords, values)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+        keys = self._paths[entry.path]
+        keys.discard(key)
+        if not keys:
+            del self._paths[entry.path]
+
+    def _evict(self):
+        entries = self._entries
+        while self.size > self.max_size and entries:
+            self._remove(next(iter(entries)))
+            self.evictions += 1
+
+    def _isStale(self, ob, entry, mtime_func):
+        if self.max_age and time.time() - entry.created > self.max_age:
+            return True
+        return ob.ZCacheable_getModTime(mtime_func) > entry.mtime
+
+    def ZCache_get(self, ob, view_name, keywords, mtime_func, default):
+        path, key = self.makeKey(ob, view_name, keywords)
+        entry = self._entries.get(key)
+        if entry is not None and self._isStale(ob, entry, mtime_func):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._remove(key)
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            entries = self._entries
+            if entries.get(key) is entry:
+                # Mark the entry as the most recently used one.
+                entries[key] = entries.pop(key)
+        return entry.data
+
+    def ZCache_set(self, ob, data, view_name, keywords, mtime_func):
+        if data is None:
+            return
+        size = getDataSize(data)
+        if size is None or size > self.max_size:
+            return
+        path, key = self.makeKey(ob, view_name, keywords)
+        entry = CacheEntry(path, data, size,
+                           ob.ZCacheable_getModTime(mtime_func))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._paths.setdefault(path, set()).add(key)
+            self.size += size
+            self._evict()
+
+    def ZCache_invalidate(self, ob):
+        path = ob.getPhysicalPath()
+        with self._lock:
+            for key in list(self._paths.get(path, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._paths.clear()
+            self.size = 0
+
+    def getStatistics(self):
+        '''
+        Returns a mapping with the counters and the size of the cache.
+        '''
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size': self.size,
+                'max_size': self.max_size,
+            }
+
+
+manage_addRAMCacheManagerForm = DTMLFile('dtml/addRAMCacheManager',
+                                         globals())
+
+
+def manage_addRAMCacheManager(self, id, title='', REQUEST=None):
+    """Add a new RAM Cache Manager object with id *id*.
+    """
+    self._setObject(id, RAMCacheManager(id, title))
+    if REQUEST is not None:
+        return self.manage_main(self, REQUEST)
+
+
+class RAMCacheManager(CacheManager, SimpleItem):
+    '''
+    Manages a RAMCache shared by all threads of the process.
+    '''
+
+    meta_type = 'RAM Cache Manager'
+
+    security = ClassSecurityInfo()
+
+    title = ''
+    max_size = 10 << 20
+    max_age = 3600
+    request_vars = ('AUTHENTICATED_USER',)
+
+    manage_options = (
+        {'label': 'Properties', 'action': 'manage_main'},
+        {'label': 'Statistics', 'action': 'manage_stats'},
+    ) + CacheManager.manage_options + SimpleItem.manage_options
+
+    security.declareProtected(view_management_screens, 'manage_main')
+    manage_main = DTMLFile('dtml/ramCacheManagerProps', globals())
+
+    security.declareProtected(view_management_screens, 'manage_stats')
+    manage_stats = DTMLFile('dtml/ramCacheManagerStats', globals())
+
+    def __init__(self, id, title=''):
+        self.id = id
+        self.title = title
+        self._newCacheId()
+
+    def _newCacheId(self):
+        self._cache_id = uuid.uuid4().hex
+
+    security.declarePrivate('ZCacheManager_getCache')
+    def ZCacheManager_getCache(self):
+        cache = caches.get(self._cache_id)
+        if cache is None:
+            with caches_lock:
+                cache = caches.get(self._cache_id)
+                if cache is None:
+                    cache = caches[self._cache_id] = RAMCache(
+                        self.max_size, self.max_age, self.request_vars)
+        return cache
+
+    security.declareProtected(view_management_screens,
+                              'ZCacheManager_getStatistics')
+    def ZCacheManager_getStatistics(self):
+        '''Returns the hit, miss and eviction counters and the size of
+        the cache.'''
+        return self.ZCacheManager_getCache().getStatistics()
+
+    security.declareProtected(ChangeCacheSettingsPermission,
+                              'manage_editProps')
+    def manage_editProps(self, title, max_size, max_age, request_vars=(),
+                         REQUEST=None):
+        '''Changes the cache settings.'''
+        self.title = str(title)
+        self.max_size = int(max_size)
+        self.max_age = int(max_age)
+        self.request_vars = tuple(v.strip() for v in request_vars
+                                  if v.strip())
+        self.ZCacheManager_getCache().configure(
+            self.max_size, self.max_age, self.request_vars)
+        if REQUEST is not None:
+            return self.manage_main(
+                self, REQUEST, manage_tabs_message='Properties changed.')
+
+    security.declareProtected(ChangeCacheSettingsPermission,
+                              'manage_invalidateAll')
+    def manage_invalidateAll(self, REQUEST=None):
+        '''Removes all entries from the cache.'''
+        self.ZCacheManager_getCache().clear()
+        if REQUEST is not None:
+            return self.manage_stats(
+                self, REQUEST, manage_tabs_message='Cache cleared.')
+
+    def manage_afterClone(self, item):
+        # A copy must not share the cache of the original.
+        if aq_base(self) is aq_base(item):
+            self._newCacheId()
+
+    def manage_beforeDelete(self, item, container):
+        CacheManager.manage_beforeDelete(self, item, container)
+        with caches_lock:
+            caches.pop(self._cache_id, None)
+
+InitializeClass(RAMCacheManager)
@@ -21,6 +21,7 @@ from AccessControl.ZopeGuards import guarded_getattr
 from Acquisition import Acquired
 from Acquisition import aq_acquire
 from Acquisition import aq_base
+from Acquisition import aq_chain
 from Acquisition import aq_inner
 from Acquisition import aq_parent
 from Acquisition.interfaces import IAcquirer
@@ -33,13 +34,131 @@ from ZODB.POSException import ConflictError
 
 from zope.interface import implementer
 from zope.interface import Interface
+from zope.component import adapter
 from zope.component import queryMultiAdapter
+from zope.globalrequest import getRequest
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
 from zope.location.interfaces import LocationError
 from zope.traversing.namespace import namespaceLookup
 from zope.traversing.namespace import nsParse
 
 _marker = object()
 
+# If traversal_cache_enabled is set, unrestrictedTraverse and
+# restrictedTraverse remember their results during a request. The cache
+# is emptied when an object is added, moved or removed. Changes which
+# send no such event, like setting an attribute or changing roles, are
+# not noticed until the next request.
+traversal_cache_enabled = False
+
+# If physical_path_cache_enabled is set, getPhysicalPath remembers the
+# paths of containers during a request, so that the paths of their items
+# are computed without walking up to the root. The cache is emptied when
+# an object is added, moved or removed.
+physical_path_cache_enabled = False
+
+# The hits and misses of the traversal cache of all requests.
+traversal_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def getTraversalCacheStatistics():
+    """Return the hits, misses and hit rate of the traversal cache."""
+    hits = traversal_cache_stats['hits']
+    misses = traversal_cache_stats['misses']
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': float(hits) / lookups if lookups else 0.0,
+    }
+
+
+def resetTraversalCacheStatistics():
+    traversal_cache_stats['hits'] = 0
+    traversal_cache_stats['misses'] = 0
+
+
+def _traversalMemo(create=True):
+    # Return the traversal cache of the current request, if there is one.
+    request = getRequest()
+    if request is None:
+        return None
+    # Avoid request.__getattr__, it looks up form variables.
+    memo = request.__dict__.get('_Traversable_cache')
+    if memo is None and create:
+        memo = request.__dict__['_Traversable_cache'] = {}
+    return memo
+
+
+def _pathMemo():
+    # Return the physical path cache of the current request, if there
+    # is one.
+    request = getRequest()
+    if request is None:
+        return None
+    memo = request.__dict__.get('_Traversable_paths')
+    if memo is None:
+        memo = request.__dict__['_Traversable_paths'] = {}
+    return memo
+
+
+def _containerPath(container, memo):
+    # Items of the same container share the acquisition wrapper of the
+    # container. The wrapper is kept with its path, so that its id is not
+    # reused while the request lasts.
+    entry = memo.get(id(container))
+    if entry is None or entry[0] is not container:
+        entry = memo[id(container)] = (container,
+                                       container.getPhysicalPath())
+    return entry[1]
+
+
+def _traversalKey(ob, path, restricted):
+    # Return the key of a traversal and the objects the key refers to by
+    # id, which are kept with the cached result so that their ids are
+    # not reused while the request lasts.
+    refs = []
+    if path[:1] == ('', ):
+        # Absolute paths start at the physical root.
+        start = None
+    else:
+        # The result of a relative path may be acquired through the
+        # context of the object.
+        start = []
+        for o in aq_chain(ob):
+            base = aq_base(o)
+            oid = getattr(base, '_p_oid', None)
+            if oid is None:
+                oid = id(base)
+                refs.append(base)
+            start.append(oid)
+        start = tuple(start)
+    sm = getSecurityManager()
+    user = sm.getUser()
+    user = user.getId() if user is not None else None
+    if restricted:
+        # Security checks depend on the executables running, like
+        # scripts with proxy roles.
+        stack = sm._context.stack
+        refs.extend(stack)
+        executables = tuple(id(e) for e in stack)
+    else:
+        executables = ()
+    return (start, path, bool(restricted), user, executables), refs
+
+
+@adapter(IObjectMovedEvent)
+def invalidateTraversalCache(event):
+    """Empty the traversal and physical path caches of the current
+    request."""
+    request = getRequest()
+    if request is None:
+        return
+    for name in ('_Traversable_cache', '_Traversable_paths'):
+        memo = request.__dict__.get(name)
+        if memo:
+            memo.clear()
+
 
 @implementer(ITraversable)
 class Traversable(object):
@@ -127,6 +246,11 @@ class Traversable(object):
         if p is None:
             return path
 
+        if physical_path_cache_enabled:
+            memo = _pathMemo()
+            if memo is not None:
+                return _containerPath(p, memo) + path
+
         func = self.getPhysicalPath.__func__
         while p is not None:
             if func is p.getPhysicalPath.__func__:
@@ -175,6 +299,26 @@ class Traversable(object):
         else:
             path = list(path)
 
+        memo = cache_key = None
+        if traversal_cache_enabled:
+            memo = _traversalMemo()
+            if memo is not None:
+                try:
+                    cache_key, refs = _traversalKey(
+                        self, tuple(path), restricted)
+                    entry = memo.get(cache_key)
+                except TypeError:
+                    # Unhashable path elements.
+                    memo = None
+                else:
+                    if entry is not None:
+                        traversal_cache_stats['hits'] += 1
+                        return entry[0]
+                    traversal_cache_stats['misses'] += 1
+        # Views and namespace lookups create new objects, which must not
+        # be shared by several traversals.
+        cacheable = True
+
         REQUEST = {'TraversalRequestNameStack': path}
         path.reverse()
         path_pop = path.pop
@@ -225,6 +369,7 @@ class Traversable(object):
                             nsParse(name)[1]):
                         # Process URI segment parameters.
                         ns, nm = nsParse(name)
+                        cacheable = False
                         try:
                             next = namespaceLookup(
                                 ns, nm, obj, aq_acquire(self, 'REQUEST'))
@@ -315,6 +460,7 @@ class Traversable(object):
                         Interface, name)
 
                     if next is not None:
+                        cacheable = False
                         if IAcquirer.providedBy(next):
                             next = next.__of__(obj)
                         if restricted and not validate(obj, obj, name, next):
@@ -335,12 +481,15 @@ class Traversable(object):
                         if next is _marker:
                             # If we have a NullResource from earlier use it.
                             next = resource
+                            cacheable = False
                             if next is _marker:
                                 # Nothing found re-raise error
                                 raise e
 
                 obj = next
 
+            if memo is not None and cacheable:
+                memo[cache_key] = (obj, refs)
             return obj
 
         except ConflictError:
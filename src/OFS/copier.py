@@ -0,0 +1,185 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Copy persistent objects within their database.
+
+The records of all objects reachable from the copied object are read
+from the storage of its connection, their references are changed to new
+oids and they are stored under these oids in the savepoint storage of
+the connection. This makes the same copy as exporting the object to a
+file and importing the file again, without writing and reading the
+file and without unpickling the records into objects.
+
+Objects whose class sets `_copy_shared` to a true value are not copied,
+the copy refers to the original instead. This is meant for objects which
+are never changed once they are stored, like the records of the data of
+files.
+"""
+
+import logging
+import shutil
+
+from ZODB._compat import BytesIO
+from ZODB._compat import PersistentPickler
+from ZODB._compat import PersistentUnpickler
+from ZODB._compat import _protocol
+from ZODB.blob import Blob
+from ZODB.interfaces import IBlobStorage
+from ZODB.POSException import POSKeyError
+from ZODB.utils import mktemp
+
+logger = logging.getLogger('OFS.copier')
+
+
+class Reference(object):
+    """A persistent reference written to a copied record."""
+
+    __slots__ = ('reference', )
+
+    def __init__(self, reference):
+        self.reference = reference
+
+
+def _persistent_id(obj):
+    if isinstance(obj, Reference):
+        return obj.reference
+    return None
+
+
+class ObjectCopier(object):
+    """Copy the records reachable from an object to new oids.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        # Like importFile, join the transaction and add the records to
+        # the savepoint storage, so they are stored when the transaction
+        # is committed.
+        conn._register()
+        storage = conn._savepoint_storage
+        if storage is None:
+            conn.transaction_manager.savepoint(optimistic=True)
+            storage = conn._savepoint_storage
+        self._storage = storage
+        self._transaction = conn.transaction_manager.get()
+        self._blobs = IBlobStorage.providedBy(storage)
+        self._factory = conn._db.classFactory
+        # Maps the oids of the originals to the oids of their copies.
+        self._oids = {}
+        # Oids of records still to be copied.
+        self._pending = []
+        # Maps oids to whether their records are shared.
+        self._shared = {}
+        self.copied = 0
+        self.shared = 0
+
+    def copy(self, oid):
+        """Copy the object with the given oid, return the copy."""
+        new_oid = self._newOid(oid)
+        pending = self._pending
+        while pending:
+            self._copyRecord(pending.pop())
+        return self._conn.get(new_oid)
+
+    def _newOid(self, oid):
+        new_oid = self._oids.get(oid)
+        if new_oid is None:
+            new_oid = self._oids[oid] = self._storage.new_oid()
+            self._pending.append(oid)
+        return new_oid
+
+    def _findGlobal(self, module, name):
+        return self._factory(self._conn, module, name)
+
+    def _isShared(self, oid, klass=None):
+        shared = self._shared.get(oid)
+        if shared is None:
+            if klass is None:
+                try:
+                    p, serial = self._storage.load(oid)
+                except POSKeyError:
+                    # Like importFile, copy broken references.
+                    return False
+                klass = self._loadClass(p)
+            elif isinstance(klass, tuple):
+                klass = self._findGlobal(*klass)
+            shared = self._shared[oid] = bool(
+                getattr(klass, '_copy_shared', False))
+            if shared:
+                self.shared += 1
+        return shared
+
+    def _loadClass(self, p):
+        unpickler = PersistentUnpickler(self._findGlobal, None, BytesIO(p))
+        return self._getClass(unpickler.load())
+
+    def _getClass(self, klass):
+        # Return the class of a record from its class description.
+        if isinstance(klass, tuple):
+            klass = klass[0]
+            if isinstance(klass, tuple):
+                klass = self._findGlobal(*klass)
+        return klass
+
+    def _persistentLoad(self, reference):
+        if isinstance(reference, tuple):
+            oid, klass = reference
+            if not isinstance(oid, bytes):
+                # Python 3 unpickles oids of ASCII characters as str.
+                oid = oid.encode('ascii')
+            if self._isShared(oid, klass):
+                return Reference(reference)
+            return Reference((self._newOid(oid), klass))
+        if isinstance(reference, (bytes, str)):
+            oid = reference
+            if not isinstance(oid, bytes):
+                oid = oid.encode('ascii')
+            if self._isShared(oid):
+                return Reference(reference)
+            return Reference(self._newOid(oid))
+        # Weak and cross-database references keep referring to the
+        # originals, importFile does not support them at all.
+        return Reference(reference)
+
+    def _copyRecord(self, oid):
+        try:
+            p, serial = self._storage.load(oid)
+        except POSKeyError:
+            logger.debug('broken reference for oid %r', oid, exc_info=True)
+            return
+        unpickler = PersistentUnpickler(
+            self._findGlobal, self._persistentLoad, BytesIO(p))
+        f = BytesIO()
+        pickler = PersistentPickler(_persistent_id, f, _protocol)
+        klass = unpickler.load()
+        pickler.dump(klass)
+        pickler.dump(unpickler.load())
+        data = f.getvalue()
+        new_oid = self._oids[oid]
+        if self._blobs and issubclass(self._getClass(klass), Blob):
+            # storeBlob takes over the file, so store a copy of it.
+            blobfilename = mktemp(dir=self._storage.temporaryDirectory())
+            shutil.copyfile(self._storage.loadBlob(oid, serial),
+                            blobfilename)
+            self._storage.storeBlob(new_oid, None, data, blobfilename, '',
+                                    self._transaction)
+        else:
+            self._storage.store(new_oid, None, data, '', self._transaction)
+        self.copied += 1
+
+
+def copyObject(ob):
+    """Return a copy of the persistent object `ob`, which is stored in the
+    database of its connection. Changes of the objects to be copied must
+    have been saved to the connection, by a savepoint for instance.
+    """
+    return ObjectCopier(ob._p_jar).copy(ob._p_oid)
@@ -0,0 +1,303 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""An index of the objects below a container for the find of the ZMI.
+
+The index keeps the path, meta type and modification time of every
+object below the container it is added to with `addFindIndex`. The
+subscribers of this module keep it up to date when objects are added,
+moved, removed or modified, and ZopeFind answers searches by ids and
+meta types from it, without visiting the objects.
+
+The modification times are the times of the events. Changes of objects
+not announced by an IObjectModifiedEvent do not change them, so ZopeFind
+checks the modification times of the objects it finds instead.
+"""
+
+import time
+
+from Acquisition import aq_base
+from Acquisition import aq_inner
+from Acquisition import aq_parent
+from BTrees.Length import Length
+from BTrees.OOBTree import OOBTree
+from BTrees.OOBTree import OOTreeSet
+from BTrees.OOBTree import intersection
+from BTrees.OOBTree import union
+from DateTime.DateTime import DateTime
+from Persistence import Persistent
+from zope.component import adapter
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
+
+from OFS.FindSupport import mtime_match
+from OFS.interfaces import IItem
+
+_attr = '_find_index'
+
+
+class FindIndex(Persistent):
+    """Paths, meta types and modification times of objects.
+
+    The paths are tuples of ids relative to the container of the index.
+    """
+
+    def __init__(self):
+        # Maps paths to (meta_type, mtime) tuples.
+        self._paths = OOBTree()
+        # Map meta types and ids to the paths of their objects.
+        self._meta_types = OOBTree()
+        self._ids = OOBTree()
+        self._length = Length()
+
+    def __len__(self):
+        return self._length()
+
+    def _addPath(self, mapping, key, path):
+        paths = mapping.get(key)
+        if paths is None:
+            paths = mapping[key] = OOTreeSet()
+        paths.insert(path)
+
+    def _removePath(self, mapping, key, path):
+        paths = mapping.get(key)
+        if paths is not None:
+            paths.remove(path)
+            if not paths:
+                del mapping[key]
+
+    def indexObject(self, path, ob, mtime=None):
+        """Index the object `ob` at `path`."""
+        meta_type = getattr(aq_base(ob), 'meta_type', None) or ''
+        if mtime is None:
+            mtime = time.time()
+        old = self._paths.get(path)
+        if old is None:
+            self._length.change(1)
+            self._addPath(self._ids, path[-1], path)
+        elif old[0] != meta_type:
+            self._removePath(self._meta_types, old[0], path)
+        if old is None or old[0] != meta_type:
+            self._addPath(self._meta_types, meta_type, path)
+        self._paths[path] = (meta_type, mtime)
+
+    def indexTree(self, path, ob):
+        """Index the object `ob` at `path` and the objects below it.
+
+        The container of the index itself is not indexed, it is passed
+        with an empty path.
+        """
+        if path:
+            mtime = getattr(aq_base(ob), '_p_mtime', None)
+            self.indexObject(path, ob, mtime)
+        if not hasattr(aq_base(ob), 'objectItems'):
+            return
+        for id, sub in ob.objectItems():
+            ghost = getattr(aq_base(sub), '_p_changed', 0) is None
+            self.indexTree(path + (id, ), sub)
+            if ghost:
+                sub._p_deactivate()
+
+    def _subtree(self, path):
+        # Return the paths of the object at path and those below it.
+        if not path:
+            return list(self._paths.keys())
+        size = len(path)
+        result = []
+        for key in self._paths.keys(min=path):
+            if key[:size] != path:
+                break
+            result.append(key)
+        return result
+
+    def unindexObject(self, path):
+        """Remove the object at `path` and those below it."""
+        for key in self._subtree(path):
+            meta_type, mtime = self._paths[key]
+            self._removePath(self._meta_types, meta_type, key)
+            self._removePath(self._ids, key[-1], key)
+            del self._paths[key]
+            self._length.change(-1)
+
+    def moveObject(self, old, new):
+        """Move the object at `old` and those below it to `new`."""
+        size = len(old)
+        entries = [(key, self._paths[key]) for key in self._subtree(old)]
+        self.unindexObject(old)
+        for key, (meta_type, mtime) in entries:
+            path = new + key[size:]
+            self._paths[path] = (meta_type, mtime)
+            self._addPath(self._meta_types, meta_type, path)
+            self._addPath(self._ids, path[-1], path)
+        self._length.change(len(entries))
+
+    def getEntry(self, path, default=None):
+        """Return the (meta_type, mtime) tuple of the object at `path`."""
+        return self._paths.get(path, default)
+
+    def search(self, path=(), obj_ids=None, obj_metatypes=None,
+               obj_mtime=None, obj_mspec=None, search_sub=0, limit=None):
+        """Return the sorted paths of the objects matching the criteria.
+
+        Only objects below `path` are searched, and only the objects in
+        it unless `search_sub` is true.
+        """
+        candidates = None
+        for mapping, keys in ((self._ids, obj_ids),
+                              (self._meta_types, obj_metatypes)):
+            if not keys:
+                continue
+            paths = None
+            for key in keys:
+                paths = union(paths, mapping.get(key))
+            candidates = intersection(candidates, paths)
+            if not candidates:
+                return []
+        if candidates is None:
+            candidates = self._subtree(path)
+
+        size = len(path)
+        result = []
+        for key in candidates:
+            if len(key) <= size or key[:size] != path:
+                continue
+            if not search_sub and len(key) != size + 1:
+                continue
+            if obj_mtime:
+                mtime = self._paths[key][1]
+                if obj_mspec == '<':
+                    if not mtime < obj_mtime:
+                        continue
+                elif not mtime > obj_mtime:
+                    continue
+            result.append(key)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+
+def addFindIndex(container):
+    """Add a find index to the container and index the objects below it.
+    """
+    index = FindIndex()
+    index.indexTree((), container)
+    setattr(container, _attr, index)
+    return index
+
+
+def removeFindIndex(container):
+    """Remove the find index of the container."""
+    if hasattr(aq_base(container), _attr):
+        delattr(container, _attr)
+
+
+def getFindIndexes(ob):
+    """Return the (container, index) tuples of the find indexes of `ob`
+    and the containers above it, the nearest first."""
+    result = []
+    while ob is not None:
+        index = getattr(aq_base(ob), _attr, None)
+        if index is not None:
+            result.append((ob, index))
+        ob = aq_parent(aq_inner(ob))
+    return result
+
+
+def _relativePath(container, ob):
+    return ob.getPhysicalPath()[len(container.getPhysicalPath()):]
+
+
+def findWithIndex(obj, obj_ids=None, obj_metatypes=None, obj_mtime=None,
+                  obj_mspec=None, search_sub=0, pre='', limit=None):
+    """Find objects in `obj` like ZopeFind, with the nearest find index.
+
+    The index narrows the objects down by ids and meta types, the
+    modification times are checked on the objects found. Returns None if
+    there is no index, or if only modification times are searched for.
+    """
+    if obj_metatypes and 'all' in obj_metatypes:
+        obj_metatypes = None
+    if obj_mtime and not (obj_ids or obj_metatypes):
+        return None
+    indexes = getFindIndexes(obj)
+    if not indexes:
+        return None
+    container, index = indexes[0]
+
+    if obj_mtime and isinstance(obj_mtime, str):
+        obj_mtime = DateTime(obj_mtime).timeTime()
+
+    path = _relativePath(container, obj)
+    size = len(path)
+    result = []
+    for key in index.search(path, obj_ids, obj_metatypes,
+                            search_sub=search_sub,
+                            limit=None if obj_mtime else limit):
+        ob = obj
+        for id in key[size:]:
+            ob = ob._getOb(id, None)
+            if ob is None:
+                break
+        if ob is None:
+            continue
+        if obj_mtime and not mtime_match(ob, obj_mtime, obj_mspec):
+            continue
+        p = '/'.join(key[size:])
+        if pre:
+            p = '%s/%s' % (pre, p)
+        result.append((p, ob))
+        if limit is not None and len(result) >= limit:
+            break
+    return result
+
+
+@adapter(IItem, IObjectMovedEvent)
+def updateFindIndex(ob, event):
+    """Update the find indexes for an object added, moved or removed."""
+    if aq_base(ob) is not aq_base(event.object):
+        # The paths of sub-objects change with the object.
+        return
+    old = {}
+    if event.oldParent is not None:
+        for container, index in getFindIndexes(event.oldParent):
+            path = _relativePath(container, event.oldParent)
+            old[id(index)] = (index, path + (event.oldName, ))
+    new = {}
+    if event.newParent is not None:
+        for container, index in getFindIndexes(event.newParent):
+            path = _relativePath(container, event.newParent)
+            new[id(index)] = (index, path + (event.newName, ))
+    for key, (index, path) in old.items():
+        if key in new:
+            index.moveObject(path, new[key][1])
+            index.indexObject(new[key][1], ob)
+        else:
+            index.unindexObject(path)
+    for key, (index, path) in new.items():
+        if key not in old:
+            index.indexTree(path, ob)
+
+
+# The paths of sub-objects are updated with the moved object.
+updateFindIndex.__ignores_sublocation_moves__ = True
+
+
+@adapter(IItem, IObjectModifiedEvent)
+def reindexModified(ob, event):
+    """Update the modification time of an object in the find indexes."""
+    parent = aq_parent(aq_inner(ob))
+    if parent is None:
+        return
+    for container, index in getFindIndexes(parent):
+        path = _relativePath(container, ob)
+        if index.getEntry(path) is not None:
+            index.indexObject(path, ob)
@@ -692,6 +692,14 @@ class IObjectManager(IZopeObject, ICopyContainer, INavigation, IManageable,
         """
         """
 
+    def _setObjects(items, set_owner=1, suppress_events=False):
+        """Set the objects of the (id, object) pairs in items at once.
+        """
+
+    def _delObjects(ids, dp=1, suppress_events=False):
+        """Delete the objects with the given ids at once.
+        """
+
     def hasObject(id):
         """Indicate whether the folder has an item by ID.
         """
@@ -721,6 +729,47 @@ class IObjectManager(IZopeObject, ICopyContainer, INavigation, IManageable,
         """Return a tuple of mappings containing subobject meta-data.
         """
 
+    def iterObjectIds(spec=None):
+        """Iterate over the IDs of the subobjects without loading them.
+
+        If 'spec' is specified, yields only IDs of objects whose meta_types
+        match 'spec'. Yields the IDs listed by objectIds, a subclass which
+        overrides objectIds only gets its own listing.
+        """
+
+    def iterObjectMap():
+        """Iterate over mappings containing subobject meta-data without
+        loading the subobjects.
+
+        Yields the mappings of objectMap, a subclass which overrides
+        objectMap only gets its own listing.
+        """
+
+    def objectValuesSlice(start=0, size=None, spec=None):
+        """List at most 'size' subobjects starting at position 'start'.
+
+        Only the listed subobjects are loaded.
+        """
+
+    def objectItemsSlice(start=0, size=None, spec=None):
+        """List at most 'size' (ID, subobject) tuples starting at position
+        'start'.
+
+        Only the listed subobjects are loaded.
+        """
+
+    def lazyObjectItems(spec=None):
+        """Return a lazy sequence of (ID, subobject) tuples.
+
+        A subobject is loaded when its item is accessed.
+        """
+
+    def objectItemsBatch(start=0, size=None, spec=None):
+        """Return a ZTUtils Batch of (ID, subobject) tuples.
+
+        'size' defaults to 'manage_main_batch_size'.
+        """
+
     def superValues(t):
         """Return all of the objects of a given type located in this object
         and containing objects.
@@ -760,7 +809,8 @@ class IFindSupport(Interface):
                  obj_mtime=None, obj_mspec=None,
                  obj_permission=None, obj_roles=None,
                  search_sub=0,
-                 REQUEST=None, result=None, pre=''):
+                 REQUEST=None, result=None, pre='',
+                 limit=None, max_objects_visited=None, time_budget=None):
         """Zope Find interface"""
 
     def ZopeFindAndApply(obj, obj_ids=None, obj_metatypes=None,
@@ -769,9 +819,24 @@ class IFindSupport(Interface):
                          obj_permission=None, obj_roles=None,
                          search_sub=0,
                          REQUEST=None, result=None, pre='',
-                         apply_func=None, apply_path=''):
+                         apply_func=None, apply_path='',
+                         limit=None, max_objects_visited=None,
+                         time_budget=None):
         """Zope Find interface and apply"""
 
+    def ZopeFindIter(obj, obj_ids=None, obj_metatypes=None,
+                     obj_searchterm=None, obj_expr=None,
+                     obj_mtime=None, obj_mspec=None,
+                     obj_permission=None, obj_roles=None,
+                     search_sub=0, pre='',
+                     limit=None, max_objects_visited=None, time_budget=None):
+        """Iterate over the (path, object) tuples found.
+
+        The search stops after `limit` objects are found, after
+        `max_objects_visited` objects are visited or after `time_budget`
+        seconds.
+        """
+
 
 # XXX: might contain non-API methods and outdated comments;
 #      not synced with ZopeBook API Reference;
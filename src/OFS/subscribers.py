@@ -32,6 +32,10 @@ from zope.lifecycleevent.interfaces import IObjectCopiedEvent
 
 deprecatedManageAddDeleteClasses = []
 
+# Number of sub-objects of a container a move event is dispatched to
+# before the cache of the connection is reduced to its target size.
+sublocation_batch_size = 100
+
 LOG = getLogger('OFS.subscribers')
 
 
@@ -79,8 +83,105 @@ class ObjectManagerSublocations(object):
         self.container = container
 
     def sublocations(self):
-        for ob in self.container.objectValues():
-            yield ob
+        # Only the ids are listed in advance, the objects are streamed.
+        container = self.container
+        for id in container.objectIds():
+            ob = container._getOb(id, None)
+            if ob is not None:
+                yield ob
+
+
+def isMove(event):
+    """Check whether an object event is about an object which is moved
+    or renamed, not added or removed.
+    """
+    return event.oldParent is not None and event.newParent is not None
+
+
+def _hasSublocationMoveSubscribers(event):
+    # Check whether subscribers of the current site manager or its bases
+    # handle the move event for sub-objects, besides those marked with
+    # __ignores_sublocation_moves__.
+    provided = zope.interface.providedBy(event)
+    registries = [zope.component.getSiteManager()]
+    seen = set()
+    while registries:
+        registry = registries.pop()
+        if id(registry) in seen:
+            continue
+        seen.add(id(registry))
+        for registration in registry.registeredHandlers():
+            required = registration.required
+            if len(required) != 2:
+                # Handlers of the event alone only see the moved object.
+                continue
+            if getattr(registration.handler,
+                       '__ignores_sublocation_moves__', False):
+                continue
+            if provided.isOrExtends(required[1]):
+                return True
+        registries.extend(getattr(registry, '__bases__', ()))
+    return False
+
+
+def _hasHook(class_, method_name):
+    method = getattr(class_, method_name, None)
+    return (method is not None and
+            not getattr(method, '__five_method__', False))
+
+
+def dispatchMoveToSublocations(ob, event):
+    """Dispatch a move event to the sublocations of an object.
+
+    The sublocations are streamed, and after every batch of
+    `sublocation_batch_size` the cache of the connection is reduced to
+    its target size, turning the least recently used objects not changed
+    by the subscribers into ghosts again.
+
+    If no subscriber handles the event for sub-objects, besides those
+    marked with __ignores_sublocation_moves__, only the
+    manage_beforeDelete or manage_afterAdd methods of the sub-objects
+    are called, as dispatchObjectWillBeMovedEvent and
+    dispatchObjectMovedEvent would. Sub-objects are then only loaded if
+    their class has such a method or if they are containers, so moving a
+    large tree does not load all of it.
+    """
+    if _hasSublocationMoveSubscribers(event):
+        _dispatchMove(ob, event, zope.component.handle)
+    else:
+        _dispatchMove(ob, event, _callMoveHooks)
+
+
+def _dispatchMove(ob, event, handle):
+    subs = zope.location.interfaces.ISublocations(ob, None)
+    if subs is None:
+        return
+    jar = getattr(aq_base(ob), '_p_jar', None)
+    count = 0
+    for sub in subs.sublocations():
+        handle(sub, event)
+        count += 1
+        if jar is not None and count % sublocation_batch_size == 0:
+            jar.cacheGC()
+
+
+def _callMoveHooks(ob, event):
+    # Do what dispatchObjectWillBeMovedEvent and dispatchObjectMovedEvent
+    # do for a sub-object, looking at the class of ghosts only.
+    class_ = type(aq_base(ob))
+    if not OFS.interfaces.IItem.implementedBy(class_):
+        return
+    container = OFS.interfaces.IObjectManager.implementedBy(class_)
+    if OFS.interfaces.IObjectWillBeMovedEvent.providedBy(event):
+        if container:
+            _dispatchMove(ob, event, _callMoveHooks)
+        if _hasHook(class_, 'manage_beforeDelete'):
+            callManageBeforeDelete(ob, event.object, event.oldParent)
+    else:
+        if _hasHook(class_, 'manage_afterAdd'):
+            callManageAfterAdd(ob, event.object, event.newParent)
+        if container:
+            _dispatchMove(ob, event, _callMoveHooks)
 
 # The following subscribers should really be defined in ZCML
 # but we don't have enough control over subscriber ordering for
@@ -100,11 +201,19 @@ def dispatchObjectWillBeMovedEvent(ob, event):
     """
     # First, dispatch to sublocations
     if OFS.interfaces.IObjectManager.providedBy(ob):
-        dispatchToSublocations(ob, event)
+        if isMove(event):
+            dispatchMoveToSublocations(ob, event)
+        else:
+            dispatchToSublocations(ob, event)
     # Next, do the manage_beforeDelete dance
     callManageBeforeDelete(ob, event.object, event.oldParent)
 
 
+# For sub-objects this is done by _callMoveHooks when no other subscriber
+# needs their move events.
+dispatchObjectWillBeMovedEvent.__ignores_sublocation_moves__ = True
+
+
 @zope.component.adapter(OFS.interfaces.IItem, IObjectMovedEvent)
 def dispatchObjectMovedEvent(ob, event):
     """Multi-subscriber for IItem + IObjectMovedEvent.
@@ -113,7 +222,13 @@ def dispatchObjectMovedEvent(ob, event):
     callManageAfterAdd(ob, event.object, event.newParent)
     # Next, dispatch to sublocations
     if OFS.interfaces.IObjectManager.providedBy(ob):
-        dispatchToSublocations(ob, event)
+        if isMove(event):
+            dispatchMoveToSublocations(ob, event)
+        else:
+            dispatchToSublocations(ob, event)
+
+
+dispatchObjectMovedEvent.__ignores_sublocation_moves__ = True
 
 
 @zope.component.adapter(OFS.interfaces.IItem,
@@ -0,0 +1,136 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Measure finding objects in a large tree of folders.
+
+Usage: python -m OFS.tests.bench_find [size ...]
+
+The sizes default to 10000 and 50000 files, in folders of 100 files
+each. The folders are found by meta type, and one file by id, with all
+subfolders searched. Each search is made the way ZopeFind did it before,
+with ZopeFind itself, with ZopeFind limited to the first 10 objects
+found and with a find index. For each, the objects found, the objects
+loaded from the storage and the time are printed.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from Acquisition import aq_base
+import transaction
+from ZODB.DB import DB
+from ZODB.FileStorage import FileStorage
+
+from OFS.findindex import addFindIndex
+from OFS.findindex import removeFindIndex
+from OFS.Folder import Folder
+from OFS.Image import File
+
+
+def list_find(obj, obj_ids=None, obj_metatypes=None, pre=''):
+    # What ZopeFind did before for ids and meta types: visit all items,
+    # loading each to look at its id and meta type.
+    result = []
+    for id, ob in obj.objectItems():
+        p = '%s/%s' % (pre, id) if pre else id
+        bs = aq_base(ob)
+        if ((not obj_ids or bs.getId() in obj_ids) and
+                (not obj_metatypes or bs.meta_type in obj_metatypes)):
+            result.append((p, ob))
+        if hasattr(bs, 'objectItems'):
+            result.extend(list_find(ob, obj_ids, obj_metatypes, p))
+    return result
+
+
+def make_site(storage, size):
+    db = DB(storage)
+    conn = db.open()
+    root = conn.root()['site'] = Folder('site')
+    for i in range(size // 100):
+        folder = Folder('folder%04d' % i)
+        for j in range(100):
+            id = 'file%03d' % j
+            folder._setObject(id, File(id, '', b'data'), set_owner=False)
+        root._setObject(folder.getId(), folder, set_owner=False)
+        if i % 50 == 0:
+            transaction.savepoint(optimistic=True)
+    transaction.commit()
+    conn.close()
+    return db
+
+
+def search(db, name, func, **kw):
+    conn = db.open()
+    conn.cacheMinimize()
+    try:
+        site = conn.root()['site']
+        loads = conn._load_count
+        begin = time.time()
+        found = func(site, **kw)
+        elapsed = time.time() - begin
+        loaded = conn._load_count - loads
+    finally:
+        transaction.abort()
+        conn.close()
+    print('%-20s %6d found  %8d objects loaded  %8.1f ms' % (
+        name, len(found), loaded, elapsed * 1000))
+
+
+def run(size):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        db = make_site(FileStorage(os.path.join(tmpdir, 'Data.fs')), size)
+        print('%d files' % size)
+        queries = (
+            ('folders', dict(obj_metatypes=['Folder'])),
+            ('file id', dict(obj_ids=['file050'])),
+        )
+
+        def zope_find(site, **kw):
+            return site.ZopeFind(site, search_sub=1, **kw)
+
+        def zope_find_limited(site, **kw):
+            return site.ZopeFind(site, search_sub=1, limit=10, **kw)
+
+        for label, kw in queries:
+            search(db, label + ' before', list_find, **kw)
+            search(db, label + ' now', zope_find, **kw)
+            search(db, label + ' limit 10', zope_find_limited, **kw)
+
+        conn = db.open()
+        addFindIndex(conn.root()['site'])
+        transaction.commit()
+        conn.close()
+        for label, kw in queries:
+            search(db, label + ' index', zope_find, **kw)
+        conn = db.open()
+        removeFindIndex(conn.root()['site'])
+        transaction.commit()
+        conn.close()
+        db.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    sizes = [int(arg) for arg in args] or [10000, 50000]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
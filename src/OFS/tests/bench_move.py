@@ -0,0 +1,192 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Measure renaming a folder with many descendants.
+
+Usage: python -m OFS.tests.bench_move [size ...]
+
+The sizes default to 10000 and 50000 descendants, in sub-folders of 100
+items each, and one user folder. The subscribers are those of the
+configure.zcml of OFS, which also registers classes for the deprecated
+manage_afterAdd & co methods. The folder is renamed the way it was
+before, with all its descendants loaded for the events, without another
+subscriber for the move events of sub-objects, and with one. For each,
+the number of events the subscriber saw, the most objects loaded into
+the cache of the connection while it did, the objects loaded from the
+storage and the time are printed. The cache has the default target size
+of the ZODB, 400 objects, so with a subscriber the descendants are
+loaded twice, for the IObjectWillBeMovedEvent and the IObjectMovedEvent.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import transaction
+from ZODB.DB import DB
+from ZODB.FileStorage import FileStorage
+from zope.component import adapter
+from zope.component import getGlobalSiteManager
+from zope.component import provideAdapter
+from zope.component import provideHandler
+from zope.component.testing import setUp
+from zope.component.testing import tearDown
+from zope.container.contained import dispatchToSublocations
+from zope.interface import implementer
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
+from zope.location.interfaces import ISublocations
+
+from OFS.Folder import Folder
+from OFS.interfaces import IItem
+from OFS.interfaces import IObjectManager
+from OFS.interfaces import IObjectWillBeMovedEvent
+from OFS.SimpleItem import SimpleItem
+from OFS.userfolder import UserFolder
+from OFS import subscribers
+import OFS
+import Products.Five
+from Zope2.App import zcml
+
+
+class BenchFolder(Folder):
+
+    def _verifyObjectPaste(self, object, validate_src=1):
+        pass
+
+    def cb_isMoveable(self):
+        return True
+
+
+class Counter(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.peak = 0
+
+    def __call__(self, ob, event):
+        # A subscriber needing the move events of sub-objects.
+        self.calls += 1
+        self.peak = max(self.peak, ob._p_jar._cache.cache_non_ghost_count)
+
+
+@implementer(ISublocations)
+@adapter(IObjectManager)
+class ListSublocations(object):
+    # What ObjectManagerSublocations did before.
+
+    def __init__(self, container):
+        self.container = container
+
+    def sublocations(self):
+        for ob in self.container.objectValues():
+            yield ob
+
+
+@adapter(IItem, IObjectWillBeMovedEvent)
+def listWillBeMoved(ob, event):
+    # What dispatchObjectWillBeMovedEvent did before.
+    if IObjectManager.providedBy(ob):
+        dispatchToSublocations(ob, event)
+    subscribers.callManageBeforeDelete(ob, event.object, event.oldParent)
+
+
+@adapter(IItem, IObjectMovedEvent)
+def listMoved(ob, event):
+    # What dispatchObjectMovedEvent did before.
+    subscribers.callManageAfterAdd(ob, event.object, event.newParent)
+    if IObjectManager.providedBy(ob):
+        dispatchToSublocations(ob, event)
+
+
+def make_site(storage, size):
+    from OFS.Application import Application
+
+    db = DB(storage)
+    conn = db.open()
+    app = Application()
+    conn.root()['Application'] = app
+    app = conn.root()['Application']
+    app._setObject('top', BenchFolder('top'))
+    app.top._setObject('tree', BenchFolder('tree'))
+    tree = app.top.tree
+    tree._setObject('acl_users', UserFolder(), set_owner=False)
+    for i in range(size // 100):
+        sub = BenchFolder('sub%04d' % i)
+        for j in range(100):
+            item = SimpleItem()
+            item.id = 'item%03d' % j
+            sub._setObject(item.id, item, set_owner=False)
+        tree._setObject(sub.getId(), sub, set_owner=False)
+        if i % 50 == 0:
+            transaction.savepoint(optimistic=True)
+    transaction.commit()
+    conn.close()
+    return db
+
+
+def rename(db, name, new_id, before=False, subscriber=False):
+    setUp()
+    zcml.load_config('meta.zcml', Products.Five)
+    zcml.load_config('configure.zcml', OFS)
+    counter = Counter()
+    if before:
+        gsm = getGlobalSiteManager()
+        gsm.unregisterHandler(subscribers.dispatchObjectWillBeMovedEvent)
+        gsm.unregisterHandler(subscribers.dispatchObjectMovedEvent)
+        provideAdapter(ListSublocations)
+        provideHandler(listWillBeMoved)
+        provideHandler(listMoved)
+    if before or subscriber:
+        provideHandler(counter, (IItem, IObjectMovedEvent))
+    conn = db.open()
+    conn.cacheMinimize()
+    try:
+        top = conn.root()['Application'].top
+        loads = conn._load_count
+        begin = time.time()
+        top.manage_renameObject(top.objectIds()[0], new_id)
+        elapsed = time.time() - begin
+        loaded = conn._load_count - loads
+        transaction.commit()
+    finally:
+        conn.close()
+        tearDown()
+    print('%-14s %8d events  %8d objects in cache at most  '
+          '%8d loaded  %8.1f ms' % (
+              name, counter.calls, counter.peak, loaded, elapsed * 1000))
+
+
+def run(size):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        db = make_site(FileStorage(os.path.join(tmpdir, 'Data.fs')), size)
+        print('%d descendants' % size)
+        rename(db, 'before', 'tree1', before=True)
+        rename(db, 'no subscriber', 'tree2')
+        rename(db, 'subscriber', 'tree3', subscriber=True)
+        db.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    sizes = [int(arg) for arg in args] or [10000, 50000]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
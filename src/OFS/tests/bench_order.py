@@ -0,0 +1,106 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Time reordering large OrderedFolders.
+
+Usage: python -m OFS.tests.bench_order [size ...]
+
+The sizes default to 2000 and 20000 items. Every 20th item of the folder
+is moved down by 5 and to the top, and the folder is ordered by meta
+type. For comparison, the moves are also done the way moveObjectsByDelta
+did them before.
+"""
+
+import sys
+import time
+
+from OFS.OrderedFolder import OrderedFolder
+from OFS.SimpleItem import SimpleItem
+
+
+def make_folder(size):
+    folder = OrderedFolder('folder')
+    objects = []
+    for i in range(size):
+        id = 'item%06d' % i
+        item = SimpleItem()
+        item.id = id
+        item.meta_type = 'Type %d' % (i % 7)
+        setattr(folder, id, item)
+        objects.append({'id': id, 'meta_type': item.meta_type})
+    folder._objects = tuple(objects)
+    return folder
+
+
+def list_moveObjectsByDelta(folder, ids, delta):
+    # What moveObjectsByDelta did before: look up and move each id in a
+    # list, and look up each object of the folder in the list.
+    objects = list(folder._objects)
+    subset_ids = [obj['id'] for obj in objects]
+    min_position = 0
+    if delta > 0:
+        ids = list(ids)
+        ids.reverse()
+        subset_ids.reverse()
+    for id in ids:
+        old_position = subset_ids.index(id)
+        new_position = max(old_position - abs(delta), min_position)
+        if new_position == min_position:
+            min_position += 1
+        if not old_position == new_position:
+            subset_ids.remove(id)
+            subset_ids.insert(new_position, id)
+    if delta > 0:
+        subset_ids.reverse()
+    obj_dict = dict((obj['id'], obj) for obj in objects)
+    pos = 0
+    for i in range(len(objects)):
+        if objects[i]['id'] in subset_ids:
+            objects[i] = obj_dict[subset_ids[pos]]
+            pos += 1
+    folder._objects = tuple(objects)
+
+
+def timed(func, *args):
+    begin = time.time()
+    func(*args)
+    return (time.time() - begin) * 1000
+
+
+def run(size):
+    ids = ['item%06d' % i for i in range(0, size, 20)]
+    cases = (
+        ('down by 5', ids, 5),
+        ('to top', ids, -size),
+    )
+    for name, moved, delta in cases:
+        before = timed(list_moveObjectsByDelta, make_folder(size),
+                       moved, delta)
+        folder = make_folder(size)
+        after = timed(folder.moveObjectsByDelta, moved, delta, None, True)
+        print('%8d items  %-10s before %10.1f ms  now %8.1f ms' % (
+            size, name, before, after))
+    folder = make_folder(size)
+    print('%8d items  %-10s %28.1f ms' % (
+        size, 'order', timed(folder.orderObjects, 'meta_type')))
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    sizes = [int(arg) for arg in args] or [2000, 20000]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
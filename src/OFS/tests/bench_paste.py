@@ -0,0 +1,201 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Measure pasting and deleting many objects in a FileStorage.
+
+Usage: python -m OFS.tests.bench_paste [size ...]
+
+The sizes default to 100 and 250 items, about as many as fit into the
+clipboard cookie. The items of a folder are copied into an empty folder,
+the copies are deleted again, and the items are moved to another folder,
+each in its own transaction. This is done one object at a time, the way
+manage_pasteObjects and manage_delObjects did it before (without
+checking permissions), and with the methods themselves. For each, the
+bytes written to the savepoint storage of the connection, the bytes
+committed to the FileStorage, the number of IContainerModifiedEvents and
+the time are printed.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import noSecurityManager
+from AccessControl.users import system
+from Acquisition import aq_base
+from Acquisition import aq_inner
+from Acquisition import aq_parent
+import transaction
+from ZODB.DB import DB
+from ZODB.FileStorage import FileStorage
+from zope.container.contained import notifyContainerModified
+from zope.container.interfaces import IContainerModifiedEvent
+import zope.event
+from zope.event import notify
+from zope.lifecycleevent import ObjectCopiedEvent
+from zope.lifecycleevent import ObjectMovedEvent
+
+from OFS.event import ObjectClonedEvent
+from OFS.event import ObjectWillBeMovedEvent
+from OFS.Folder import Folder
+from OFS.subscribers import compatibilityCall
+
+
+class BenchFolder(Folder):
+
+    def _verifyObjectPaste(self, object, validate_src=1):
+        pass
+
+
+def itemwise_copy(container, obs):
+    # What manage_pasteObjects did before: copy and add one object at a
+    # time, so each copy saves the container changed by the one before.
+    for ob in obs:
+        id = container._get_id(ob.getId())
+        orig_ob = ob
+        ob = ob._getCopy(container)
+        ob._setId(id)
+        notify(ObjectCopiedEvent(ob, orig_ob))
+        container._setObject(id, ob)
+        ob = container._getOb(id)
+        ob.wl_clearLocks()
+        ob._postCopy(container, op=0)
+        compatibilityCall('manage_afterClone', ob, ob)
+        notify(ObjectClonedEvent(ob))
+
+
+def itemwise_delete(container, ids):
+    # What manage_delObjects did before.
+    for id in ids:
+        container._delObject(id)
+
+
+def itemwise_move(container, obs):
+    # What manage_pasteObjects did before for cut objects.
+    for ob in obs:
+        orig_container = aq_parent(aq_inner(ob))
+        id = ob.getId()
+        notify(ObjectWillBeMovedEvent(ob, orig_container, id, container, id))
+        ob.manage_changeOwnershipType(explicit=1)
+        orig_container._delObject(id, suppress_events=True)
+        ob = aq_base(ob)
+        ob._setId(id)
+        container._setObject(id, ob, set_owner=0, suppress_events=True)
+        ob = container._getOb(id)
+        notify(ObjectMovedEvent(ob, orig_container, id, container, id))
+        notifyContainerModified(orig_container)
+        notifyContainerModified(container)
+        ob._postCopy(container, op=1)
+        ob.manage_changeOwnershipType(explicit=0)
+
+
+class Measure(object):
+
+    def __init__(self, storage, conn):
+        self.storage = storage
+        self.conn = conn
+        self.modified = 0
+
+    def __call__(self, event):
+        if IContainerModifiedEvent.providedBy(event):
+            self.modified += 1
+
+    def run(self, func, *args):
+        self.modified = 0
+        size = self.storage.getSize()
+        zope.event.subscribers.append(self)
+        begin = time.time()
+        try:
+            func(*args)
+            tmp = self.conn._savepoint_storage
+            saved = tmp.position if tmp is not None else 0
+            transaction.commit()
+        finally:
+            zope.event.subscribers.remove(self)
+        elapsed = time.time() - begin
+        return saved, self.storage.getSize() - size, self.modified, elapsed
+
+
+def make_site(storage, size):
+    from OFS.Application import Application
+    from OFS.Image import File
+
+    db = DB(storage)
+    conn = db.open()
+    app = Application()
+    conn.root()['Application'] = app
+    app = conn.root()['Application']
+    for name in ('source', 'before', 'now'):
+        app._setObject(name, BenchFolder(name))
+    source = app.source
+    for i in range(size):
+        id = 'f%04d' % i
+        source._setObject(id, File(id, '', b'data %d' % i, 'text/plain'))
+    transaction.commit()
+    return db, conn, app
+
+
+def report(size, name, before, now):
+    print('%6d items  %-6s savepoint %10d -> %8d bytes  '
+          'committed %9d -> %9d bytes  events %5d -> %d  '
+          'time %8.1f -> %7.1f ms' % (
+              size, name, before[0], now[0], before[1], now[1],
+              before[2], now[2], before[3] * 1000, now[3] * 1000))
+
+
+def run(size):
+    tmpdir = tempfile.mkdtemp()
+    storage = FileStorage(os.path.join(tmpdir, 'Data.fs'))
+    db, conn, app = make_site(storage, size)
+    newSecurityManager(None, system)
+    try:
+        measure = Measure(storage, conn)
+        source = app.source
+        ids = source.objectIds()
+
+        before = measure.run(itemwise_copy, app.before, source.objectValues())
+        cp = source.manage_copyObjects(ids)
+        now = measure.run(app.now.manage_pasteObjects, cp)
+        report(size, 'copy', before, now)
+
+        before = measure.run(itemwise_delete, app.before, ids)
+        now = measure.run(app.now.manage_delObjects, ids)
+        report(size, 'delete', before, now)
+
+        half = ids[:size // 2]
+        rest = ids[size // 2:]
+        before = measure.run(itemwise_move, app.before,
+                             [source._getOb(id) for id in half])
+        cp = source.manage_cutObjects(rest)
+        now = measure.run(app.now.manage_pasteObjects, cp)
+        report(size // 2, 'move', before, now)
+    finally:
+        noSecurityManager()
+        transaction.abort()
+        conn.close()
+        db.close()
+        shutil.rmtree(tmpdir)
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    sizes = [int(arg) for arg in args] or [100, 250]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import unittest
+
+from Acquisition import aq_base
+from zope.interface import implementer
+
+from OFS.BTreeFolder import BTreeObjectManager
+from OFS.interfaces import IItem
+from OFS.SimpleItem import SimpleItem
+from OFS.tests import testObjectManager
+
+
+@implementer(IItem)
+class BTreeObjectManagerWithIItem(BTreeObjectManager):
+    """The event subscribers work on IItem."""
+
+
+class BTreeObjectManagerTests(testObjectManager.ObjectManagerTests):
+    # Run the ObjectManager tests against the BTree variant.
+
+    def _getTargetClass(self):
+        return BTreeObjectManagerWithIItem
+
+    def _makeItem(self, id, meta_type):
+        item = SimpleItem()
+        item.id = id
+        item.meta_type = meta_type
+        return item
+
+    def test_interfaces(self):
+        from OFS.interfaces import IFolder
+        from OFS.interfaces import IObjectManager
+        from OFS.BTreeFolder import BTreeFolder
+        from zope.interface.verify import verifyClass
+
+        verifyClass(IObjectManager, BTreeObjectManager)
+        verifyClass(IFolder, BTreeFolder)
+
+    def test_items_not_stored_as_attributes(self):
+        om = self._makeOne()
+        om._setObject('a', SimpleItem('a'))
+        self.assertFalse('a' in aq_base(om).__dict__)
+        self.assertEqual(om._objects, ())
+        self.assertTrue(aq_base(om.a) is aq_base(om._tree['a']))
+        self.assertTrue(aq_base(om.unrestrictedTraverse('a')) is
+                        aq_base(om._tree['a']))
+
+    def test_listings_by_meta_type(self):
+        om = self._makeOne()
+        om._setObject('c', self._makeItem('c', 'Foo'))
+        om._setObject('a', self._makeItem('a', 'Bar'))
+        om._setObject('b', self._makeItem('b', 'Foo'))
+        self.assertEqual(om.objectIds(), ['a', 'b', 'c'])
+        self.assertEqual(om.objectIds('Foo'), ['b', 'c'])
+        self.assertEqual(om.objectIds(['Foo', 'Bar']), ['a', 'b', 'c'])
+        self.assertEqual(om.objectIds('Baz'), [])
+        self.assertEqual(
+            [ob.getId() for ob in om.objectValues('Bar')], ['a'])
+        self.assertEqual(om.objectMap(), (
+            {'id': 'a', 'meta_type': 'Bar'},
+            {'id': 'b', 'meta_type': 'Foo'},
+            {'id': 'c', 'meta_type': 'Foo'}))
+
+        om._delObject('b')
+        om._delObject('c')
+        self.assertEqual(om.objectIds('Foo'), [])
+        self.assertEqual(list(om._mt_index.keys()), ['Bar'])
+
+    def test_count(self):
+        om = self._makeOne()
+        for id in ('a', 'b', 'c'):
+            om._setObject(id, SimpleItem(id))
+        self.assertEqual(len(om), 3)
+        self.assertEqual(om.objectCount(), 3)
+        om._setOb('a', SimpleItem('a'))
+        self.assertEqual(len(om), 3)
+        om._delObject('b')
+        self.assertEqual(len(om), 2)
+
+    def test_superValues(self):
+        om = self._makeOne()
+        sub = self._getTargetClass()()
+        om._setObject('sub', sub, set_owner=False)
+        sub = om.sub
+        om._setObject('a', self._makeItem('a', 'Foo'))
+        sub._setObject('b', self._makeItem('b', 'Foo'))
+        self.assertEqual(
+            [ob.getId() for ob in sub.superValues('Foo')], ['b', 'a'])
+
+
+class MigrateFolderTests(unittest.TestCase):
+
+    def setUp(self):
+        import transaction
+        from ZODB.DB import DB
+        from ZODB.DemoStorage import DemoStorage
+        from OFS.Application import Application
+        self.db = DB(DemoStorage())
+        self.connection = self.db.open()
+        root = self.connection.root()
+        root['Application'] = self.app = Application()
+        transaction.commit()
+
+    def tearDown(self):
+        import transaction
+        transaction.abort()
+        self.connection.close()
+        self.db.close()
+
+    def test_migrate(self):
+        import transaction
+        from OFS.BTreeFolder import BTreeFolder
+        from OFS.BTreeFolder import migrateFolder
+        from OFS.Folder import Folder
+        app = self.app
+        app._setObject('folder', Folder('folder'))
+        folder = app.folder
+        folder.title = 'Title'
+        folder._setObject('b', SimpleItem('b'))
+        folder._setObject('a', Folder('a'))
+        transaction.commit()
+        oid = folder._p_oid
+
+        migrateFolder(folder)
+        transaction.commit()
+
+        connection = self.db.open()
+        try:
+            app = connection.root()['Application']
+            folder = app.folder
+            self.assertEqual(folder.__class__, BTreeFolder)
+            self.assertEqual(folder._p_oid, oid)
+            self.assertEqual(folder.title, 'Title')
+            self.assertEqual(folder.objectIds(), ['a', 'b'])
+            self.assertEqual(folder.objectIds('Folder'), ['a'])
+            self.assertEqual(len(folder), 2)
+            self.assertFalse('a' in folder.__dict__)
+            self.assertEqual(folder.a.getPhysicalPath(), ('', 'folder', 'a'))
+        finally:
+            transaction.abort()
+            connection.close()
+
+    def test_migrate_other_class(self):
+        from OFS.BTreeFolder import migrateFolder
+        from OFS.OrderedFolder import OrderedFolder
+        self.assertRaises(TypeError, migrateFolder, OrderedFolder('o'))
@@ -1,14 +1,29 @@
 import unittest
 
+from zope.component.testing import PlacelessSetup
+
+from OFS.Cache import Cache
 from OFS.Cache import CacheManager
 from OFS.Folder import Folder
 from OFS.SimpleItem import SimpleItem
 from OFS.metaconfigure import setDeprecatedManageAddDelete
 
 
+class DummyCache(Cache):
+
+    def ZCache_invalidate(self, ob):
+        pass
+
+
 class DummyCacheManager(CacheManager, SimpleItem):
     def __init__(self, id, *args, **kw):
         self.id = id
+        self.cache = DummyCache()
+        self.lookups = 0
+
+    def ZCacheManager_getCache(self):
+        self.lookups += 1
+        return self.cache
 setDeprecatedManageAddDelete(DummyCacheManager)
 
 
@@ -32,3 +47,73 @@ class CacheTests(unittest.TestCase):
 
         # The parent_cache should still trigger managersExist
         self.assertTrue(managersExist(root.child.child_content))
+
+
+class DummyRequest(object):
+    pass
+
+
+class CacheLookupTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        from OFS.DTMLMethod import DTMLMethod
+        from Zope2.App import zcml
+        import OFS
+        import Zope2.App
+        super(CacheLookupTests, self).setUp()
+        zcml.load_config('meta.zcml', Zope2.App)
+        zcml.load_config('configure.zcml', OFS)
+        self.root = root = Folder('root')
+        root._setObject('cache', DummyCacheManager('cache'))
+        root._setObject('child', Folder('child'))
+        for id in ('a', 'b'):
+            root.child._setObject(id, DTMLMethod(id))
+            root.child[id].ZCacheable_setManagerId('cache')
+            root.child[id]._v_ZCacheable_cache = None
+        root.cache.lookups = 0
+
+    def tearDown(self):
+        from zope.globalrequest import clearRequest
+        clearRequest()
+        super(CacheLookupTests, self).tearDown()
+
+    def test_getCache(self):
+        child = self.root.child
+        self.assertTrue(child.a.ZCacheable_getCache() is self.root.cache.cache)
+        self.assertTrue(child.a.ZCacheable_getCache() is self.root.cache.cache)
+        self.assertEqual(self.root.cache.lookups, 1)
+
+    def test_other_manager_keeps_lookup(self):
+        child = self.root.child
+        child.a.ZCacheable_getCache()
+        child._setObject('other', DummyCacheManager('other'))
+        child.a.ZCacheable_getCache()
+        self.assertEqual(self.root.cache.lookups, 1)
+
+    def test_same_manager_id_invalidates_lookup(self):
+        child = self.root.child
+        child.a.ZCacheable_getCache()
+        child._setObject('cache', DummyCacheManager('cache'))
+        self.assertTrue(child.a.ZCacheable_getCache() is child.cache.cache)
+        child.manage_delObjects(['cache'])
+        self.assertTrue(child.a.ZCacheable_getCache() is self.root.cache.cache)
+
+    def test_request_memo(self):
+        from zope.globalrequest import setRequest
+        setRequest(DummyRequest())
+        child = self.root.child
+        self.assertTrue(child.a.ZCacheable_getCache() is self.root.cache.cache)
+        self.assertTrue(child.b.ZCacheable_getCache() is self.root.cache.cache)
+        self.assertEqual(self.root.cache.lookups, 1)
+
+    def test_request_memo_other_container(self):
+        from zope.globalrequest import setRequest
+        from OFS.DTMLMethod import DTMLMethod
+        setRequest(DummyRequest())
+        self.root._setObject('c', DTMLMethod('c'))
+        self.root.c.ZCacheable_setManagerId('cache')
+        self.root.cache.lookups = 0
+        self.root.c._v_ZCacheable_cache = None
+        self.root.child.a.ZCacheable_getCache()
+        self.root.c.ZCacheable_getCache()
+        self.assertEqual(self.root.cache.lookups, 2)
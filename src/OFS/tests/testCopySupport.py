@@ -277,6 +277,112 @@ class TestCopySupport(CopySupportTestBase):
             {'id': 'file2', 'new_id': 'copy_of_file2'},
         ])
 
+    def testPasteSameObjectTwice(self):
+        cookie = self.folder1.manage_copyObjects(ids=('file', 'file'))
+        result = self.folder1.manage_pasteObjects(cookie)
+        self.assertEqual(self.folder1.objectIds(),
+                         ['file', 'copy_of_file', 'copy2_of_file'])
+        self.assertEqual(result, [
+            {'id': 'file', 'new_id': 'copy_of_file'},
+            {'id': 'file', 'new_id': 'copy2_of_file'},
+        ])
+
+    def testCutPasteMulti(self):
+        manage_addFile(self.folder1, 'file1',
+                       file=b'', content_type='text/plain')
+        manage_addFile(self.folder2, 'file1',
+                       file=b'', content_type='text/plain')
+        transaction.savepoint(optimistic=True)
+        cookie = self.folder1.manage_cutObjects(ids=('file', 'file1'))
+        result = self.folder2.manage_pasteObjects(cookie)
+        self.assertEqual(self.folder1.objectIds(), [])
+        self.assertEqual(self.folder2.objectIds(),
+                         ['file1', 'file', 'copy_of_file1'])
+        self.assertEqual(result, [
+            {'id': 'file', 'new_id': 'file'},
+            {'id': 'file1', 'new_id': 'copy_of_file1'},
+        ])
+        self.assertEqual(self.folder2.copy_of_file1.getId(), 'copy_of_file1')
+
+    def testRenameMulti(self):
+        manage_addFile(self.folder1, 'file1',
+                       file=b'', content_type='text/plain')
+        transaction.savepoint(optimistic=True)
+        self.folder1.manage_renameObjects(['file', 'file1'],
+                                          ['file1', 'file2'])
+        self.assertEqual(self.folder1.objectIds(), ['file1', 'file2'])
+        self.assertEqual(self.folder1.file1.getId(), 'file1')
+        self.assertEqual(self.folder1.file2.getId(), 'file2')
+
+    def testRenameMultiSameNewId(self):
+        from OFS.CopySupport import CopyError
+        manage_addFile(self.folder1, 'file1',
+                       file=b'', content_type='text/plain')
+        self.assertRaises(CopyError, self.folder1.manage_renameObjects,
+                          ['file', 'file1'], ['file2', 'file2'])
+        self.assertEqual(self.folder1.objectIds(), ['file', 'file1'])
+
+    def testDeleteMulti(self):
+        from zExceptions import BadRequest
+        manage_addFile(self.folder1, 'file1',
+                       file=b'', content_type='text/plain')
+        manage_addFile(self.folder1, 'file2',
+                       file=b'', content_type='text/plain')
+        self.assertRaises(BadRequest, self.folder1.manage_delObjects,
+                          ['file', 'nonesuch'])
+        self.assertRaises(BadRequest, self.folder1.manage_delObjects,
+                          ['file', 'file'])
+        self.assertEqual(self.folder1.objectIds(), ['file', 'file1', 'file2'])
+        self.folder1.manage_delObjects(['file2', 'file'])
+        self.assertEqual(self.folder1.objectIds(), ['file1'])
+        self.assertFalse(hasattr(aq_base(self.folder1), 'file'))
+
+    def testCopyWithoutExport(self):
+        connection = self.folder1._p_jar
+
+        def exportFile(oid, f=None):
+            self.fail('copied by exporting')
+
+        connection.exportFile = exportFile
+        self.folder2.all_meta_types = FILE_META_TYPES + ({
+            'name': 'Folder',
+            'action': 'manage_addFolder',
+            'permission': 'Add Folders',
+        }, )
+        try:
+            manage_addFolder(self.folder1, 'sub')
+            manage_addFile(self.folder1.sub, 'inner',
+                           file=b'data', content_type='text/plain')
+            cookie = self.folder1.manage_copyObjects(ids=('sub',))
+            self.folder2.manage_pasteObjects(cookie)
+        finally:
+            del connection.exportFile
+        copy = self.folder2.sub
+        original = self.folder1.sub
+        self.assertIsNot(aq_base(copy), aq_base(original))
+        self.assertIsNot(aq_base(copy.inner), aq_base(original.inner))
+        self.assertEqual(bytes(copy.inner.data), b'data')
+        copy.inner.update_data(b'changed')
+        self.assertEqual(bytes(original.inner.data), b'data')
+        transaction.commit()
+        self.assertNotEqual(copy._p_oid, original._p_oid)
+        self.assertNotEqual(copy.inner._p_oid, original.inner._p_oid)
+
+    def testCopySharesFileData(self):
+        data = b'x' * (1 << 18)
+        manage_addFile(self.folder1, 'big', file=data,
+                       content_type='application/octet-stream')
+        transaction.commit()
+        cookie = self.folder1.manage_copyObjects(ids=('big',))
+        self.folder2.manage_pasteObjects(cookie)
+        transaction.commit()
+        copy = self.folder2.big
+        original = self.folder1.big
+        self.assertNotEqual(copy._p_oid, original._p_oid)
+        self.assertEqual(copy.data._p_oid, original.data._p_oid)
+        self.assertEqual(bytes(copy.data), data)
+        self.assertTrue(copy._get_pdata_index(copy.data) is not None)
+
 
 class _SensitiveSecurityPolicy(object):
 
@@ -160,6 +160,73 @@ class TestCopySupport(EventTest):
         )
 
 
+class TestCopySupportBatch(EventTest):
+    '''Tests the events of operations on several objects'''
+
+    def setUp(self):
+        EventTest.setUp(self)
+        self.app._setObject('folder', TestFolder('folder'))
+        self.folder = getattr(self.app, 'folder')
+        self.folder._setObject('subfolder', TestFolder('subfolder'))
+        self.subfolder = getattr(self.folder, 'subfolder')
+        self.folder._setObject('mydoc', TestItem('mydoc'))
+        self.folder._setObject('yourdoc', TestItem('yourdoc'))
+        transaction.savepoint(1)
+        eventlog.reset()
+
+    def test_1_CopyPaste(self):
+        cb = self.folder.manage_copyObjects(['mydoc', 'yourdoc'])
+        self.subfolder.manage_pasteObjects(cb)
+        self.assertEqual(
+            eventlog.called(),
+            [('mydoc', 'ObjectCopiedEvent'),
+             ('yourdoc', 'ObjectCopiedEvent'),
+             ('mydoc', 'ObjectWillBeAddedEvent'),
+             ('yourdoc', 'ObjectWillBeAddedEvent'),
+             ('mydoc', 'ObjectAddedEvent'),
+             ('yourdoc', 'ObjectAddedEvent'),
+             ('subfolder', 'ContainerModifiedEvent'),
+             ('mydoc', 'ObjectClonedEvent'),
+             ('yourdoc', 'ObjectClonedEvent')]
+        )
+
+    def test_2_CutPaste(self):
+        cb = self.folder.manage_cutObjects(['mydoc', 'yourdoc'])
+        self.subfolder.manage_pasteObjects(cb)
+        self.assertEqual(
+            eventlog.called(),
+            [('mydoc', 'ObjectWillBeMovedEvent'),
+             ('yourdoc', 'ObjectWillBeMovedEvent'),
+             ('mydoc', 'ObjectMovedEvent'),
+             ('yourdoc', 'ObjectMovedEvent'),
+             ('folder', 'ContainerModifiedEvent'),
+             ('subfolder', 'ContainerModifiedEvent')]
+        )
+
+    def test_3_Rename(self):
+        self.folder.manage_renameObjects(['mydoc', 'yourdoc'],
+                                         ['yourdoc', 'theirdoc'])
+        self.assertEqual(
+            eventlog.called(),
+            [('mydoc', 'ObjectWillBeMovedEvent'),
+             ('yourdoc', 'ObjectWillBeMovedEvent'),
+             ('yourdoc', 'ObjectMovedEvent'),
+             ('theirdoc', 'ObjectMovedEvent'),
+             ('folder', 'ContainerModifiedEvent')]
+        )
+
+    def test_4_Delete(self):
+        self.folder.manage_delObjects(['mydoc', 'yourdoc'])
+        self.assertEqual(
+            eventlog.called(),
+            [('mydoc', 'ObjectWillBeRemovedEvent'),
+             ('yourdoc', 'ObjectWillBeRemovedEvent'),
+             ('mydoc', 'ObjectRemovedEvent'),
+             ('yourdoc', 'ObjectRemovedEvent'),
+             ('folder', 'ContainerModifiedEvent')]
+        )
+
+
 class TestCopySupportSublocation(EventTest):
     '''Tests the order in which events are fired'''
 
@@ -254,11 +254,72 @@ class FileTests(unittest.TestCase):
         self.assertEqual(resp.getStatus(), 200)
         self.assertEqual(data, bytes(self.file.data))
 
+    def testReadDataBuildsPdataIndex(self):
+        n = 1 << 16
+        data = b'a' + b''.join([c * n for c in (b'b', b'c', b'd')])
+        self.file.manage_upload(data)
+        index = self.file._pdata_index
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.get_oid(0), self.file.data._p_oid)
+        self.assertEqual([index.get_offset(i) for i in range(3)],
+                         [0, n + 1, 2 * n + 1])
+        pos, record = self.file._find_pdata(self.file.data, 2 * n + 1)
+        self.assertEqual(pos, 2 * n + 1)
+        self.assertEqual(record.data, b'd' * n)
+        pos, record = self.file._find_pdata(self.file.data, 2 * n)
+        self.assertEqual(pos, n + 1)
+        self.assertEqual(record.data, b'c' * n)
+        pos, record = self.file._find_pdata(self.file.data, n)
+        self.assertEqual(pos, 0)
+        self.assertEqual(record._p_oid, self.file.data._p_oid)
+
+    def testPdataIndexDroppedWithData(self):
+        self.file.manage_upload(b'a' * (1 << 16) * 3)
+        self.assertIsNotNone(self.file._pdata_index)
+        self.file.manage_edit('foobar', 'text/plain', filedata=b'foo')
+        self.assertIsNone(self.file._pdata_index)
+
+    def testPdataIndexIgnoredForOtherChain(self):
+        self.file.manage_upload(b'a' * (1 << 16) * 3)
+        index = self.file._pdata_index
+        self.file.manage_upload(b'b' * (1 << 16) * 3)
+        self.file._pdata_index = index
+        self.assertIsNone(self.file._get_pdata_index(self.file.data))
+        self.assertEqual(self.file._find_pdata(self.file.data, 1 << 17),
+                         (0, self.file.data))
+
     def testIndexHtmlWithPdata(self):
         self.file.manage_upload(b'a' * (2 << 16))  # 128K
         self.file.index_html(self.app.REQUEST, self.app.REQUEST.RESPONSE)
         self.assertTrue(self.app.REQUEST.RESPONSE._wrote)
 
+    def testIndexHtmlWithCommittedPdata(self):
+        from ZPublisher.Iterators import IStreamIterator
+        data = b''.join(
+            [c * (1 << 16) for c in (b'a', b'b', b'c', b'd')])
+        self.file.manage_upload(data)
+        transaction.commit()
+        result = self.file.index_html(
+            self.app.REQUEST, self.app.REQUEST.RESPONSE)
+        self.assertTrue(IStreamIterator.providedBy(result))
+        self.assertFalse(self.app.REQUEST.RESPONSE._wrote)
+        self.assertEqual(len(result), len(data))
+        chunks = list(result)
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(b''.join(chunks), data)
+        self.assertIsNone(result._connection)
+
+    def testPdataStreamIteratorClose(self):
+        self.file.manage_upload(b'a' * (1 << 16) * 3)
+        transaction.commit()
+        result = self.file.index_html(
+            self.app.REQUEST, self.app.REQUEST.RESPONSE)
+        next(result)
+        self.assertIsNotNone(result._connection)
+        result.close()
+        self.assertIsNone(result._connection)
+        self.assertRaises(StopIteration, next, result)
+
     def testIndexHtmlWithString(self):
         self.file.manage_upload(b'a' * 100)  # 100 bytes
         self.file.index_html(self.app.REQUEST, self.app.REQUEST.RESPONSE)
@@ -294,6 +355,101 @@ class FileTests(unittest.TestCase):
                           'foobar', 'text/plain', filedata=val)
 
 
+class UnreadablePdata(object):
+    next = None
+
+    @property
+    def data(self):
+        raise AssertionError('Should not be read')
+
+
+def makePdataChain(*chunks):
+    head = tail = Pdata(chunks[0])
+    for chunk in chunks[1:]:
+        tail.next = Pdata(chunk)
+        tail = tail.next
+    tail.next = UnreadablePdata()
+    return head
+
+
+class GetImageInfoTests(unittest.TestCase):
+
+    def _callFUT(self, data):
+        from OFS.Image import getImageInfo
+        return getImageInfo(data)
+
+    def _makeJPEG(self, width, height, padding=0):
+        import struct
+        app1 = b'\xff\xe1' + struct.pack('>H', padding + 2) + b'x' * padding
+        sof = (b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 3) +
+               b'\0' * 6)
+        return b'\xff\xd8' + app1 + sof + b'\xff\xda'
+
+    def test_gif(self):
+        with open(filedata, 'rb') as fd:
+            data = fd.read()
+        self.assertEqual(self._callFUT(data), ('image/gif', 16, 16))
+
+    def test_gif_reads_first_record_only(self):
+        with open(filedata, 'rb') as fd:
+            data = fd.read()
+        chain = makePdataChain(data + b'\0' * (1 << 16), b'rest')
+        self.assertEqual(self._callFUT(chain),
+                         ('image/gif', 16, 16))
+
+    def test_jpeg(self):
+        self.assertEqual(self._callFUT(self._makeJPEG(640, 480)),
+                         ('image/jpeg', 640, 480))
+
+    def test_jpeg_with_large_metadata_in_pdata_chain(self):
+        data = self._makeJPEG(640, 480, padding=60000)
+        chunks = [data[:50000], data[50000:] + b'\0' * 50000]
+        self.assertEqual(self._callFUT(makePdataChain(*chunks)),
+                         ('image/jpeg', 640, 480))
+
+    def test_jpeg_truncated(self):
+        data = self._makeJPEG(640, 480)[:8]
+        self.assertEqual(self._callFUT(data), ('image/jpeg', -1, -1))
+
+    def test_webp_lossy(self):
+        import struct
+        data = (b'RIFF\0\0\0\0WEBPVP8 \0\0\0\0\0\0\0\x9d\x01\x2a' +
+                struct.pack('<HH', 300, 200))
+        self.assertEqual(self._callFUT(data), ('image/webp', 300, 200))
+
+    def test_webp_lossless(self):
+        import struct
+        bits = (300 - 1) | ((200 - 1) << 14)
+        data = (b'RIFF\0\0\0\0WEBPVP8L\0\0\0\0\x2f' +
+                struct.pack('<L', bits))
+        self.assertEqual(self._callFUT(data), ('image/webp', 300, 200))
+
+    def test_webp_extended(self):
+        import struct
+        data = (b'RIFF\0\0\0\0WEBPVP8X\0\0\0\0' + b'\0' * 4 +
+                struct.pack('<L', 300 - 1)[:3] +
+                struct.pack('<L', 200 - 1)[:3])
+        self.assertEqual(self._callFUT(data), ('image/webp', 300, 200))
+
+    def test_svg(self):
+        data = (b'<?xml version="1.0"?>\n<!-- drawing -->\n'
+                b'<svg xmlns="http://www.w3.org/2000/svg" stroke-width="3" '
+                b'width="120px" height="80.4">')
+        self.assertEqual(self._callFUT(data), ('image/svg+xml', 120, 80))
+
+    def test_svg_viewbox(self):
+        data = b'<svg viewBox="0 0 64 32"><rect/></svg>'
+        self.assertEqual(self._callFUT(data), ('image/svg+xml', 64, 32))
+
+    def test_svg_relative_size(self):
+        data = b'<svg width="100%" height="50%"></svg>'
+        self.assertEqual(self._callFUT(data), ('image/svg+xml', -1, -1))
+
+    def test_unknown(self):
+        self.assertEqual(self._callFUT(b'<html><svg></svg></html>'),
+                         ('', -1, -1))
+
+
 class ImageTests(FileTests):
     content_type = 'image/gif'
     factory = 'manage_addImage'
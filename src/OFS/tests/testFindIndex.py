@@ -0,0 +1,165 @@
+import unittest
+
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import noSecurityManager
+from AccessControl.users import system
+import transaction
+from zope.component import provideHandler
+from zope.component.event import objectEventNotify
+from zope.component.testing import setUp
+from zope.component.testing import tearDown
+from zope.lifecycleevent import modified
+
+
+class TestFindIndex(unittest.TestCase):
+
+    def setUp(self):
+        from OFS.findindex import FindIndex
+        from OFS.SimpleItem import SimpleItem
+        self.index = FindIndex()
+        self.item = SimpleItem()
+        self.item.meta_type = 'Item'
+
+    def test_index_search(self):
+        index = self.index
+        index.indexObject(('a', ), self.item, 10)
+        index.indexObject(('a', 'b'), self.item, 20)
+        index.indexObject(('c', ), self.item, 30)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.search(), [('a', ), ('c', )])
+        self.assertEqual(index.search(search_sub=1),
+                         [('a', ), ('a', 'b'), ('c', )])
+        self.assertEqual(index.search(('a', )), [('a', 'b')])
+        self.assertEqual(index.search(obj_ids=['b'], search_sub=1),
+                         [('a', 'b')])
+        self.assertEqual(index.search(obj_ids=['b']), [])
+        self.assertEqual(index.search(obj_metatypes=['Item'], search_sub=1,
+                                      limit=2), [('a', ), ('a', 'b')])
+        self.assertEqual(index.search(obj_metatypes=['Folder']), [])
+        self.assertEqual(index.search(obj_mtime=15, obj_mspec='>',
+                                      search_sub=1),
+                         [('a', 'b'), ('c', )])
+        self.assertEqual(index.search(obj_mtime=15, obj_mspec='<',
+                                      search_sub=1), [('a', )])
+
+    def test_unindex_move(self):
+        index = self.index
+        index.indexObject(('a', ), self.item, 10)
+        index.indexObject(('a', 'b'), self.item, 20)
+        index.indexObject(('ab', ), self.item, 30)
+        index.moveObject(('a', ), ('x', 'a'))
+        self.assertEqual(index.search(search_sub=1),
+                         [('ab', ), ('x', 'a'), ('x', 'a', 'b')])
+        self.assertEqual(index.getEntry(('x', 'a', 'b')), ('Item', 20))
+        index.unindexObject(('x', ))
+        self.assertEqual(index.search(search_sub=1), [('ab', )])
+        self.assertEqual(index.search(obj_ids=['b']), [])
+        self.assertEqual(len(index), 1)
+
+
+class TestFindIndexEvents(unittest.TestCase):
+
+    def setUp(self):
+        from OFS.findindex import reindexModified
+        from OFS.findindex import updateFindIndex
+        from OFS.Folder import Folder
+        from ZODB.tests.util import DB
+
+        setUp()
+        provideHandler(objectEventNotify)
+        provideHandler(updateFindIndex)
+        provideHandler(reindexModified)
+        self.db = DB()
+        self.conn = self.db.open()
+        self.root = root = self.conn.root()['root'] = Folder('root')
+        root._setObject('a', Folder('a'))
+        root.a._setObject('b', Folder('b'))
+        root._setObject('c', Folder('c'))
+
+    def tearDown(self):
+        transaction.abort()
+        self.conn.close()
+        self.db.close()
+        tearDown()
+
+    def _paths(self, container):
+        return container._find_index.search(search_sub=1)
+
+    def test_add_index(self):
+        from OFS.findindex import addFindIndex
+        from OFS.findindex import removeFindIndex
+        index = addFindIndex(self.root)
+        self.assertEqual(self._paths(self.root),
+                         [('a', ), ('a', 'b'), ('c', )])
+        self.assertEqual(index.getEntry(('a', ))[0], 'Folder')
+        removeFindIndex(self.root)
+        self.assertFalse(hasattr(self.root, '_find_index'))
+
+    def test_events(self):
+        from OFS.findindex import addFindIndex
+        from OFS.Folder import Folder
+        addFindIndex(self.root)
+        addFindIndex(self.root.a)
+        self.root.a.b._setObject('d', Folder('d'))
+        self.assertEqual(self._paths(self.root),
+                         [('a', ), ('a', 'b'), ('a', 'b', 'd'), ('c', )])
+        self.assertEqual(self._paths(self.root.a), [('b', ), ('b', 'd')])
+
+        transaction.savepoint(optimistic=True)
+        newSecurityManager(None, system)
+        try:
+            self.root.a.manage_renameObject('b', 'e')
+        finally:
+            noSecurityManager()
+        self.assertEqual(self._paths(self.root),
+                         [('a', ), ('a', 'e'), ('a', 'e', 'd'), ('c', )])
+        self.assertEqual(self._paths(self.root.a), [('e', ), ('e', 'd')])
+
+        self.root.a._delObject('e')
+        self.assertEqual(self._paths(self.root), [('a', ), ('c', )])
+        self.assertEqual(self._paths(self.root.a), [])
+
+    def test_modified(self):
+        from OFS.findindex import addFindIndex
+        index = addFindIndex(self.root)
+        index.indexObject(('c', ), self.root.c, 0)
+        modified(self.root.c)
+        self.assertTrue(index.getEntry(('c', ))[1] > 0)
+
+    def test_zope_find(self):
+        from OFS.findindex import addFindIndex
+        addFindIndex(self.root)
+        # Objects not in the index are not found.
+        self.root._find_index.unindexObject(('c', ))
+        found = self.root.ZopeFind(self.root, obj_metatypes=['Folder'],
+                                   search_sub=1)
+        self.assertEqual([p for p, ob in found], ['a', 'a/b'])
+        self.assertTrue(found[1][1].aq_base is self.root.a.b.aq_base)
+        found = self.root.a.ZopeFind(self.root.a, obj_ids=['b'])
+        self.assertEqual([p for p, ob in found], ['b'])
+        # Searching the contents needs the objects.
+        found = self.root.ZopeFind(self.root, obj_ids=['c'],
+                                   obj_searchterm='x')
+        self.assertEqual(found, [])
+
+    def test_zope_find_mtime(self):
+        import time
+        from OFS.findindex import addFindIndex
+        addFindIndex(self.root)
+        transaction.commit()
+        t = time.time()
+        # A change without an IObjectModifiedEvent.
+        self.root.c.title = 'changed'
+        transaction.commit()
+        found = self.root.ZopeFind(self.root, obj_metatypes=['Folder'],
+                                   obj_mtime=t, obj_mspec='>',
+                                   search_sub=1)
+        self.assertEqual([p for p, ob in found], ['c'])
+        found = self.root.ZopeFind(self.root, obj_metatypes=['Folder'],
+                                   obj_mtime=t, obj_mspec='<',
+                                   search_sub=1, limit=1)
+        self.assertEqual([p for p, ob in found], ['a'])
+        # Without ids or meta types the objects are searched.
+        found = self.root.ZopeFind(self.root, obj_mtime=t, obj_mspec='>',
+                                   search_sub=1)
+        self.assertEqual([p for p, ob in found], ['c'])
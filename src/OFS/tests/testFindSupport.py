@@ -18,6 +18,12 @@ class DummyFolder(DummyItem, dict):
         return list(self.items())
 
 
+class DummyRequest(dict):
+
+    def set(self, key, value):
+        self[key] = value
+
+
 class TestFindSupport(unittest.TestCase):
 
     def setUp(self):
@@ -47,3 +53,105 @@ class TestFindSupport(unittest.TestCase):
         self.assertEqual(self.base['1'].id, '1')
         self.assertEqual(self.base['2'].id, 'foo2')
         self.assertEqual(self.base['3'].id, '3')
+
+    def test_find_limit(self):
+        found = self.base.ZopeFind(self.base, limit=2)
+        self.assertEqual(len(found), 2)
+
+    def test_find_limit_stopped(self):
+        request = DummyRequest()
+        self.base.ZopeFind(self.base, REQUEST=request, limit=1)
+        self.assertEqual(request.get('find_stopped'), 'limit')
+
+    def test_find_max_objects_visited(self):
+        self.base['4'] = sub = DummyFolder('4')
+        sub['5'] = DummyItem('5')
+        found = self.base.ZopeFind(self.base, obj_ids=['5'], search_sub=1)
+        self.assertEqual([p for p, ob in found], ['4/5'])
+        found = self.base.ZopeFind(self.base, obj_ids=['5'], search_sub=1,
+                                   max_objects_visited=2)
+        self.assertEqual(found, [])
+
+    def test_find_time_budget(self):
+        self.assertEqual(self.base.ZopeFind(self.base, time_budget=0), [])
+
+    def test_find_iter(self):
+        from OFS.interfaces import IFindSupport
+        self.assertTrue(IFindSupport.providedBy(self.base))
+        found = self.base.ZopeFindIter(self.base, obj_ids=['1', '3'])
+        self.assertEqual(next(found)[0], '1')
+        self.assertEqual(next(found)[0], '3')
+        self.assertRaises(StopIteration, next, found)
+
+
+class TestFindSupportLoading(unittest.TestCase):
+
+    def setUp(self):
+        import transaction
+        from ZODB.tests.util import DB
+        from OFS.Folder import Folder
+        from OFS.Image import File
+
+        self.db = DB()
+        conn = self.db.open()
+        root = conn.root()['base'] = Folder('base')
+        for i in range(3):
+            sub = Folder('sub%d' % i)
+            for j in range(5):
+                id = 'file%d' % j
+                sub._setObject(id, File(id, '', b'data'))
+            root._setObject(sub.getId(), sub)
+        transaction.commit()
+        conn.close()
+
+    def tearDown(self):
+        import transaction
+        transaction.abort()
+        self.db.close()
+
+    def test_find_metatypes_not_loading(self):
+        conn = self.db.open()
+        conn.cacheMinimize()
+        base = conn.root()['base']
+        found = base.ZopeFind(base, obj_metatypes=['Folder'], search_sub=1)
+        self.assertEqual([p for p, ob in found], ['sub0', 'sub1', 'sub2'])
+        for p, sub in found:
+            for ob in sub.objectValues():
+                self.assertEqual(ob._p_changed, None)
+        conn.close()
+
+    def test_find_ids_not_loading(self):
+        conn = self.db.open()
+        conn.cacheMinimize()
+        base = conn.root()['base']
+        found = base.ZopeFind(base, obj_ids=['file1'], search_sub=1)
+        self.assertEqual([p for p, ob in found],
+                         ['sub0/file1', 'sub1/file1', 'sub2/file1'])
+        self.assertEqual(base.sub0.file2._p_changed, None)
+        conn.close()
+
+    def test_find_overridden_listing(self):
+        # Containers listing their objects without _objects, like
+        # BTreeFolder2, are searched with their objectItems.
+        from OFS.Folder import Folder
+        from OFS.Image import File
+
+        class OtherFolder(Folder):
+            _objects = ()
+
+            def objectIds(self, spec=None):
+                return [id for id, ob in self.objectItems(spec)]
+
+            def objectItems(self, spec=None):
+                if spec is None or self.x.meta_type in spec:
+                    return [('x', self.x)]
+                return []
+
+        base = Folder('base')
+        base._setOb('bt', OtherFolder('bt'))
+        base._objects = ({'id': 'bt', 'meta_type': 'Folder'}, )
+        base.bt.x = File('x', '', b'data')
+        found = base.ZopeFind(base, obj_ids=['x'], search_sub=1)
+        self.assertEqual([p for p, ob in found], ['bt/x'])
+        found = base.ZopeFind(base, obj_metatypes=['File'], search_sub=1)
+        self.assertEqual([p for p, ob in found], ['bt/x'])
@@ -323,6 +323,92 @@ class ObjectManagerTests(PlacelessSetup, unittest.TestCase):
         om.manage_delObjects(u'stuff')
         self.assertFalse('stuff' in om)
 
+    def _recordEvents(self):
+        import zope.event
+        events = []
+        zope.event.subscribers.append(events.append)
+        self.addCleanup(zope.event.subscribers.remove, events.append)
+        return events
+
+    def test_setObjects(self):
+        om = self._makeOne()
+        a = SimpleItem('a')
+        b = SimpleItem('b')
+        events = self._recordEvents()
+        ids = om._setObjects([('b', b), ('a', a)])
+        self.assertEqual(ids, ['b', 'a'])
+        self.assertEqual(sorted(om.objectIds()), ['a', 'b'])
+        self.assertTrue(aq_self(om.b) is b)
+        self.assertEqual(
+            [(event.__class__.__name__, aq_self(event.object))
+             for event in events],
+            [('ObjectWillBeAddedEvent', b),
+             ('ObjectWillBeAddedEvent', a),
+             ('ObjectAddedEvent', b),
+             ('ObjectAddedEvent', a),
+             ('ContainerModifiedEvent', aq_self(om))])
+
+    def test_setObjects_replaces(self):
+        from OFS.ObjectManager import REPLACEABLE
+        om = self._makeOne()
+        replaced = SimpleItem('a')
+        replaced.__replaceable__ = REPLACEABLE
+        om._setObject('a', replaced)
+        replacement = SimpleItem('a')
+        om._setObjects([('a', replacement), ('b', SimpleItem('b'))])
+        self.assertEqual(sorted(om.objectIds()), ['a', 'b'])
+        self.assertTrue(aq_self(om.a) is replacement)
+
+    def test_setObjects_duplicate_ids(self):
+        om = self._makeOne()
+        self.assertRaises(BadRequest, om._setObjects,
+                          [('a', SimpleItem('a')), ('a', SimpleItem('a'))])
+        self.assertEqual(list(om.objectIds()), [])
+
+    def test_setObjects_suppress_events(self):
+        om = self._makeOne()
+        events = self._recordEvents()
+        om._setObjects([('a', SimpleItem('a'))], suppress_events=True)
+        self.assertEqual(list(om.objectIds()), ['a'])
+        self.assertEqual(events, [])
+
+    def test_delObjects(self):
+        om = self._makeOne()
+        for id in ('a', 'b', 'c'):
+            om._setObject(id, SimpleItem(id))
+        events = self._recordEvents()
+        om._delObjects(['c', 'a'])
+        self.assertEqual(list(om.objectIds()), ['b'])
+        self.assertFalse(om.hasObject('a'))
+        self.assertEqual(
+            [event.__class__.__name__ for event in events],
+            ['ObjectWillBeRemovedEvent', 'ObjectWillBeRemovedEvent',
+             'ObjectRemovedEvent', 'ObjectRemovedEvent',
+             'ContainerModifiedEvent'])
+
+    def test_setObjects_delObjects_overridden(self):
+        # Subclasses which only override the methods for single objects
+        # get them called for each object.
+        calls = []
+
+        class Subclass(self._getTargetClass()):
+
+            def _setObject(self, id, object, *args, **kw):
+                calls.append(('set', id))
+                return super(Subclass, self)._setObject(
+                    id, object, *args, **kw)
+
+            def _delObject(self, id, *args, **kw):
+                calls.append(('del', id))
+                return super(Subclass, self)._delObject(id, *args, **kw)
+
+        om = Subclass().__of__(FauxRoot())
+        om._setObjects([('a', SimpleItem('a')), ('b', SimpleItem('b'))])
+        om.manage_delObjects(['a', 'b'])
+        self.assertEqual(calls, [('set', 'a'), ('set', 'b'),
+                                 ('del', 'a'), ('del', 'b')])
+        self.assertEqual(list(om.objectIds()), [])
+
     def test_hasObject(self):
         om = self._makeOne()
         self.assertFalse(om.hasObject('_properties'))
@@ -500,6 +586,82 @@ class ObjectManagerTests(PlacelessSetup, unittest.TestCase):
             self.assertTrue(filename.endswith('.zexp') or
                             filename.endswith('.xml'))
 
+    def _makeListing(self):
+        om = self._makeOne()
+        for id in ('a', 'b', 'c', 'd', 'e'):
+            item = SimpleItem()
+            item.id = id
+            om._setObject(id, item)
+        loaded = []
+        getOb = om._getOb
+
+        def _getOb(id, default=_marker):
+            loaded.append(id)
+            return getOb(id)
+        om._getOb = _getOb
+        return om, loaded
+
+    def test_iterObjectIds(self):
+        om, loaded = self._makeListing()
+        self.assertEqual(list(om.iterObjectIds()), ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(list(om.iterObjectIds('Nonesuch')), [])
+        self.assertEqual(list(om.iterObjectMap()), list(om.objectMap()))
+        self.assertEqual(loaded, [])
+
+    def test_iterObjectIds_overridden_listing(self):
+        # Subclasses listing their subobjects elsewhere than in _objects
+        # get their own listing.
+        class ListingManager(self._getTargetClass()):
+            x = SimpleItem()
+
+            def objectIds(self, spec=None):
+                return ['x'] if spec in (None, 'Thing') else []
+
+            def objectMap(self):
+                return ({'id': 'x', 'meta_type': 'Thing'}, )
+
+            def _getOb(self, id, default=_marker):
+                return self.x
+
+        om = ListingManager()
+        self.assertFalse(om._objects)
+        self.assertEqual(list(om.iterObjectIds()), ['x'])
+        self.assertEqual(list(om.iterObjectIds('Thing')), ['x'])
+        self.assertEqual(list(om.iterObjectIds('Nonesuch')), [])
+        self.assertEqual(list(om.iterObjectMap()), list(om.objectMap()))
+        self.assertEqual([id for id, ob in om.objectItemsSlice(0, 1)], ['x'])
+        self.assertEqual([id for id, ob in om.lazyObjectItems()], ['x'])
+
+    def test_objectItemsSlice(self):
+        om, loaded = self._makeListing()
+        self.assertEqual([id for id, ob in om.objectItemsSlice(1, 2)],
+                         ['b', 'c'])
+        self.assertEqual(loaded, ['b', 'c'])
+        del loaded[:]
+        self.assertEqual([ob.getId() for ob in om.objectValuesSlice(3)],
+                         ['d', 'e'])
+        self.assertEqual(loaded, ['d', 'e'])
+        self.assertEqual(om.objectItemsSlice(5, 2), [])
+
+    def test_lazyObjectItems(self):
+        om, loaded = self._makeListing()
+        items = om.lazyObjectItems()
+        self.assertEqual(len(items), 5)
+        self.assertEqual(loaded, [])
+        id, ob = items[3]
+        self.assertEqual(id, 'd')
+        self.assertEqual(ob.getId(), 'd')
+        self.assertEqual(loaded, ['d'])
+
+    def test_objectItemsBatch(self):
+        om, loaded = self._makeListing()
+        batch = om.objectItemsBatch(2, 2)
+        self.assertEqual([id for id, ob in batch], ['c', 'd'])
+        self.assertEqual(batch.sequence_length, 5)
+        self.assertEqual(sorted(loaded), ['c', 'd', 'e'])
+        self.assertEqual(batch.next.first, 4)
+        self.assertEqual(batch.previous.first, 0)
+
 _marker = object()
 
 
@@ -130,6 +130,54 @@ class TestOrderSupport(unittest.TestCase):
              (('position', 0), ['o1', 'o2', 'o3', 'o4'], 0),
              (('position', 1), ['o4', 'o3', 'o2', 'o1'], 3)))
 
+    def test_orderObjects_by_metadata_does_not_load_objects(self):
+        f = self._makeOne()
+
+        def objectItems():
+            self.fail('objects loaded')
+
+        f.objectItems = objectItems
+        self.assertEqual(f.orderObjects('meta_type', 1), 3)
+        self.assertEqual(f.objectIds(), ['o4', 'o2', 'o3', 'o1'])
+
+    def test_orderObjects_without_meta_type(self):
+        from OFS.OrderedFolder import OrderedFolder
+        from OFS.SimpleItem import SimpleItem
+        f = OrderedFolder('f')
+        for id, meta_type in (('o0', 'Item'), ('o1', None), ('o2', 'Item')):
+            item = SimpleItem()
+            item.id = id
+            item.meta_type = meta_type
+            f._setObject(id, item)
+        self.assertEqual(f.objectMap()[1], {'id': 'o1', 'meta_type': None})
+        f.orderObjects('meta_type')
+        self.assertEqual(f.objectIds(), ['o1', 'o0', 'o2'])
+
+    def _makeLarge(self, count):
+        f = self._makeOne()
+        f._objects = tuple({'id': 'o%04d' % i, 'meta_type': 'mt'}
+                           for i in range(count))
+        return f
+
+    def test_moveObjectsByDelta_large(self):
+        f = self._makeLarge(2000)
+        ids = ['o%04d' % i for i in range(0, 2000, 10)]
+        self.assertEqual(f.moveObjectsDown(ids, 3), 200)
+        order = f.objectIds()
+        self.assertEqual(order[:5], ['o0001', 'o0002', 'o0003', 'o0000',
+                                     'o0004'])
+        self.assertEqual(order[1990:1995], ['o1991', 'o1992', 'o1993',
+                                            'o1990', 'o1994'])
+        self.assertEqual(sorted(order), ['o%04d' % i for i in range(2000)])
+
+    def test_moveObjectsToTop_large(self):
+        f = self._makeLarge(2000)
+        ids = ['o%04d' % i for i in range(1999, -1, -10)]
+        self.assertEqual(f.moveObjectsToTop(ids), 200)
+        order = f.objectIds()
+        self.assertEqual(order[:200], ids)
+        self.assertEqual(order[200:202], ['o0000', 'o0001'])
+
     def test_getObjectPosition(self):
         self._doCanonTest(
             'getObjectPosition',
@@ -150,6 +198,12 @@ class TestOrderSupport(unittest.TestCase):
             ((('o2', 'n2'), ['o1', 'n2', 'o3', 'o4'], None),
              (('o3', 'n3'), ['o1', 'o2', 'n3', 'o4'], None)))
 
+    def test_manage_renameObjects(self):
+        self._doCanonTest(
+            'manage_renameObjects',
+            (((['o2', 'o4'], ['n2', 'n4']), ['o1', 'n2', 'o3', 'n4'], None),
+             ((['o1', 'o3'], ['o3', 'n3']), ['o3', 'o2', 'n3', 'o4'], None)))
+
     def test_tpValues(self):
         f = self._makeOne()
         f.o2.isPrincipiaFolderish = True
@@ -0,0 +1,188 @@
+import unittest
+
+from zope.component.testing import PlacelessSetup
+
+from OFS.Folder import Folder
+
+
+class DummyRequest(dict):
+    pass
+
+
+class DummyCacheable(object):
+
+    def __init__(self, path, mtime=0):
+        self.path = path
+        self.mtime = mtime
+
+    def getPhysicalPath(self):
+        return self.path
+
+    def ZCacheable_getModTime(self, mtime_func=None):
+        return self.mtime
+
+
+class RAMCacheTests(unittest.TestCase):
+
+    def tearDown(self):
+        from zope.globalrequest import clearRequest
+        clearRequest()
+
+    def _makeOne(self, *args, **kw):
+        from OFS.RAMCacheManager import RAMCache
+        return RAMCache(*args, **kw)
+
+    def test_get_set(self):
+        cache = self._makeOne()
+        ob = DummyCacheable(('', 'a'))
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, 'x'), 'x')
+        cache.ZCache_set(ob, 'data', '', None, None)
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, 'x'), 'data')
+        self.assertEqual(cache.ZCache_get(ob, 'view', None, None, 'x'), 'x')
+        stats = cache.getStatistics()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['size'], 4)
+
+    def test_none_not_cached(self):
+        cache = self._makeOne()
+        ob = DummyCacheable(('', 'a'))
+        cache.ZCache_set(ob, None, '', None, None)
+        self.assertEqual(cache.getStatistics()['entries'], 0)
+
+    def test_keywords(self):
+        cache = self._makeOne()
+        ob = DummyCacheable(('', 'a'))
+        cache.ZCache_set(ob, 'one', '', {'a': 1, 'b': 2}, None)
+        cache.ZCache_set(ob, 'two', '', {'a': 2, 'b': 2}, None)
+        self.assertEqual(
+            cache.ZCache_get(ob, '', {'b': 2, 'a': 1}, None, None), 'one')
+        self.assertEqual(
+            cache.ZCache_get(ob, '', {'a': 2, 'b': 2}, None, None), 'two')
+
+    def test_request_vars(self):
+        from zope.globalrequest import setRequest
+        cache = self._makeOne(request_vars=('user',))
+        ob = DummyCacheable(('', 'a'))
+        setRequest(DummyRequest(user='alice'))
+        cache.ZCache_set(ob, 'alice', '', None, None)
+        setRequest(DummyRequest(user='bob'))
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, None), None)
+        setRequest(DummyRequest(user='alice'))
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, None), 'alice')
+
+    def test_mtime(self):
+        cache = self._makeOne()
+        ob = DummyCacheable(('', 'a'), mtime=10)
+        cache.ZCache_set(ob, 'data', '', None, None)
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, None), 'data')
+        ob.mtime = 20
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, None), None)
+        self.assertEqual(cache.getStatistics()['entries'], 0)
+
+    def test_max_age(self):
+        cache = self._makeOne(max_age=10)
+        ob = DummyCacheable(('', 'a'))
+        cache.ZCache_set(ob, 'data', '', None, None)
+        cache._entries[next(iter(cache._entries))].created -= 20
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, None), None)
+
+    def test_lru_eviction(self):
+        cache = self._makeOne(max_size=10)
+        a = DummyCacheable(('', 'a'))
+        b = DummyCacheable(('', 'b'))
+        c = DummyCacheable(('', 'c'))
+        cache.ZCache_set(a, 'aaaa', '', None, None)
+        cache.ZCache_set(b, 'bbbb', '', None, None)
+        # Using a makes b the least recently used entry.
+        cache.ZCache_get(a, '', None, None, None)
+        cache.ZCache_set(c, 'cccc', '', None, None)
+        self.assertEqual(cache.ZCache_get(a, '', None, None, None), 'aaaa')
+        self.assertEqual(cache.ZCache_get(b, '', None, None, None), None)
+        self.assertEqual(cache.ZCache_get(c, '', None, None, None), 'cccc')
+        stats = cache.getStatistics()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['size'], 8)
+
+    def test_too_large(self):
+        cache = self._makeOne(max_size=3)
+        ob = DummyCacheable(('', 'a'))
+        cache.ZCache_set(ob, 'data', '', None, None)
+        self.assertEqual(cache.getStatistics()['entries'], 0)
+
+    def test_pickled_size(self):
+        cache = self._makeOne()
+        ob = DummyCacheable(('', 'a'))
+        cache.ZCache_set(ob, {'a': [1, 2, 3]}, '', None, None)
+        self.assertEqual(cache.ZCache_get(ob, '', None, None, None),
+                         {'a': [1, 2, 3]})
+        self.assertTrue(cache.getStatistics()['size'] > 0)
+
+    def test_invalidate(self):
+        cache = self._makeOne()
+        a = DummyCacheable(('', 'a'))
+        b = DummyCacheable(('', 'b'))
+        cache.ZCache_set(a, 'one', '', None, None)
+        cache.ZCache_set(a, 'two', 'view', None, None)
+        cache.ZCache_set(b, 'three', '', None, None)
+        cache.ZCache_invalidate(a)
+        self.assertEqual(cache.ZCache_get(a, '', None, None, None), None)
+        self.assertEqual(cache.ZCache_get(a, 'view', None, None, None), None)
+        self.assertEqual(cache.ZCache_get(b, '', None, None, None), 'three')
+        self.assertEqual(cache.getStatistics()['size'], 5)
+
+
+class RAMCacheManagerTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        from Zope2.App import zcml
+        import OFS
+        import Zope2.App
+        super(RAMCacheManagerTests, self).setUp()
+        zcml.load_config('meta.zcml', Zope2.App)
+        zcml.load_config('configure.zcml', OFS)
+
+    def test_cacheable(self):
+        from OFS.DTMLMethod import DTMLMethod
+        from OFS.RAMCacheManager import manage_addRAMCacheManager
+        root = Folder('root')
+        manage_addRAMCacheManager(root, 'cache')
+        root._setObject('doc', DTMLMethod('doc'))
+        doc = root.doc
+        doc.ZCacheable_setManagerId('cache')
+        self.assertTrue(doc.ZCacheable_isCachingEnabled())
+        doc.ZCacheable_set('result')
+        self.assertEqual(doc.ZCacheable_get(), 'result')
+        stats = root.cache.ZCacheManager_getStatistics()
+        self.assertEqual(stats['hits'], 1)
+        doc.ZCacheable_invalidate()
+        self.assertEqual(doc.ZCacheable_get(), None)
+
+    def test_editProps(self):
+        from OFS.RAMCacheManager import RAMCacheManager
+        manager = RAMCacheManager('cache')
+        manager.manage_editProps('Title', 100, 0, ['  ', 'user'])
+        self.assertEqual(manager.request_vars, ('user',))
+        cache = manager.ZCacheManager_getCache()
+        self.assertEqual(cache.max_size, 100)
+        self.assertEqual(cache.max_age, 0)
+        self.assertEqual(cache.request_vars, ('user',))
+
+    def test_copy_gets_own_cache(self):
+        from OFS.RAMCacheManager import RAMCacheManager
+        manager = RAMCacheManager('cache')
+        cache = manager.ZCacheManager_getCache()
+        manager.manage_afterClone(manager)
+        self.assertFalse(manager.ZCacheManager_getCache() is cache)
+
+    def test_delete_drops_cache(self):
+        from OFS.RAMCacheManager import caches
+        from OFS.RAMCacheManager import manage_addRAMCacheManager
+        root = Folder('root')
+        manage_addRAMCacheManager(root, 'cache')
+        root.cache.ZCacheManager_getCache()
+        cache_id = root.cache._cache_id
+        self.assertTrue(cache_id in caches)
+        root.manage_delObjects(['cache'])
+        self.assertFalse(cache_id in caches)
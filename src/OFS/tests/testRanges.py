@@ -310,6 +310,14 @@ class TestRequestRange(unittest.TestCase):
             '3-700,%s-%s' % (start, end),
             [(3, 701), (len(self.data) - 100, len(self.data))])
 
+    def testMultipleRangesBigFileWithoutIndex(self):
+        self.uploadBigFile()
+        self.file._pdata_index = None
+        self.expectMultipleRanges(
+            '10-15,-10000,70000-80000',
+            [(10, 16), (len(self.data) - 10000, len(self.data)),
+             (70000, 80001)])
+
     # If-Range headers
     def testIllegalIfRange(self):
         # We assume that an illegal if-range is to be ignored, just like an
@@ -426,6 +426,125 @@ class TestTraverse(unittest.TestCase):
             self.folder1.unrestrictedTraverse('+something') is 'plus')
 
 
+class TestTraverseWithCache(TestTraverse):
+    # Run the traversal tests again with the traversal and physical path
+    # caches enabled.
+
+    def setUp(self):
+        from OFS import Traversable
+        from zope.globalrequest import setRequest
+        super(TestTraverseWithCache, self).setUp()
+        self._cache_enabled = Traversable.traversal_cache_enabled
+        self._path_cache_enabled = Traversable.physical_path_cache_enabled
+        Traversable.traversal_cache_enabled = True
+        Traversable.physical_path_cache_enabled = True
+        Traversable.resetTraversalCacheStatistics()
+        setRequest(self.app.REQUEST)
+
+    def tearDown(self):
+        from OFS import Traversable
+        from zope.globalrequest import clearRequest
+        clearRequest()
+        Traversable.traversal_cache_enabled = self._cache_enabled
+        Traversable.physical_path_cache_enabled = self._path_cache_enabled
+        super(TestTraverseWithCache, self).tearDown()
+
+    def _getStatistics(self):
+        from OFS.Traversable import getTraversalCacheStatistics
+        return getTraversalCacheStatistics()
+
+    def test_cache_hit(self):
+        file = self.folder1.unrestrictedTraverse('/folder1/file')
+        self.assertTrue(self.app.unrestrictedTraverse('/folder1/file') is file)
+        self.assertEqual(self._getStatistics(),
+                         {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_relative_path_keyed_on_context(self):
+        self.folder1.unrestrictedTraverse('file')
+        self.assertEqual(self._getStatistics()['misses'], 1)
+        self.folder1.unrestrictedTraverse('file')
+        self.assertEqual(self._getStatistics()['hits'], 1)
+        # Not found, the object was acquired through another context.
+        self.app.unrestrictedTraverse('file', None)
+        self.assertEqual(self._getStatistics()['hits'], 1)
+
+    def test_restricted_keyed_on_user(self):
+        from AccessControl.SecurityManagement import newSecurityManager
+        self.folder1.restrictedTraverse('file')
+        self.folder1.restrictedTraverse('file')
+        self.folder1.unrestrictedTraverse('file')
+        self.assertEqual(self._getStatistics()['hits'], 1)
+        user = self._makeUser()
+        user.getId = lambda: 'other'
+        newSecurityManager(None, user.__of__(self.root))
+        self.folder1.restrictedTraverse('file')
+        self.assertEqual(self._getStatistics()['hits'], 1)
+
+    def test_invalidated_when_objects_move(self):
+        from OFS.Traversable import invalidateTraversalCache
+        from zope.component import getGlobalSiteManager
+        gsm = getGlobalSiteManager()
+        gsm.registerHandler(invalidateTraversalCache)
+        try:
+            self.folder1.unrestrictedTraverse('/folder1/file')
+            self.folder1.manage_delObjects(['file'])
+            self.assertEqual(
+                self.folder1.unrestrictedTraverse('/folder1/file', None),
+                None)
+        finally:
+            gsm.unregisterHandler(invalidateTraversalCache)
+
+    def test_physical_path_of_items_of_container(self):
+        from OFS.Folder import manage_addFolder
+        folder = self.app.folder1
+        manage_addFolder(folder, 'folder2')
+        file = folder.file
+        self.assertEqual(file.getPhysicalPath(), ('', 'folder1', 'file'))
+        self.assertEqual(folder.folder2.getPhysicalPath(),
+                         ('', 'folder1', 'folder2'))
+        paths = self.app.REQUEST.__dict__['_Traversable_paths']
+        self.assertTrue(paths[id(folder)][0] is folder)
+        self.assertEqual(file.absolute_url(), 'http://nohost/folder1/file')
+        self.assertEqual(file.absolute_url_path(), '/folder1/file')
+
+    def test_physical_path_after_rename(self):
+        from OFS.Traversable import invalidateTraversalCache
+        from zope.component import getGlobalSiteManager
+        gsm = getGlobalSiteManager()
+        gsm.registerHandler(invalidateTraversalCache)
+        try:
+            self.app.all_meta_types = (
+                {'name': 'Folder',
+                 'action': 'manage_addFolder',
+                 'permission': 'Add Folders'},
+            )
+            folder = self.app.folder1
+            self.assertEqual(folder.file.getPhysicalPath(),
+                             ('', 'folder1', 'file'))
+            self.app.manage_renameObject('folder1', 'renamed')
+            self.assertEqual(folder.file.getPhysicalPath(),
+                             ('', 'renamed', 'file'))
+        finally:
+            gsm.unregisterHandler(invalidateTraversalCache)
+
+    def test_absolute_url_virtual_root(self):
+        request = self.app.REQUEST
+        file = self.app.folder1.file
+        self.assertEqual(file.absolute_url(), 'http://nohost/folder1/file')
+        request['PARENTS'] = [self.app.folder1]
+        request.setVirtualRoot('/')
+        self.assertEqual(file.absolute_url(), 'http://nohost/file')
+        request.setServerURL('https', 'example.com')
+        self.assertEqual(file.absolute_url(), 'https://example.com/file')
+
+    def test_no_request(self):
+        from zope.globalrequest import clearRequest
+        clearRequest()
+        self.folder1.unrestrictedTraverse('file')
+        self.folder1.unrestrictedTraverse('file')
+        self.assertEqual(self._getStatistics()['misses'], 0)
+
+
 class SimpleClass(object):
     """Class with no __bobo_traverse__."""
 
@@ -672,6 +791,7 @@ def test_view_doesnt_shadow_attribute():
 def test_suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(TestTraverse))
+    suite.addTest(unittest.makeSuite(TestTraverseWithCache))
     from Testing.ZopeTestCase import FunctionalDocTestSuite
     suite.addTest(FunctionalDocTestSuite())
     return suite
@@ -18,6 +18,8 @@ import unittest
 
 from six import StringIO
 
+from OFS.SimpleItem import SimpleItem
+
 
 class TestMaybeWarnDeprecated(unittest.TestCase):
 
@@ -89,3 +91,145 @@ class TestMaybeWarnDeprecated(unittest.TestCase):
                 pass
         self.deprecatedManageAddDeleteClasses[:] = []
         self.assertLog(Deprecated, '')
+
+
+class HookItem(SimpleItem):
+    # Item with manage_afterAdd & co for the tests of
+    # dispatchMoveToSublocations.
+
+    calls = []
+
+    def manage_afterAdd(self, item, container):
+        self.calls.append(('manage_afterAdd', self.getId()))
+
+    def manage_beforeDelete(self, item, container):
+        self.calls.append(('manage_beforeDelete', self.getId()))
+
+
+class TestDispatchMoveToSublocations(unittest.TestCase):
+
+    def setUp(self):
+        from zope.component.testing import setUp
+        from zope.component import provideAdapter
+        from OFS.subscribers import ObjectManagerSublocations
+        setUp()
+        provideAdapter(ObjectManagerSublocations)
+        import ZODB.tests.util
+        self.db = ZODB.tests.util.DB(cache_size=2)
+
+    def tearDown(self):
+        from zope.component.testing import tearDown
+        import transaction
+        transaction.abort()
+        self.db.close()
+        tearDown()
+
+    def _makeFolder(self, size, hooks=0):
+        import transaction
+        from OFS.Folder import Folder
+        conn = self.db.open()
+        folder = Folder('folder')
+        conn.root()['folder'] = folder
+        for i in range(size):
+            item = SimpleItem()
+            item.id = 'item%d' % i
+            folder._setObject(item.id, item, set_owner=False)
+        if hooks:
+            folder._setObject('sub', Folder('sub'), set_owner=False)
+            for i in range(hooks):
+                item = HookItem()
+                item.id = 'hook%d' % i
+                folder.sub._setObject(item.id, item, set_owner=False)
+        transaction.commit()
+        # Load the folder again, with ghosts for the items.
+        conn.cacheMinimize()
+        return conn.root()['folder']
+
+    def _record(self):
+        from zope.component import provideHandler
+        from zope.lifecycleevent.interfaces import IObjectMovedEvent
+        from OFS.interfaces import IItem
+        seen = []
+
+        def handler(ob, event):
+            seen.append((ob.getId(), event))
+
+        provideHandler(handler, (IItem, IObjectMovedEvent))
+        return seen
+
+    def _dispatch(self, folder, event=None, batch_size=2):
+        from zope.lifecycleevent import ObjectMovedEvent
+        from OFS import subscribers
+        if event is None:
+            event = ObjectMovedEvent(folder, None, 'folder', None, 'moved')
+            event.oldParent = event.newParent = object()
+        old_size = subscribers.sublocation_batch_size
+        subscribers.sublocation_batch_size = batch_size
+        try:
+            subscribers.dispatchMoveToSublocations(folder, event)
+        finally:
+            subscribers.sublocation_batch_size = old_size
+        return event
+
+    def _loaded(self, folder):
+        return [ob.getId() for ob in folder.objectValues()
+                if ob._p_changed is not None]
+
+    def test_skipped_without_subscribers(self):
+        folder = self._makeFolder(3)
+        self._dispatch(folder)
+        self.assertEqual(self._loaded(folder), [])
+
+    def test_skipped_with_marked_subscribers(self):
+        from zope.component import provideHandler
+        from OFS.findindex import updateFindIndex
+        from OFS.subscribers import dispatchObjectMovedEvent
+        from OFS.subscribers import dispatchObjectWillBeMovedEvent
+        provideHandler(dispatchObjectMovedEvent)
+        provideHandler(dispatchObjectWillBeMovedEvent)
+        provideHandler(updateFindIndex)
+        folder = self._makeFolder(3)
+        self._dispatch(folder)
+        self.assertEqual(self._loaded(folder), [])
+
+    def test_hooks_called_without_subscribers(self):
+        from OFS.event import ObjectWillBeMovedEvent
+        folder = self._makeFolder(3, hooks=2)
+        del HookItem.calls[:]
+        event = ObjectWillBeMovedEvent(folder, object(), 'folder',
+                                       object(), 'moved')
+        self._dispatch(folder, event)
+        self._dispatch(folder)
+        self.assertEqual(HookItem.calls,
+                         [('manage_beforeDelete', 'hook0'),
+                          ('manage_beforeDelete', 'hook1'),
+                          ('manage_afterAdd', 'hook0'),
+                          ('manage_afterAdd', 'hook1')])
+        # The items without such methods were not loaded, the folder
+        # containing the others was.
+        self.assertEqual(self._loaded(folder), ['sub'])
+
+    def test_dispatched_and_ghosted(self):
+        seen = self._record()
+        folder = self._makeFolder(6)
+        event = self._dispatch(folder)
+        self.assertEqual([id for id, e in seen],
+                         ['item%d' % i for i in range(6)])
+        self.assertTrue(all(e is event for id, e in seen))
+        # The items are turned into ghosts after each batch of two, as
+        # far as the cache size of two objects requires.
+        self.assertTrue(len(self._loaded(folder)) <= 2)
+
+    def test_changed_not_ghosted(self):
+        from zope.component import provideHandler
+        from zope.lifecycleevent.interfaces import IObjectMovedEvent
+        from OFS.interfaces import IItem
+        folder = self._makeFolder(3)
+
+        def change(ob, event):
+            ob.title = 'moved'
+
+        provideHandler(change, (IItem, IObjectMovedEvent))
+        self._dispatch(folder)
+        self.assertEqual(folder.item0._p_changed, True)
+        self.assertEqual(folder.item0.title, 'moved')
@@ -21,6 +21,7 @@ from zope.pagetemplate.engine import TrustedAppPT
 
 from Acquisition import aq_get
 from AccessControl import getSecurityManager
+from App import filewatch
 from Products.PageTemplates.Expressions import SecureModuleImporter
 from Products.PageTemplates.Expressions import createTrustedZopeEngine
 
@@ -39,6 +40,7 @@ class ViewPageTemplateFile(TrustedAppPT, PageTemplateFile):
         super(ViewPageTemplateFile, self).__init__(filename, _prefix)
         if content_type is not None:
             self.content_type = content_type
+        filewatch.watch(self.filename, self)
 
     def getId(self):
         return basename(self.filename)
@@ -67,6 +69,16 @@ class ViewPageTemplateFile(TrustedAppPT, PageTemplateFile):
     def pt_getEngine(self):
         return getEngine()
 
+    def _cook_check(self):
+        if self._v_last_read and filewatch.isWatching():
+            return
+        super(ViewPageTemplateFile, self)._cook_check()
+
+    def _fileChanged(self):
+        # Called by App.filewatch, the file is read again when the
+        # template is used next.
+        self._v_last_read = 0
+
     def pt_getContext(self, instance, request, **kw):
         namespace = super(ViewPageTemplateFile, self).pt_getContext(**kw)
         namespace['request'] = request
@@ -18,7 +18,9 @@ import OFS.DTMLDocument
 import OFS.Folder
 import OFS.Image
 import OFS.OrderedFolder
+import OFS.BTreeFolder
 import OFS.PropertySheets
+import OFS.RAMCacheManager
 import OFS.userfolder
 
 
@@ -72,6 +74,21 @@ def initialize(context):
         legacy=(OFS.OrderedFolder.manage_addOrderedFolder,),
     )
 
+    context.registerClass(
+        OFS.BTreeFolder.BTreeFolder,
+        permission=add_folders,
+        constructors=(OFS.BTreeFolder.manage_addBTreeFolderForm,
+                      OFS.BTreeFolder.manage_addBTreeFolder),
+        legacy=(OFS.BTreeFolder.manage_addBTreeFolder,),
+    )
+
+    context.registerClass(
+        OFS.RAMCacheManager.RAMCacheManager,
+        constructors=(OFS.RAMCacheManager.manage_addRAMCacheManagerForm,
+                      OFS.RAMCacheManager.manage_addRAMCacheManager),
+        legacy=(OFS.RAMCacheManager.manage_addRAMCacheManager,),
+    )
+
     context.registerClass(
         OFS.userfolder.UserFolder,
         constructors=(OFS.userfolder.manage_addUserFolder,),
@@ -18,6 +18,7 @@ from AccessControl.class_init import InitializeClass
 from AccessControl.SecurityInfo import ClassSecurityInfo
 from AccessControl.SecurityManagement import getSecurityManager
 from Acquisition import aq_parent, aq_inner, aq_get
+from App import filewatch
 from App.Common import package_home
 from App.config import getConfiguration
 from ComputedAttribute import ComputedAttribute
@@ -94,6 +95,7 @@ class PageTemplateFile(SimpleItem, Script, PageTemplate, Traversable):
             filename = filename + '.zpt'
 
         self.filename = filename
+        filewatch.watch(filename, self)
 
     def pt_getContext(self):
         root = None
@@ -147,7 +149,8 @@ class PageTemplateFile(SimpleItem, Script, PageTemplate, Traversable):
         return self.__name__  # Don't reveal filesystem paths
 
     def _cook_check(self):
-        if self._v_last_read and not getConfiguration().debug_mode:
+        if self._v_last_read and (filewatch.isWatching() or
+                                  not getConfiguration().debug_mode):
             return
         __traceback_info__ = self.filename
         try:
@@ -165,6 +168,11 @@ class PageTemplateFile(SimpleItem, Script, PageTemplate, Traversable):
             return
         self._v_last_read = mtime
 
+    def _fileChanged(self):
+        # Called by App.filewatch, the file is read again when the
+        # template is used next.
+        self._v_last_read = 0
+
     def _prepare_html(self, text):
         match = meta_pattern.search(text)
         if match is not None:
@@ -24,12 +24,14 @@ from AccessControl.Permissions import view_management_screens
 from AccessControl.SecurityManagement import getSecurityManager
 from AccessControl.SecurityInfo import ClassSecurityInfo
 from Acquisition import Acquired
+from Acquisition import aq_base
 from Acquisition import aq_get
 from Acquisition import Explicit
 from zExceptions import ResourceLockedError
 
 from App.Common import package_home
 from OFS.Cache import Cacheable
+from OFS.Cache import ChangeCacheSettingsPermission
 from OFS.SimpleItem import SimpleItem
 from OFS.PropertyManager import PropertyManager
 from OFS.Traversable import Traversable
@@ -76,6 +78,8 @@ class ZopePageTemplate(Script, PageTemplate, Cacheable,
 
     meta_type = 'Page Template'
     output_encoding = 'utf-8'  # provide default for old instances
+    # The CachePolicy choosing the cache keys, see setCachePolicy.
+    cache_policy = None
 
     __code__ = FuncCode((), 0)
     __defaults__ = None
@@ -257,6 +261,8 @@ class ZopePageTemplate(Script, PageTemplate, Cacheable,
         # Retrieve the value from the cache.
         keyset = None
         if self.ZCacheable_isCachingEnabled():
+            if self.cache_policy is not None:
+                return self._execWithPolicy(bound_names, request, security)
             # Prepare a cache key.
             keyset = {'here': self._getContext(),
                       'bound_names': bound_names}
@@ -277,6 +283,51 @@ class ZopePageTemplate(Script, PageTemplate, Cacheable,
         finally:
             security.removeContext(self)
 
+    def _execWithPolicy(self, bound_names, request, security):
+        # The rendered page is cached encoded with the charset of the
+        # response. When the template is published, the encoded page is
+        # returned, so the response does not need to encode it again.
+        charset = 'utf-8'
+        encode = None
+        published = False
+        if request is not None:
+            response = request.response
+            charset = getattr(response, 'charset', None) or charset
+            encode = getattr(response, '_encode_unicode', None)
+            published = aq_base(request.get('PUBLISHED')) is aq_base(self)
+        keywords = self.cache_policy.getKeywords(
+            self._getContext(), request, bound_names['options'])
+        keywords['charset'] = charset
+
+        data = self.ZCacheable_get(keywords=keywords)
+        if data is None:
+            security.addContext(self)
+            try:
+                result = self.pt_render(extra_context=bound_names)
+            finally:
+                security.removeContext(self)
+            if isinstance(result, binary_type):
+                data = result
+            elif encode is not None:
+                data = encode(result)
+            else:
+                data = result.encode(charset, 'replace')
+            self.ZCacheable_set(data, keywords=keywords)
+            if not published:
+                return result
+        if published:
+            return data
+        return data.decode(charset)
+
+    security.declareProtected(ChangeCacheSettingsPermission,
+                              'setCachePolicy')
+    def setCachePolicy(self, policy):
+        """Set the CachePolicy choosing what distinguishes the cached
+        renderings, or None to distinguish them by all bound names.
+        """
+        self.cache_policy = policy
+        self.ZCacheable_invalidate()
+
     if bbb.HAS_ZSERVER:
         security.declareProtected(change_page_templates, 'PUT')
         def PUT(self, REQUEST, RESPONSE):
@@ -0,0 +1,70 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Cache policies of Page Templates.
+
+Without a policy, a ZopePageTemplate associated with a cache manager
+keys its cache entries on all its bound names, including the options it
+is called with and the user, so entries are rarely shared. A policy
+names what the rendered page actually depends on instead.
+"""
+
+from AccessControl.SecurityManagement import getSecurityManager
+
+
+class CachePolicy(object):
+    """Choose what distinguishes the cached renderings of a template.
+
+    request_vars -- names of the request variables the page depends on
+
+    roles -- whether the page depends on the roles of the user in the
+             context. This is on by default, so pages showing content
+             only some users may see are not shared with other users.
+
+    context -- whether the page depends on its context. Its URL is used,
+               so pages rendered for different virtual hosts are kept
+               apart.
+
+    options -- whether the page depends on the keyword arguments the
+               template is called with
+    """
+
+    def __init__(self, request_vars=(), roles=True, context=True,
+                 options=False):
+        self.request_vars = tuple(request_vars)
+        self.roles = roles
+        self.context = context
+        self.options = options
+
+    def __repr__(self):
+        return '<%s request_vars=%r roles=%r context=%r options=%r>' % (
+            self.__class__.__name__, self.request_vars, self.roles,
+            self.context, self.options)
+
+    def getKeywords(self, context, request, options):
+        """Return the mapping of cache keywords for a rendering."""
+        keywords = {}
+        if self.context and context is not None:
+            if request is not None and hasattr(context, 'absolute_url'):
+                keywords['context'] = context.absolute_url()
+            elif hasattr(context, 'getPhysicalPath'):
+                keywords['context'] = '/'.join(context.getPhysicalPath())
+        if self.roles:
+            user = getSecurityManager().getUser()
+            keywords['roles'] = ','.join(
+                sorted(user.getRolesInContext(context)))
+        if self.options and options:
+            keywords['options'] = repr(sorted(options.items()))
+        if request is not None:
+            for name in self.request_vars:
+                keywords['request:' + name] = request.get(name, '')
+        return keywords
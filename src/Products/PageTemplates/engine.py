@@ -1,5 +1,6 @@
-import re
 import logging
+import os
+import re
 
 from zope.interface import implementer
 from zope.interface import provider
@@ -14,7 +15,9 @@ from AccessControl.SecurityInfo import ClassSecurityInfo
 from Products.PageTemplates.Expressions import getEngine
 from Products.PageTemplates import ZRPythonExpr
 
+from chameleon.loader import ModuleLoader
 from chameleon.tales import StringExpr
+from chameleon.template import pkg_digest
 from chameleon.tales import NotExpr
 from chameleon.tal import RepeatDict
 
@@ -34,8 +37,53 @@ RepeatDict.__allow_access_to_unprotected_subobjects__ = True
 InitializeClass(RepeatDict)
 
 re_match_pi = re.compile(r'<\?python([^\w].*?)\?>', re.DOTALL)
+re_unsafe_name = re.compile(r'[^A-Za-z0-9_]')
 logger = logging.getLogger('Products.PageTemplates')
 
+# Compiled templates are written to this directory, if it is set, and
+# loaded from it by all processes using the same directory.
+cache_directory = None
+_loaders = {}
+
+
+def setCacheDirectory(path):
+    """Set the directory of compiled templates, None disables it."""
+    global cache_directory
+    cache_directory = path
+
+
+def getLoader():
+    """Return the loader of the compiled template cache or None."""
+    if cache_directory is None:
+        return None
+    loader = _loaders.get(cache_directory)
+    if loader is None:
+        # The loader writes a module to a temporary file before it
+        # renames it, so processes sharing the directory never load
+        # partly written modules.
+        loader = _loaders[cache_directory] = ModuleLoader(cache_directory)
+    return loader
+
+
+class CachingPageTemplate(ChameleonPageTemplate):
+    """A template whose compiled module is named after everything the
+    code depends on, so it can be shared by all templates with the same
+    source, file name and expression types.
+    """
+
+    def digest(self, body, names):
+        sha = pkg_digest.copy()
+        sha.update(body.encode('utf-8', 'ignore'))
+        values = [type(self).__name__, self.filename]
+        values.extend(names)
+        for name, factory in sorted(self.expression_types.items()):
+            values.append('%s=%s.%s' % (
+                name, factory.__module__, factory.__name__))
+        for value in values:
+            sha.update(value.encode('utf-8', 'ignore') + b'\0')
+        name = os.path.splitext(os.path.basename(self.filename))[0]
+        return '%s-%s' % (re_unsafe_name.sub('_', name), sha.hexdigest())
+
 
 @implementer(IPageTemplateProgram)
 @provider(IPageTemplateEngine)
@@ -117,10 +165,15 @@ class Program(object):
             # Default to '<string>'
             source_file = ChameleonPageTemplate.filename
 
-        template = ChameleonPageTemplate(
+        config = {}
+        loader = getLoader()
+        if loader is not None:
+            config['loader'] = loader
+
+        template = CachingPageTemplate(
             text, filename=source_file, keep_body=True,
             expression_types=expression_types,
-            encoding='utf-8', extra_builtins=cls.extra_builtins,
+            encoding='utf-8', extra_builtins=cls.extra_builtins, **config
         )
 
         return cls(template), template.macros
@@ -0,0 +1,120 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Time a cached listing Page Template.
+
+Usage: python -m Products.PageTemplates.tests.bench_cache [requests]
+
+A template lists a batch of 20 of the 500 items of a folder, chosen by
+the b_start request variable. The requests, 2000 by default, ask for one
+of 10 batches, the first ones most often, as one of 20 users with the
+same roles. The template is published and its result set as the body of
+the response. The requests are made without a cache, with the cache
+keyed on all bound names and b_start, as without a cache policy, and
+with a CachePolicy keyed on the roles of the user and b_start. The hit
+rate and the mean time of a request are printed for each.
+"""
+
+import random
+import sys
+import time
+
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import noSecurityManager
+from ZPublisher.HTTPResponse import HTTPResponse
+
+LISTING = u'''<html><body><table>
+<tr tal:define="start python: int(request.get('b_start', 0))"
+    tal:repeat="item python: context.objectValues()[start:start + 20]">
+  <td tal:content="item/getId">id</td>
+  <td tal:content="item/title_or_id">title</td>
+</tr>
+</table></body></html>'''
+
+
+def make_site():
+    from OFS.Application import Application
+    from OFS.Folder import Folder
+    from OFS.RAMCacheManager import manage_addRAMCacheManager
+    from Products.PageTemplates.ZopePageTemplate import ZopePageTemplate
+    from Testing.makerequest import makerequest
+
+    root = Application()
+    manage_addRAMCacheManager(root, 'cache')
+    folder = Folder('folder')
+    for i in range(500):
+        item = Folder('item%03d' % i)
+        item.title = u'Item \xe4 %d' % i
+        folder._setObject(item.getId(), item)
+    root._setObject('folder', folder)
+    root._setObject('listing', ZopePageTemplate('listing', LISTING))
+    return makerequest(root)
+
+
+def make_requests(count):
+    from AccessControl.users import SimpleUser
+    users = [SimpleUser('user%02d' % i, '', ['Manager'], [])
+             for i in range(20)]
+    # Batch i is asked for about 1 / (i + 1) as often as the first one.
+    batches = [i for i in range(10) for j in range(60 // (i + 1))]
+    rng = random.Random(42)
+    return [(str(20 * rng.choice(batches)), rng.choice(users))
+            for i in range(count)]
+
+
+def run(label, site, requests, policy=None, cached=True):
+    template = site.listing
+    if cached:
+        template.ZCacheable_setManagerId('cache')
+    else:
+        template.ZCacheable_setManagerId(None)
+    template.setCachePolicy(policy)
+    # Without a policy, the request variables are taken from the manager.
+    site.cache.manage_editProps('', 10 << 20, 3600,
+                                () if policy else ('b_start',))
+    listing = site.folder.listing
+    request = site.REQUEST
+    request['PUBLISHED'] = listing
+    cache = site.cache.ZCacheManager_getCache()
+    cache.hits = cache.misses = 0
+
+    begin = time.time()
+    for start, user in requests:
+        newSecurityManager(None, user)
+        request.form['b_start'] = start
+        request.other.pop('b_start', None)
+        response = request.response = HTTPResponse()
+        response.setBody(listing())
+    elapsed = time.time() - begin
+    noSecurityManager()
+
+    stats = site.cache.ZCacheManager_getStatistics()
+    lookups = stats['hits'] + stats['misses']
+    rate = 100.0 * stats['hits'] / lookups if lookups else 0.0
+    print('%-12s hit rate %5.1f %%  %8.3f ms per request' % (
+        label, rate, elapsed / len(requests) * 1000))
+
+
+def main(args=None):
+    from Products.PageTemplates.cachepolicy import CachePolicy
+
+    if args is None:
+        args = sys.argv[1:]
+    requests = make_requests(int(args[0]) if args else 2000)
+    site = make_site()
+    run('uncached', site, requests, cached=False)
+    run('bound names', site, requests)
+    run('policy', site, requests, CachePolicy(request_vars=('b_start',)))
+
+
+if __name__ == '__main__':
+    main()
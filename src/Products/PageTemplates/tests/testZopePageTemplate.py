@@ -457,6 +457,98 @@ class ZPTMacros(zope.component.testing.PlacelessSetup, unittest.TestCase):
         self.assertEqual(pt.pt_errors(), None)
 
 
+class ZPTCachePolicyTests(zope.component.testing.PlacelessSetup,
+                          unittest.TestCase):
+
+    def setUp(self):
+        super(ZPTCachePolicyTests, self).setUp()
+        zope.component.provideAdapter(DefaultTraversable, (None,))
+
+        transaction.begin()
+        self.app = makerequest(Zope2.app())
+        from OFS.RAMCacheManager import manage_addRAMCacheManager
+        manage_addRAMCacheManager(self.app, 'cache')
+        f = self.app.manage_addProduct['PageTemplates'].manage_addPageTemplate
+        f('pt', text=u'<p tal:content="python: request.get(\'b_start\', 0)" '
+                     u'tal:attributes="title options/title | nothing" />'
+                     u'<p>\xe4</p>')
+        self.pt = self.app.pt
+        self.pt.ZCacheable_setManagerId('cache')
+        self.stats = self.app.cache.ZCacheManager_getStatistics
+
+    def tearDown(self):
+        super(ZPTCachePolicyTests, self).tearDown()
+        transaction.abort()
+        self.app._p_jar.close()
+
+    def _setPolicy(self, **kw):
+        from Products.PageTemplates.cachepolicy import CachePolicy
+        self.pt.setCachePolicy(CachePolicy(**kw))
+
+    def test_no_policy_keys_on_bound_names(self):
+        self.pt()
+        self.pt(title='x')
+        self.assertEqual(self.stats()['entries'], 2)
+
+    def test_request_vars(self):
+        self._setPolicy(request_vars=('b_start',))
+        request = self.app.REQUEST
+        self.assertEqual(self.pt(), u'<p>0</p><p>\xe4</p>')
+        self.assertEqual(self.pt(), u'<p>0</p><p>\xe4</p>')
+        request.form['b_start'] = '20'
+        self.assertEqual(self.pt(), u'<p>20</p><p>\xe4</p>')
+        stats = self.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+
+    def test_options_ignored_by_default(self):
+        self._setPolicy()
+        self.pt()
+        self.assertEqual(self.pt(title='x'), u'<p>0</p><p>\xe4</p>')
+        self._setPolicy(options=True)
+        self.assertEqual(self.pt(title='x'),
+                         u'<p title="x">0</p><p>\xe4</p>')
+
+    def test_roles(self):
+        from AccessControl.SecurityManagement import newSecurityManager
+        from AccessControl.SecurityManagement import noSecurityManager
+        from AccessControl.users import SimpleUser
+        self._setPolicy()
+        self.pt()
+        user = SimpleUser('manager', '', ['Manager'], [])
+        newSecurityManager(None, user.__of__(self.app.acl_users))
+        try:
+            self.pt()
+        finally:
+            noSecurityManager()
+        self.assertEqual(self.stats()['entries'], 2)
+
+    def test_context(self):
+        self._setPolicy()
+        self.app.manage_addFolder('folder')
+        self.pt()
+        self.pt.__of__(self.app.folder)()
+        self.assertEqual(self.stats()['entries'], 2)
+
+    def test_published_returns_encoded(self):
+        self._setPolicy()
+        request = self.app.REQUEST
+        request['PUBLISHED'] = self.pt
+        self.assertEqual(self.pt(), u'<p>0</p><p>\xe4</p>'.encode('utf-8'))
+        self.assertEqual(self.pt(), u'<p>0</p><p>\xe4</p>'.encode('utf-8'))
+        self.assertEqual(self.stats()['hits'], 1)
+        request.response.setBody(self.pt())
+        self.assertEqual(request.response.getHeader('content-type'),
+                         'text/html; charset=utf-8')
+
+    def test_setCachePolicy_invalidates(self):
+        self._setPolicy()
+        self.pt()
+        self.assertEqual(self.stats()['entries'], 1)
+        self.pt.setCachePolicy(None)
+        self.assertEqual(self.stats()['entries'], 0)
+
+
 class SrcTests(unittest.TestCase):
 
     def _getTargetClass(self):
@@ -521,6 +613,7 @@ def test_suite():
         unittest.makeSuite(ZPTRegressions),
         unittest.makeSuite(ZPTUtilsTests),
         unittest.makeSuite(ZPTMacros),
+        unittest.makeSuite(ZPTCachePolicyTests),
         unittest.makeSuite(ZopePageTemplateFileTests),
         unittest.makeSuite(ZPTUnicodeEncodingConflictResolution),
         unittest.makeSuite(PreferredCharsetUnicodeResolverTests),
@@ -86,7 +86,78 @@ class TestPatches(Sandboxed, ZopeTestCase):
         self.assertIn('world', template())
 
 
+class TestCompiledTemplateCache(unittest.TestCase):
+
+    text = u'<p tal:content="python: 1 + 1">x</p>'
+
+    def setUp(self):
+        import tempfile
+        from Products.PageTemplates import engine
+        self.directory = tempfile.mkdtemp()
+        engine.setCacheDirectory(self.directory)
+
+    def tearDown(self):
+        import shutil
+        from Products.PageTemplates import engine
+        engine.setCacheDirectory(None)
+        shutil.rmtree(self.directory)
+
+    def _cook(self, trusted=False, source_file='test.pt'):
+        from Products.PageTemplates.engine import Program
+        from Products.PageTemplates.Expressions import createTrustedZopeEngine
+        from Products.PageTemplates.Expressions import getEngine
+        engine = createTrustedZopeEngine() if trusted else getEngine()
+        return Program.cook(source_file, self.text, engine, 'text/html')
+
+    def _modules(self):
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.endswith('.py'))
+
+    def test_module_written(self):
+        program, macros = self._cook()
+        modules = self._modules()
+        self.assertEqual(len(modules), 1)
+        self.assertTrue(modules[0].startswith('test-'))
+        self.assertEqual(program.template.loader.path, self.directory)
+
+    def test_key_includes_expression_types(self):
+        # Untrusted templates must not use code compiled for trusted ones.
+        self._cook()
+        self._cook(trusted=True)
+        self.assertEqual(len(self._modules()), 2)
+
+    def test_key_includes_source_file(self):
+        self._cook()
+        self._cook(source_file='other.pt')
+        self.assertEqual(len(self._modules()), 2)
+
+    def test_loaded_from_cache(self):
+        import sys
+        from Products.PageTemplates.engine import CachingPageTemplate
+        self._cook()
+        # Pretend to be another process, which only finds the file.
+        del sys.modules[self._modules()[0][:-3]]
+
+        def _compile(self, body, builtins):
+            raise AssertionError('compiled again')
+
+        CachingPageTemplate._compile = _compile
+        try:
+            program, macros = self._cook()
+        finally:
+            del CachingPageTemplate._compile
+        self.assertEqual(len(self._modules()), 1)
+
+    def test_no_directory(self):
+        from Products.PageTemplates import engine
+        engine.setCacheDirectory(None)
+        self.assertEqual(engine.getLoader(), None)
+        self._cook()
+        self.assertEqual(self._modules(), [])
+
+
 def test_suite():
     return unittest.TestSuite((
         unittest.makeSuite(TestPatches),
+        unittest.makeSuite(TestCompiledTemplateCache),
     ))
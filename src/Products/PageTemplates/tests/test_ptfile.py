@@ -210,3 +210,36 @@ class LazyLoadingTestCase(unittest.TestCase):
         f.close()
         pt = PageTemplateFile(self.TEMPFILENAME)
         self.assertTrue(not pt._text and not pt._v_program)
+
+
+class FileWatchTestCase(unittest.TestCase):
+
+    TEMPFILENAME = tempfile.mktemp(".zpt")
+
+    def setUp(self):
+        from App import filewatch
+        self._write(b'one')
+        self._watcher = filewatch._watcher
+        filewatch._watcher = filewatch.PollingWatcher()
+
+    def tearDown(self):
+        from App import filewatch
+        filewatch._watcher = self._watcher
+        if os.path.exists(self.TEMPFILENAME):
+            os.unlink(self.TEMPFILENAME)
+
+    def _write(self, text):
+        with open(self.TEMPFILENAME, 'wb') as f:
+            f.write(text)
+
+    def test_reload_when_changed(self):
+        from App import filewatch
+        pt = PageTemplateFile(self.TEMPFILENAME)
+        pt._cook_check()
+        self.assertEqual(pt._text, 'one')
+        self._write(b'two')
+        pt._cook_check()
+        self.assertEqual(pt._text, 'one')
+        filewatch.fileChanged(os.path.abspath(self.TEMPFILENAME))
+        pt._cook_check()
+        self.assertEqual(pt._text, 'two')
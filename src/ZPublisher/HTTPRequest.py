@@ -15,9 +15,13 @@
 """
 
 from cgi import FieldStorage
+from cgi import parse_header
+from cgi import valid_boundary
 import codecs
 import collections
 from copy import deepcopy
+from email.message import Message
+from io import BytesIO
 import os
 from os import unlink
 from os.path import isfile
@@ -36,7 +40,9 @@ from six import PY2
 from six import PY3
 from six import string_types
 from six import text_type
+from six.moves.urllib.parse import parse_qsl
 from six.moves.urllib.parse import unquote
+from zExceptions import BadRequest
 from zope.i18n.interfaces import IUserPreferredLanguages
 from zope.i18n.locales import locales, LoadLocaleError
 from zope.interface import directlyProvidedBy
@@ -104,6 +110,51 @@ isCGI_NAME = isCGI_NAMEs.__contains__
 
 hide_key = {'HTTP_AUTHORIZATION': 1, 'HTTP_CGI_AUTHORIZATION': 1}
 
+URLmatch = re.compile('URL(PATH)?([0-9]+)$').match
+BASEmatch = re.compile('BASE(PATH)?([0-9]+)$').match
+
+# The kinds of keys HTTPRequest.get distinguishes, see _keyKind.
+_PLAIN_KEY = 0
+_URL_KEY = 1
+_BASE_KEY = 2
+_CGI_KEY = 3
+_REQUEST_KEY = 4
+_BODY_KEY = 5
+
+# Maps keys to their kind, so get only matches a key against the URL and
+# BASE patterns once. It is emptied when it exceeds _key_kinds_limit.
+_key_kinds = {}
+_key_kinds_limit = 10000
+
+
+def _keyKind(key):
+    kind = _key_kinds.get(key)
+    if kind is not None:
+        return kind
+
+    # The checks are done in the order of HTTPRequest.get.
+    match = URLmatch(key) if key[:1] == 'U' else None
+    if match is not None:
+        pathonly, n = match.groups()
+        kind = (_URL_KEY, bool(pathonly), int(n))
+    elif key in isCGI_NAMEs or key[:5] == 'HTTP_':
+        kind = (_CGI_KEY, )
+    elif key == 'REQUEST':
+        kind = (_REQUEST_KEY, )
+    elif key[:1] == 'B' and BASEmatch(key) is not None:
+        pathonly, n = BASEmatch(key).groups()
+        kind = (_BASE_KEY, bool(pathonly), int(n))
+    elif key in ('BODY', 'BODYFILE'):
+        kind = (_BODY_KEY, )
+    else:
+        kind = (_PLAIN_KEY, )
+
+    if len(_key_kinds) >= _key_kinds_limit:
+        _key_kinds.clear()
+    _key_kinds[key] = kind
+    return kind
+
+
 default_port = {'http': '80', 'https': '443'}
 
 tainting_env = str(os.environ.get('ZOPE_DTML_REQUEST_AUTOQUOTE', '')).lower()
@@ -124,6 +175,19 @@ _marker = []
 
 trusted_proxies = []
 
+# Limits for spooling multipart/form-data request bodies, set from the
+# form-memory-limit and form-disk-limit configuration settings. Field data
+# is held in memory until form_memory_limit bytes of a request are
+# buffered, the rest goes to temporary files. A request spooling more than
+# form_disk_limit bytes to disk is refused; None means no limit.
+form_memory_limit = 1 << 20
+form_disk_limit = None
+
+# If lazy_form_processing is set, processInputs only parses the request
+# body. The fields are marshalled into form and taintedform when they are
+# first looked up, see HTTPRequest._deferFields.
+lazy_form_processing = False
+
 
 class NestedLoopExit(Exception):
     pass
@@ -186,6 +250,11 @@ class HTTPRequest(BaseRequest):
     args = ()
     _file = None
     _urls = ()
+    _url_prefixes = None
+    _virtual_urls = None
+    _pending_fields = None
+    _cookies = None
+    _taintedcookies = None
 
     charset = default_encoding
     retry_max_count = 0
@@ -209,7 +278,8 @@ class HTTPRequest(BaseRequest):
         # removing tempfiles.
         self.stdin = None
         self._file = None
-        self.form.clear()
+        self._pending_fields = None
+        self._form.clear()
         # we want to clear the lazy dict here because BaseRequests don't have
         # one.  Without this, there's the possibility of memory leaking
         # after every request.
@@ -274,6 +344,11 @@ class HTTPRequest(BaseRequest):
 
     def physicalPathToURL(self, path, relative=0):
         """ Convert a physical path into a URL in the current context """
+        if isinstance(path, tuple):
+            url = self._virtualURLPath(path)[0]
+            if relative:
+                return url
+            return self.other['SERVER_URL'] + url
         path = self._script + list(
             map(quote, self.physicalPathToVirtualPath(path)))
         if relative:
@@ -282,6 +357,30 @@ class HTTPRequest(BaseRequest):
             path.insert(0, self['SERVER_URL'])
         return '/'.join(path)
 
+    def _virtualURLPath(self, path):
+        # Return the path of the URL of a physical path and whether the
+        # URL of a subpath can be made by adding the last name to it. The
+        # results are remembered until the virtual hosting changes, so
+        # items of the same container reuse the URL of the container.
+        memo = self._virtual_urls
+        if memo is None:
+            memo = self._virtual_urls = {}
+        entry = memo.get(path)
+        if entry is not None:
+            return entry
+        if len(path) > 1:
+            parent = self._virtualURLPath(path[:-1])
+            if parent[1]:
+                entry = memo[path] = (parent[0] + '/' + quote(path[-1]), True)
+                return entry
+        vpath = self.physicalPathToVirtualPath(path)
+        url = '/'.join([''] + self._script + list(map(quote, vpath)))
+        # A subpath may match more of the virtual root path, if this path
+        # is a prefix of it.
+        rpp = self.other.get('VirtualRootPhysicalPath', ('',))
+        entry = memo[path] = (url, bool(vpath) or len(path) >= len(rpp))
+        return entry
+
     def physicalPathFromURL(self, URL):
         """ Convert a URL into a physical path in the current context.
             If the URL makes no sense in light of the current virtual
@@ -309,6 +408,27 @@ class HTTPRequest(BaseRequest):
         for x in self._urls:
             del self.other[x]
         self._urls = ()
+        self._url_prefixes = None
+        self._virtual_urls = None
+
+    def _urlPrefixes(self):
+        # Return the URLs and the paths of all prefixes of the path
+        # _script + _steps, shortest first. They are computed again when
+        # a traversal step was added or the server URL was changed.
+        steps = self._steps
+        server_url = self.other['SERVER_URL']
+        prefixes = self._url_prefixes
+        if (prefixes is None or prefixes[0] is not steps or
+                prefixes[1] != len(steps) or prefixes[2] != server_url):
+            paths = ['']
+            path = ''
+            for name in self._script + steps:
+                path = path + '/' + name
+                paths.append(path)
+            urls = [server_url + path for path in paths]
+            prefixes = self._url_prefixes = (
+                steps, len(steps), server_url, urls, paths)
+        return prefixes
 
     def getClientAddr(self):
         """ The IP address of the client.
@@ -451,41 +571,10 @@ class HTTPRequest(BaseRequest):
         other['URL'] = self.script = script
         other['method'] = environ.get('REQUEST_METHOD', 'GET').upper()
 
-        ################################################################
-        # Cookie values should *not* be appended to existing form
-        # vars with the same name - they are more like default values
-        # for names not otherwise specified in the form.
-        cookies = {}
-        taintedcookies = {}
-        k = get_env('HTTP_COOKIE', '')
-        if k:
-            parse_cookie(k, cookies)
-            for k, v in cookies.items():
-                istainted = 0
-                if '<' in k:
-                    k = TaintedString(k)
-                    istainted = 1
-                if '<' in v:
-                    v = TaintedString(v)
-                    istainted = 1
-                if istainted:
-                    taintedcookies[k] = v
-        self.cookies = cookies
-        self.taintedcookies = taintedcookies
+        # The cookies are parsed when they are first used, see
+        # _parseCookies.
 
-    def processInputs(
-            self,
-            # "static" variables that we want to be local for speed
-            SEQUENCE=1,
-            DEFAULT=2,
-            RECORD=4,
-            RECORDS=8,
-            REC=12,  # RECORD | RECORDS
-            EMPTY=16,
-            CONVERTED=32,
-            hasattr=hasattr,
-            getattr=getattr,
-            setattr=setattr):
+    def processInputs(self):
         """Process request inputs
 
         We need to delay input parsing so that it is done under
@@ -500,9 +589,7 @@ class HTTPRequest(BaseRequest):
         else:
             fp = None
 
-        form = self.form
         other = self.other
-        taintedform = self.taintedform
 
         # If 'QUERY_STRING' is not present in environ
         # FieldStorage will try to get it from sys.argv[1]
@@ -511,7 +598,13 @@ class HTTPRequest(BaseRequest):
             environ['QUERY_STRING'] = ''
 
         meth = None
-        fs = ZopeFieldStorage(fp=fp, environ=environ, keep_blank_values=1)
+        if fp is not None and is_multipart(environ):
+            fs = ZopeMultipartForm(fp, environ,
+                                   memory_limit=form_memory_limit,
+                                   disk_limit=form_disk_limit)
+        else:
+            fs = ZopeFieldStorage(fp=fp, environ=environ,
+                                  keep_blank_values=1)
 
         # Keep a reference to the FieldStorage. Otherwise it's
         # __del__ method is called too early and closing FieldStorage.file.
@@ -532,647 +625,787 @@ class HTTPRequest(BaseRequest):
             else:
                 self._file = fs.file
         else:
-            fslist = fs.list
-            tuple_items = {}
-            defaults = {}
-            tainteddefaults = {}
-            converter = None
+            if lazy_form_processing:
+                meth = self._deferFields(fs.list)
+            else:
+                meth = self._processFields(fs.list)
 
-            for item in fslist:
+        if meth:
+            if 'PATH_INFO' in environ:
+                path = environ['PATH_INFO']
+                while path[-1:] == '/':
+                    path = path[:-1]
+            else:
+                path = ''
+            other['PATH_INFO'] = path = "%s/%s" % (path, meth)
+            self._hacked_path = 1
 
-                isFileUpload = 0
-                key = item.name
-                if key is None:
-                    continue
+    def _processFields(
+            self,
+            fslist,
+            # "static" variables that we want to be local for speed
+            SEQUENCE=1,
+            DEFAULT=2,
+            RECORD=4,
+            RECORDS=8,
+            REC=12,  # RECORD | RECORDS
+            EMPTY=16,
+            CONVERTED=32,
+            hasattr=hasattr,
+            getattr=getattr,
+            setattr=setattr):
+        """Marshal the fields of a request into form and taintedform.
 
-                if (hasattr(item, 'file') and hasattr(item, 'filename') and
-                        hasattr(item, 'headers')):
-                    if (item.file and
-                        (item.filename is not None
-                         # RFC 1867 says that all fields get a content-type.
-                         # or 'content-type' in map(lower, item.headers.keys())
-                         )):
-                        item = FileUpload(item)
-                        isFileUpload = 1
-                    else:
-                        item = item.value
+        Returns the name of the method given with a :method or :action
+        field, if any.
+        """
+        form = self._form
+        taintedform = self._taintedform
+        meth = None
+        tuple_items = {}
+        defaults = {}
+        tainteddefaults = {}
+        converter = None
 
-                flags = 0
-                character_encoding = ''
-                # Variables for potentially unsafe values.
-                tainted = None
-                converter_type = None
+        for item in fslist:
 
-                # Loop through the different types and set
-                # the appropriate flags
+            key = item.name
+            if key is None:
+                continue
 
-                # We'll search from the back to the front.
-                # We'll do the search in two steps.  First, we'll
-                # do a string search, and then we'll check it with
-                # a re search.
+            item, isFileUpload = _field_value(item)
 
-                l = key.rfind(':')
-                if l >= 0:
+            flags = 0
+            character_encoding = ''
+            # Variables for potentially unsafe values.
+            tainted = None
+            converter_type = None
+
+            # Loop through the different types and set
+            # the appropriate flags
+
+            # We'll search from the back to the front.
+            # We'll do the search in two steps.  First, we'll
+            # do a string search, and then we'll check it with
+            # a re search.
+
+            l = key.rfind(':')
+            if l >= 0:
+                mo = search_type(key, l)
+                if mo:
+                    l = mo.start(0)
+                else:
+                    l = -1
+
+                while l >= 0:
+                    type_name = key[l + 1:]
+                    key = key[:l]
+                    c = get_converter(type_name, None)
+
+                    if c is not None:
+                        converter = c
+                        converter_type = type_name
+                        flags = flags | CONVERTED
+                    elif type_name == 'list':
+                        flags = flags | SEQUENCE
+                    elif type_name == 'tuple':
+                        tuple_items[key] = 1
+                        flags = flags | SEQUENCE
+                    elif (type_name == 'method' or type_name == 'action'):
+                        if l:
+                            meth = key
+                        else:
+                            meth = item
+                    elif (type_name == 'default_method' or
+                          type_name == 'default_action'):
+                        if not meth:
+                            if l:
+                                meth = key
+                            else:
+                                meth = item
+                    elif type_name == 'default':
+                        flags = flags | DEFAULT
+                    elif type_name == 'record':
+                        flags = flags | RECORD
+                    elif type_name == 'records':
+                        flags = flags | RECORDS
+                    elif type_name == 'ignore_empty':
+                        if not item:
+                            flags = flags | EMPTY
+                    elif has_codec(type_name):
+                        character_encoding = type_name
+
+                    l = key.rfind(':')
+                    if l < 0:
+                        break
                     mo = search_type(key, l)
                     if mo:
                         l = mo.start(0)
                     else:
                         l = -1
 
-                    while l >= 0:
-                        type_name = key[l + 1:]
-                        key = key[:l]
-                        c = get_converter(type_name, None)
-
-                        if c is not None:
-                            converter = c
-                            converter_type = type_name
-                            flags = flags | CONVERTED
-                        elif type_name == 'list':
-                            flags = flags | SEQUENCE
-                        elif type_name == 'tuple':
-                            tuple_items[key] = 1
-                            flags = flags | SEQUENCE
-                        elif (type_name == 'method' or type_name == 'action'):
-                            if l:
-                                meth = key
-                            else:
-                                meth = item
-                        elif (type_name == 'default_method' or
-                              type_name == 'default_action'):
-                            if not meth:
-                                if l:
-                                    meth = key
-                                else:
-                                    meth = item
-                        elif type_name == 'default':
-                            flags = flags | DEFAULT
-                        elif type_name == 'record':
-                            flags = flags | RECORD
-                        elif type_name == 'records':
-                            flags = flags | RECORDS
-                        elif type_name == 'ignore_empty':
-                            if not item:
-                                flags = flags | EMPTY
-                        elif has_codec(type_name):
-                            character_encoding = type_name
-
-                        l = key.rfind(':')
-                        if l < 0:
-                            break
-                        mo = search_type(key, l)
-                        if mo:
-                            l = mo.start(0)
-                        else:
-                            l = -1
+            # Filter out special names from form:
+            if key in isCGI_NAMEs or key.startswith('HTTP_'):
+                continue
+
+            # If the key is tainted, mark it so as well.
+            tainted_key = key
+            if '<' in key:
+                tainted_key = TaintedString(key)
+
+            if flags:
 
-                # Filter out special names from form:
-                if key in isCGI_NAMEs or key.startswith('HTTP_'):
+                # skip over empty fields
+                if flags & EMPTY:
                     continue
 
-                # If the key is tainted, mark it so as well.
-                tainted_key = key
-                if '<' in key:
-                    tainted_key = TaintedString(key)
+                # Split the key and its attribute
+                if flags & REC:
+                    key = key.split(".")
+                    key, attr = ".".join(key[:-1]), key[-1]
 
-                if flags:
-
-                    # skip over empty fields
-                    if flags & EMPTY:
-                        continue
-
-                    # Split the key and its attribute
-                    if flags & REC:
-                        key = key.split(".")
-                        key, attr = ".".join(key[:-1]), key[-1]
-
-                        # Update the tainted_key if necessary
-                        tainted_key = key
-                        if '<' in key:
-                            tainted_key = TaintedString(key)
-
-                        # Attributes cannot hold a <.
-                        if '<' in attr:
-                            raise ValueError(
-                                "%s is not a valid record attribute name" %
-                                escape(attr, True))
-
-                    # defer conversion
-                    if flags & CONVERTED:
-                        try:
-                            if character_encoding:
-                                # We have a string with a specified character
-                                # encoding.  This gets passed to the converter
-                                # either as unicode, if it can handle it, or
-                                # crunched back down to utf-8 if it can not.
-                                if isinstance(item, binary_type):
-                                    item = text_type(item, character_encoding)
-                                if hasattr(converter, 'convert_unicode'):
-                                    item = converter.convert_unicode(item)
-                                else:
-                                    item = converter(
-                                        item.encode(default_encoding))
+                    # Update the tainted_key if necessary
+                    tainted_key = key
+                    if '<' in key:
+                        tainted_key = TaintedString(key)
+
+                    # Attributes cannot hold a <.
+                    if '<' in attr:
+                        raise ValueError(
+                            "%s is not a valid record attribute name" %
+                            escape(attr, True))
+
+                # defer conversion
+                if flags & CONVERTED:
+                    try:
+                        if character_encoding:
+                            # We have a string with a specified character
+                            # encoding.  This gets passed to the converter
+                            # either as unicode, if it can handle it, or
+                            # crunched back down to utf-8 if it can not.
+                            if isinstance(item, binary_type):
+                                item = text_type(item, character_encoding)
+                            if hasattr(converter, 'convert_unicode'):
+                                item = converter.convert_unicode(item)
                             else:
-                                item = converter(item)
-
-                            # Flag potentially unsafe values
-                            if converter_type in ('string', 'required', 'text',
-                                                  'ustring', 'utext'):
-                                if not isFileUpload and '<' in item:
-                                    tainted = TaintedString(item)
-                            elif converter_type in ('tokens', 'lines',
-                                                    'utokens', 'ulines'):
-                                is_tainted = 0
-                                tainted = item[:]
-                                for i in range(len(tainted)):
-                                    if '<' in tainted[i]:
-                                        is_tainted = 1
-                                        tainted[i] = TaintedString(tainted[i])
-                                if not is_tainted:
-                                    tainted = None
-
-                        except Exception:
-                            if (not item and not (flags & DEFAULT) and
-                                    key in defaults):
-                                item = defaults[key]
+                                item = converter(
+                                    item.encode(default_encoding))
+                        else:
+                            item = converter(item)
+
+                        # Flag potentially unsafe values
+                        if converter_type in ('string', 'required', 'text',
+                                              'ustring', 'utext'):
+                            if not isFileUpload and '<' in item:
+                                tainted = TaintedString(item)
+                        elif converter_type in ('tokens', 'lines',
+                                                'utokens', 'ulines'):
+                            is_tainted = 0
+                            tainted = item[:]
+                            for i in range(len(tainted)):
+                                if '<' in tainted[i]:
+                                    is_tainted = 1
+                                    tainted[i] = TaintedString(tainted[i])
+                            if not is_tainted:
+                                tainted = None
+
+                    except Exception:
+                        if (not item and not (flags & DEFAULT) and
+                                key in defaults):
+                            item = defaults[key]
+                            if flags & RECORD:
+                                item = getattr(item, attr)
+                            if flags & RECORDS:
+                                item = getattr(item[-1], attr)
+                            if tainted_key in tainteddefaults:
+                                tainted = tainteddefaults[tainted_key]
                                 if flags & RECORD:
-                                    item = getattr(item, attr)
+                                    tainted = getattr(tainted, attr)
                                 if flags & RECORDS:
-                                    item = getattr(item[-1], attr)
-                                if tainted_key in tainteddefaults:
-                                    tainted = tainteddefaults[tainted_key]
-                                    if flags & RECORD:
-                                        tainted = getattr(tainted, attr)
-                                    if flags & RECORDS:
-                                        tainted = getattr(tainted[-1], attr)
-                            else:
-                                raise
+                                    tainted = getattr(tainted[-1], attr)
+                        else:
+                            raise
 
-                    elif not isFileUpload and '<' in item:
-                        # Flag potentially unsafe values
-                        tainted = TaintedString(item)
+                elif not isFileUpload and '<' in item:
+                    # Flag potentially unsafe values
+                    tainted = TaintedString(item)
 
-                    # If the key is tainted, we need to store stuff in the
-                    # tainted dict as well, even if the value is safe.
-                    if '<' in tainted_key and tainted is None:
-                        tainted = item
+                # If the key is tainted, we need to store stuff in the
+                # tainted dict as well, even if the value is safe.
+                if '<' in tainted_key and tainted is None:
+                    tainted = item
 
-                    # Determine which dictionary to use
-                    if flags & DEFAULT:
-                        mapping_object = defaults
-                        tainted_mapping = tainteddefaults
-                    else:
-                        mapping_object = form
-                        tainted_mapping = taintedform
-
-                    # Insert in dictionary
-                    if key in mapping_object:
-                        if flags & RECORDS:
-                            # Get the list and the last record
-                            # in the list. reclist is mutable.
-                            reclist = mapping_object[key]
-                            x = reclist[-1]
-
-                            if tainted:
-                                # Store a tainted copy as well
-                                if tainted_key not in tainted_mapping:
-                                    tainted_mapping[tainted_key] = deepcopy(
-                                        reclist)
-                                treclist = tainted_mapping[tainted_key]
-                                lastrecord = treclist[-1]
-
-                                if not hasattr(lastrecord, attr):
-                                    if flags & SEQUENCE:
-                                        tainted = [tainted]
-                                    setattr(lastrecord, attr, tainted)
-                                else:
-                                    if flags & SEQUENCE:
-                                        getattr(
-                                            lastrecord, attr).append(tainted)
-                                    else:
-                                        newrec = record()
-                                        setattr(newrec, attr, tainted)
-                                        treclist.append(newrec)
-
-                            elif tainted_key in tainted_mapping:
-                                # If we already put a tainted value into this
-                                # recordset, we need to make sure the whole
-                                # recordset is built.
-                                treclist = tainted_mapping[tainted_key]
-                                lastrecord = treclist[-1]
-                                copyitem = item
-
-                                if not hasattr(lastrecord, attr):
-                                    if flags & SEQUENCE:
-                                        copyitem = [copyitem]
-                                    setattr(lastrecord, attr, copyitem)
-                                else:
-                                    if flags & SEQUENCE:
-                                        getattr(
-                                            lastrecord, attr).append(copyitem)
-                                    else:
-                                        newrec = record()
-                                        setattr(newrec, attr, copyitem)
-                                        treclist.append(newrec)
+                # Determine which dictionary to use
+                if flags & DEFAULT:
+                    mapping_object = defaults
+                    tainted_mapping = tainteddefaults
+                else:
+                    mapping_object = form
+                    tainted_mapping = taintedform
 
-                            if not hasattr(x, attr):
-                                # If the attribute does not
-                                # exist, setit
-                                if flags & SEQUENCE:
-                                    item = [item]
-                                setattr(x, attr, item)
-                            else:
+                # Insert in dictionary
+                if key in mapping_object:
+                    if flags & RECORDS:
+                        # Get the list and the last record
+                        # in the list. reclist is mutable.
+                        reclist = mapping_object[key]
+                        x = reclist[-1]
+
+                        if tainted:
+                            # Store a tainted copy as well
+                            if tainted_key not in tainted_mapping:
+                                tainted_mapping[tainted_key] = deepcopy(
+                                    reclist)
+                            treclist = tainted_mapping[tainted_key]
+                            lastrecord = treclist[-1]
+
+                            if not hasattr(lastrecord, attr):
                                 if flags & SEQUENCE:
-                                    # If the attribute is a
-                                    # sequence, append the item
-                                    # to the existing attribute
-                                    y = getattr(x, attr)
-                                    y.append(item)
-                                    setattr(x, attr, y)
-                                else:
-                                    # Create a new record and add
-                                    # it to the list
-                                    n = record()
-                                    setattr(n, attr, item)
-                                    mapping_object[key].append(n)
-                        elif flags & RECORD:
-                            b = mapping_object[key]
-                            if flags & SEQUENCE:
-                                item = [item]
-                                if not hasattr(b, attr):
-                                    # if it does not have the
-                                    # attribute, set it
-                                    setattr(b, attr, item)
-                                else:
-                                    # it has the attribute so
-                                    # append the item to it
-                                    setattr(b, attr, getattr(b, attr) + item)
+                                    tainted = [tainted]
+                                setattr(lastrecord, attr, tainted)
                             else:
-                                # it is not a sequence so
-                                # set the attribute
-                                setattr(b, attr, item)
-
-                            # Store a tainted copy as well if necessary
-                            if tainted:
-                                if tainted_key not in tainted_mapping:
-                                    tainted_mapping[tainted_key] = deepcopy(
-                                        mapping_object[key])
-                                b = tainted_mapping[tainted_key]
                                 if flags & SEQUENCE:
-                                    seq = getattr(b, attr, [])
-                                    seq.append(tainted)
-                                    setattr(b, attr, seq)
+                                    getattr(
+                                        lastrecord, attr).append(tainted)
                                 else:
-                                    setattr(b, attr, tainted)
-
-                            elif tainted_key in tainted_mapping:
-                                # If we already put a tainted value into this
-                                # record, we need to make sure the whole record
-                                # is built.
-                                b = tainted_mapping[tainted_key]
+                                    newrec = record()
+                                    setattr(newrec, attr, tainted)
+                                    treclist.append(newrec)
+
+                        elif tainted_key in tainted_mapping:
+                            # If we already put a tainted value into this
+                            # recordset, we need to make sure the whole
+                            # recordset is built.
+                            treclist = tainted_mapping[tainted_key]
+                            lastrecord = treclist[-1]
+                            copyitem = item
+
+                            if not hasattr(lastrecord, attr):
                                 if flags & SEQUENCE:
-                                    seq = getattr(b, attr, [])
-                                    seq.append(item)
-                                    setattr(b, attr, seq)
-                                else:
-                                    setattr(b, attr, item)
-
-                        else:
-                            # it is not a record or list of records
-                            found = mapping_object[key]
-
-                            if tainted:
-                                # Store a tainted version if necessary
-                                if tainted_key not in tainted_mapping:
-                                    copied = deepcopy(found)
-                                    if isinstance(copied, list):
-                                        tainted_mapping[tainted_key] = copied
-                                    else:
-                                        tainted_mapping[tainted_key] = [copied]
-                                tainted_mapping[tainted_key].append(tainted)
-
-                            elif tainted_key in tainted_mapping:
-                                # We may already have encountered a tainted
-                                # value for this key, and the tainted_mapping
-                                # needs to hold all the values.
-                                tfound = tainted_mapping[tainted_key]
-                                if isinstance(tfound, list):
-                                    tainted_mapping[tainted_key].append(item)
-                                else:
-                                    tainted_mapping[tainted_key] = [tfound,
-                                                                    item]
-
-                            if isinstance(found, list):
-                                found.append(item)
+                                    copyitem = [copyitem]
+                                setattr(lastrecord, attr, copyitem)
                             else:
-                                found = [found, item]
-                                mapping_object[key] = found
-                    else:
-                        # The dictionary does not have the key
-                        if flags & RECORDS:
-                            # Create a new record, set its attribute
-                            # and put it in the dictionary as a list
-                            a = record()
-                            if flags & SEQUENCE:
-                                item = [item]
-                            setattr(a, attr, item)
-                            mapping_object[key] = [a]
-
-                            if tainted:
-                                # Store a tainted copy if necessary
-                                a = record()
                                 if flags & SEQUENCE:
-                                    tainted = [tainted]
-                                setattr(a, attr, tainted)
-                                tainted_mapping[tainted_key] = [a]
+                                    getattr(
+                                        lastrecord, attr).append(copyitem)
+                                else:
+                                    newrec = record()
+                                    setattr(newrec, attr, copyitem)
+                                    treclist.append(newrec)
 
-                        elif flags & RECORD:
-                            # Create a new record, set its attribute
-                            # and put it in the dictionary
+                        if not hasattr(x, attr):
+                            # If the attribute does not
+                            # exist, setit
                             if flags & SEQUENCE:
                                 item = [item]
-                            r = mapping_object[key] = record()
-                            setattr(r, attr, item)
-
-                            if tainted:
-                                # Store a tainted copy if necessary
-                                if flags & SEQUENCE:
-                                    tainted = [tainted]
-                                r = tainted_mapping[tainted_key] = record()
-                                setattr(r, attr, tainted)
+                            setattr(x, attr, item)
                         else:
-                            # it is not a record or list of records
                             if flags & SEQUENCE:
-                                item = [item]
-                            mapping_object[key] = item
-
-                            if tainted:
-                                # Store a tainted copy if necessary
-                                if flags & SEQUENCE:
-                                    tainted = [tainted]
-                                tainted_mapping[tainted_key] = tainted
+                                # If the attribute is a
+                                # sequence, append the item
+                                # to the existing attribute
+                                y = getattr(x, attr)
+                                y.append(item)
+                                setattr(x, attr, y)
+                            else:
+                                # Create a new record and add
+                                # it to the list
+                                n = record()
+                                setattr(n, attr, item)
+                                mapping_object[key].append(n)
+                    elif flags & RECORD:
+                        b = mapping_object[key]
+                        if flags & SEQUENCE:
+                            item = [item]
+                            if not hasattr(b, attr):
+                                # if it does not have the
+                                # attribute, set it
+                                setattr(b, attr, item)
+                            else:
+                                # it has the attribute so
+                                # append the item to it
+                                setattr(b, attr, getattr(b, attr) + item)
+                        else:
+                            # it is not a sequence so
+                            # set the attribute
+                            setattr(b, attr, item)
 
-                else:
-                    # This branch is for case when no type was specified.
-                    mapping_object = form
+                        # Store a tainted copy as well if necessary
+                        if tainted:
+                            if tainted_key not in tainted_mapping:
+                                tainted_mapping[tainted_key] = deepcopy(
+                                    mapping_object[key])
+                            b = tainted_mapping[tainted_key]
+                            if flags & SEQUENCE:
+                                seq = getattr(b, attr, [])
+                                seq.append(tainted)
+                                setattr(b, attr, seq)
+                            else:
+                                setattr(b, attr, tainted)
 
-                    if not isFileUpload and '<' in item:
-                        tainted = TaintedString(item)
-                    elif '<' in key:
-                        tainted = item
+                        elif tainted_key in tainted_mapping:
+                            # If we already put a tainted value into this
+                            # record, we need to make sure the whole record
+                            # is built.
+                            b = tainted_mapping[tainted_key]
+                            if flags & SEQUENCE:
+                                seq = getattr(b, attr, [])
+                                seq.append(item)
+                                setattr(b, attr, seq)
+                            else:
+                                setattr(b, attr, item)
 
-                    # Insert in dictionary
-                    if key in mapping_object:
+                    else:
                         # it is not a record or list of records
                         found = mapping_object[key]
 
                         if tainted:
                             # Store a tainted version if necessary
-                            if tainted_key not in taintedform:
+                            if tainted_key not in tainted_mapping:
                                 copied = deepcopy(found)
                                 if isinstance(copied, list):
-                                    taintedform[tainted_key] = copied
+                                    tainted_mapping[tainted_key] = copied
                                 else:
-                                    taintedform[tainted_key] = [copied]
-                            elif not isinstance(
-                                    taintedform[tainted_key], list):
-                                taintedform[tainted_key] = [
-                                    taintedform[tainted_key]]
-                            taintedform[tainted_key].append(tainted)
-
-                        elif tainted_key in taintedform:
-                            # We may already have encountered a tainted value
-                            # for this key, and the taintedform needs to hold
-                            # all the values.
-                            tfound = taintedform[tainted_key]
+                                    tainted_mapping[tainted_key] = [copied]
+                            tainted_mapping[tainted_key].append(tainted)
+
+                        elif tainted_key in tainted_mapping:
+                            # We may already have encountered a tainted
+                            # value for this key, and the tainted_mapping
+                            # needs to hold all the values.
+                            tfound = tainted_mapping[tainted_key]
                             if isinstance(tfound, list):
-                                taintedform[tainted_key].append(item)
+                                tainted_mapping[tainted_key].append(item)
                             else:
-                                taintedform[tainted_key] = [tfound, item]
+                                tainted_mapping[tainted_key] = [tfound,
+                                                                item]
 
                         if isinstance(found, list):
                             found.append(item)
                         else:
                             found = [found, item]
                             mapping_object[key] = found
+                else:
+                    # The dictionary does not have the key
+                    if flags & RECORDS:
+                        # Create a new record, set its attribute
+                        # and put it in the dictionary as a list
+                        a = record()
+                        if flags & SEQUENCE:
+                            item = [item]
+                        setattr(a, attr, item)
+                        mapping_object[key] = [a]
+
+                        if tainted:
+                            # Store a tainted copy if necessary
+                            a = record()
+                            if flags & SEQUENCE:
+                                tainted = [tainted]
+                            setattr(a, attr, tainted)
+                            tainted_mapping[tainted_key] = [a]
+
+                    elif flags & RECORD:
+                        # Create a new record, set its attribute
+                        # and put it in the dictionary
+                        if flags & SEQUENCE:
+                            item = [item]
+                        r = mapping_object[key] = record()
+                        setattr(r, attr, item)
+
+                        if tainted:
+                            # Store a tainted copy if necessary
+                            if flags & SEQUENCE:
+                                tainted = [tainted]
+                            r = tainted_mapping[tainted_key] = record()
+                            setattr(r, attr, tainted)
                     else:
+                        # it is not a record or list of records
+                        if flags & SEQUENCE:
+                            item = [item]
                         mapping_object[key] = item
-                        if tainted:
-                            taintedform[tainted_key] = tainted
 
-            # insert defaults into form dictionary
-            if defaults:
-                for key, value in defaults.items():
-                    tainted_key = key
-                    if '<' in key:
-                        tainted_key = TaintedString(key)
+                        if tainted:
+                            # Store a tainted copy if necessary
+                            if flags & SEQUENCE:
+                                tainted = [tainted]
+                            tainted_mapping[tainted_key] = tainted
 
-                    if key not in form:
-                        # if the form does not have the key,
-                        # set the default
-                        form[key] = value
+            else:
+                # This branch is for case when no type was specified.
+                mapping_object = form
+
+                if not isFileUpload and '<' in item:
+                    tainted = TaintedString(item)
+                elif '<' in key:
+                    tainted = item
+
+                # Insert in dictionary
+                if key in mapping_object:
+                    # it is not a record or list of records
+                    found = mapping_object[key]
+
+                    if tainted:
+                        # Store a tainted version if necessary
+                        if tainted_key not in taintedform:
+                            copied = deepcopy(found)
+                            if isinstance(copied, list):
+                                taintedform[tainted_key] = copied
+                            else:
+                                taintedform[tainted_key] = [copied]
+                        elif not isinstance(
+                                taintedform[tainted_key], list):
+                            taintedform[tainted_key] = [
+                                taintedform[tainted_key]]
+                        taintedform[tainted_key].append(tainted)
+
+                    elif tainted_key in taintedform:
+                        # We may already have encountered a tainted value
+                        # for this key, and the taintedform needs to hold
+                        # all the values.
+                        tfound = taintedform[tainted_key]
+                        if isinstance(tfound, list):
+                            taintedform[tainted_key].append(item)
+                        else:
+                            taintedform[tainted_key] = [tfound, item]
 
-                        if tainted_key in tainteddefaults:
-                            taintedform[tainted_key] = \
-                                tainteddefaults[tainted_key]
+                    if isinstance(found, list):
+                        found.append(item)
                     else:
-                        # The form has the key
-                        tdefault = tainteddefaults.get(tainted_key, value)
-                        if isinstance(value, record):
-                            # if the key is mapped to a record, get the
-                            # record
-                            r = form[key]
-
-                            # First deal with tainted defaults.
-                            if tainted_key in taintedform:
-                                tainted = taintedform[tainted_key]
+                        found = [found, item]
+                        mapping_object[key] = found
+                else:
+                    mapping_object[key] = item
+                    if tainted:
+                        taintedform[tainted_key] = tainted
+
+        # insert defaults into form dictionary
+        if defaults:
+            for key, value in defaults.items():
+                tainted_key = key
+                if '<' in key:
+                    tainted_key = TaintedString(key)
+
+                if key not in form:
+                    # if the form does not have the key,
+                    # set the default
+                    form[key] = value
+
+                    if tainted_key in tainteddefaults:
+                        taintedform[tainted_key] = \
+                            tainteddefaults[tainted_key]
+                else:
+                    # The form has the key
+                    tdefault = tainteddefaults.get(tainted_key, value)
+                    if isinstance(value, record):
+                        # if the key is mapped to a record, get the
+                        # record
+                        r = form[key]
+
+                        # First deal with tainted defaults.
+                        if tainted_key in taintedform:
+                            tainted = taintedform[tainted_key]
+                            for k, v in tdefault.__dict__.items():
+                                if not hasattr(tainted, k):
+                                    setattr(tainted, k, v)
+
+                        elif tainted_key in tainteddefaults:
+                            # Find out if any of the tainted default
+                            # attributes needs to be copied over.
+                            missesdefault = 0
+                            for k, v in tdefault.__dict__.items():
+                                if not hasattr(r, k):
+                                    missesdefault = 1
+                                    break
+                            if missesdefault:
+                                tainted = deepcopy(r)
                                 for k, v in tdefault.__dict__.items():
                                     if not hasattr(tainted, k):
                                         setattr(tainted, k, v)
+                                taintedform[tainted_key] = tainted
 
-                            elif tainted_key in tainteddefaults:
-                                # Find out if any of the tainted default
-                                # attributes needs to be copied over.
-                                missesdefault = 0
-                                for k, v in tdefault.__dict__.items():
-                                    if not hasattr(r, k):
+                        for k, v in value.__dict__.items():
+                            # loop through the attributes and value
+                            # in the default dictionary
+                            if not hasattr(r, k):
+                                # if the form dictionary doesn't have
+                                # the attribute, set it to the default
+                                setattr(r, k, v)
+                        form[key] = r
+
+                    elif isinstance(value, list):
+                        # the default value is a list
+                        l = form[key]
+                        if not isinstance(l, list):
+                            l = [l]
+
+                        # First deal with tainted copies
+                        if tainted_key in taintedform:
+                            tainted = taintedform[tainted_key]
+                            if not isinstance(tainted, list):
+                                tainted = [tainted]
+                            for defitem in tdefault:
+                                if isinstance(defitem, record):
+                                    for k, v in defitem.__dict__.items():
+                                        for origitem in tainted:
+                                            if not hasattr(origitem, k):
+                                                setattr(origitem, k, v)
+                                else:
+                                    if defitem not in tainted:
+                                        tainted.append(defitem)
+                            taintedform[tainted_key] = tainted
+
+                        elif tainted_key in tainteddefaults:
+                            missesdefault = 0
+                            for defitem in tdefault:
+                                if isinstance(defitem, record):
+                                    try:
+                                        for k, v in \
+                                                defitem.__dict__.items():
+                                            for origitem in l:
+                                                if not hasattr(
+                                                        origitem, k):
+                                                    missesdefault = 1
+                                                    raise NestedLoopExit
+                                    except NestedLoopExit:
+                                        break
+                                else:
+                                    if defitem not in l:
                                         missesdefault = 1
                                         break
-                                if missesdefault:
-                                    tainted = deepcopy(r)
-                                    for k, v in tdefault.__dict__.items():
-                                        if not hasattr(tainted, k):
-                                            setattr(tainted, k, v)
-                                    taintedform[tainted_key] = tainted
-
-                            for k, v in value.__dict__.items():
-                                # loop through the attributes and value
-                                # in the default dictionary
-                                if not hasattr(r, k):
-                                    # if the form dictionary doesn't have
-                                    # the attribute, set it to the default
-                                    setattr(r, k, v)
-                            form[key] = r
-
-                        elif isinstance(value, list):
-                            # the default value is a list
-                            l = form[key]
-                            if not isinstance(l, list):
-                                l = [l]
-
-                            # First deal with tainted copies
-                            if tainted_key in taintedform:
-                                tainted = taintedform[tainted_key]
-                                if not isinstance(tainted, list):
-                                    tainted = [tainted]
+                            if missesdefault:
+                                tainted = deepcopy(l)
                                 for defitem in tdefault:
                                     if isinstance(defitem, record):
-                                        for k, v in defitem.__dict__.items():
+                                        for k, v in (
+                                                defitem.__dict__.items()):
                                             for origitem in tainted:
-                                                if not hasattr(origitem, k):
+                                                if not hasattr(
+                                                        origitem, k):
                                                     setattr(origitem, k, v)
                                     else:
                                         if defitem not in tainted:
                                             tainted.append(defitem)
                                 taintedform[tainted_key] = tainted
 
-                            elif tainted_key in tainteddefaults:
-                                missesdefault = 0
-                                for defitem in tdefault:
-                                    if isinstance(defitem, record):
-                                        try:
-                                            for k, v in \
-                                                    defitem.__dict__.items():
-                                                for origitem in l:
-                                                    if not hasattr(
-                                                            origitem, k):
-                                                        missesdefault = 1
-                                                        raise NestedLoopExit
-                                        except NestedLoopExit:
-                                            break
-                                    else:
-                                        if defitem not in l:
-                                            missesdefault = 1
-                                            break
-                                if missesdefault:
-                                    tainted = deepcopy(l)
-                                    for defitem in tdefault:
-                                        if isinstance(defitem, record):
-                                            for k, v in (
-                                                    defitem.__dict__.items()):
-                                                for origitem in tainted:
-                                                    if not hasattr(
-                                                            origitem, k):
-                                                        setattr(origitem, k, v)
-                                        else:
-                                            if defitem not in tainted:
-                                                tainted.append(defitem)
-                                    taintedform[tainted_key] = tainted
-
-                            for x in value:
-                                # for each x in the list
-                                if isinstance(x, record):
-                                    # if the x is a record
-                                    for k, v in x.__dict__.items():
-
-                                        # loop through each
-                                        # attribute and value in
-                                        # the record
+                        for x in value:
+                            # for each x in the list
+                            if isinstance(x, record):
+                                # if the x is a record
+                                for k, v in x.__dict__.items():
 
-                                        for y in l:
+                                    # loop through each
+                                    # attribute and value in
+                                    # the record
 
-                                            # loop through each
-                                            # record in the form
-                                            # list if it doesn't
-                                            # have the attributes
-                                            # in the default
-                                            # dictionary, set them
+                                    for y in l:
 
-                                            if not hasattr(y, k):
-                                                setattr(y, k, v)
-                                else:
-                                    # x is not a record
-                                    if x not in l:
-                                        l.append(x)
-                            form[key] = l
-                        else:
-                            # The form has the key, the key is not mapped
-                            # to a record or sequence so do nothing
-                            pass
-
-            # Convert to tuples
-            if tuple_items:
-                for key in tuple_items.keys():
-                    # Split the key and get the attr
-                    k = key.split(".")
-                    k, attr = '.'.join(k[:-1]), k[-1]
-                    a = attr
-                    new = ''
-                    # remove any type_names in the attr
-                    while not a == '':
-                        a = a.split(":")
-                        a, new = ':'.join(a[:-1]), a[-1]
-                    attr = new
-                    if k in form:
-                        # If the form has the split key get its value
-                        tainted_split_key = k
-                        if '<' in k:
-                            tainted_split_key = TaintedString(k)
-                        item = form[k]
-                        if isinstance(item, record):
-                            # if the value is mapped to a record, check if it
-                            # has the attribute, if it has it, convert it to
-                            # a tuple and set it
-                            if hasattr(item, attr):
-                                value = tuple(getattr(item, attr))
-                                setattr(item, attr, value)
-                        else:
-                            # It is mapped to a list of  records
-                            for x in item:
-                                # loop through the records
-                                if hasattr(x, attr):
-                                    # If the record has the attribute
-                                    # convert it to a tuple and set it
-                                    value = tuple(getattr(x, attr))
-                                    setattr(x, attr, value)
-
-                        # Do the same for the tainted counterpart
-                        if tainted_split_key in taintedform:
-                            tainted = taintedform[tainted_split_key]
-                            if isinstance(item, record):
-                                seq = tuple(getattr(tainted, attr))
-                                setattr(tainted, attr, seq)
+                                        # loop through each
+                                        # record in the form
+                                        # list if it doesn't
+                                        # have the attributes
+                                        # in the default
+                                        # dictionary, set them
+
+                                        if not hasattr(y, k):
+                                            setattr(y, k, v)
                             else:
-                                for trec in tainted:
-                                    if hasattr(trec, attr):
-                                        seq = getattr(trec, attr)
-                                        seq = tuple(seq)
-                                        setattr(trec, attr, seq)
+                                # x is not a record
+                                if x not in l:
+                                    l.append(x)
+                        form[key] = l
+                    else:
+                        # The form has the key, the key is not mapped
+                        # to a record or sequence so do nothing
+                        pass
+
+        # Convert to tuples
+        if tuple_items:
+            for key in tuple_items.keys():
+                # Split the key and get the attr
+                k = key.split(".")
+                k, attr = '.'.join(k[:-1]), k[-1]
+                a = attr
+                new = ''
+                # remove any type_names in the attr
+                while not a == '':
+                    a = a.split(":")
+                    a, new = ':'.join(a[:-1]), a[-1]
+                attr = new
+                if k in form:
+                    # If the form has the split key get its value
+                    tainted_split_key = k
+                    if '<' in k:
+                        tainted_split_key = TaintedString(k)
+                    item = form[k]
+                    if isinstance(item, record):
+                        # if the value is mapped to a record, check if it
+                        # has the attribute, if it has it, convert it to
+                        # a tuple and set it
+                        if hasattr(item, attr):
+                            value = tuple(getattr(item, attr))
+                            setattr(item, attr, value)
                     else:
-                        # the form does not have the split key
-                        tainted_key = key
-                        if '<' in key:
-                            tainted_key = TaintedString(key)
-                        if key in form:
-                            # if it has the original key, get the item
-                            # convert it to a tuple
-                            item = form[key]
-                            item = tuple(form[key])
-                            form[key] = item
+                        # It is mapped to a list of  records
+                        for x in item:
+                            # loop through the records
+                            if hasattr(x, attr):
+                                # If the record has the attribute
+                                # convert it to a tuple and set it
+                                value = tuple(getattr(x, attr))
+                                setattr(x, attr, value)
+
+                    # Do the same for the tainted counterpart
+                    if tainted_split_key in taintedform:
+                        tainted = taintedform[tainted_split_key]
+                        if isinstance(item, record):
+                            seq = tuple(getattr(tainted, attr))
+                            setattr(tainted, attr, seq)
+                        else:
+                            for trec in tainted:
+                                if hasattr(trec, attr):
+                                    seq = getattr(trec, attr)
+                                    seq = tuple(seq)
+                                    setattr(trec, attr, seq)
+                else:
+                    # the form does not have the split key
+                    tainted_key = key
+                    if '<' in key:
+                        tainted_key = TaintedString(key)
+                    if key in form:
+                        # if it has the original key, get the item
+                        # convert it to a tuple
+                        item = form[key]
+                        item = tuple(form[key])
+                        form[key] = item
+
+                    if tainted_key in taintedform:
+                        tainted = tuple(taintedform[tainted_key])
+                        taintedform[tainted_key] = tainted
+
+        return meth
+
+    def _deferFields(self, fslist):
+        """Set the fields of a request aside for lazy marshalling.
+
+        Fields are grouped by the start of their key, up to the first
+        colon or dot; the fields of a group are marshalled together on
+        first access to one of their keys, or to form or taintedform.
+        Only the :method and :action suffixes are looked at right away.
+        """
+        pending = {}
+        meth = None
+        for item in fslist:
+            key = item.name
+            if key is None:
+                continue
+            group = _form_group(key)
+            if group in pending:
+                pending[group].append(item)
+            else:
+                pending[group] = [item]
 
-                        if tainted_key in taintedform:
-                            tainted = tuple(taintedform[tainted_key])
-                            taintedform[tainted_key] = tainted
+            if 'method' not in key and 'action' not in key:
+                continue
+            l = key.rfind(':')
+            while l >= 0:
+                mo = search_type(key, l)
+                if not mo:
+                    break
+                l = mo.start(0)
+                type_name = key[l + 1:]
+                key = key[:l]
+                if type_name in ('method', 'action'):
+                    meth = key if l else _field_value(item)[0]
+                elif type_name in ('default_method', 'default_action'):
+                    if not meth:
+                        meth = key if l else _field_value(item)[0]
+                l = key.rfind(':')
 
-        if meth:
-            if 'PATH_INFO' in environ:
-                path = environ['PATH_INFO']
-                while path[-1:] == '/':
-                    path = path[:-1]
-            else:
-                path = ''
-            other['PATH_INFO'] = path = "%s/%s" % (path, meth)
-            self._hacked_path = 1
+        self._pending_fields = pending
+        return meth
+
+    def _processPendingFields(self, key=None):
+        # Marshal the deferred fields which may end up in `key`, or all
+        # of them.
+        pending = self._pending_fields
+        if key is None:
+            groups = list(pending.keys())
+        else:
+            groups = [_form_group(key)]
+        for group in groups:
+            fields = pending.pop(group, None)
+            if fields is not None:
+                self._processFields(fields)
+
+    @property
+    def form(self):
+        if self._pending_fields:
+            self._processPendingFields()
+        return self._form
+
+    @form.setter
+    def form(self, value):
+        if self._pending_fields:
+            self._processPendingFields()
+        self._form = value
+
+    @property
+    def taintedform(self):
+        if self._pending_fields:
+            self._processPendingFields()
+        return self._taintedform
+
+    @taintedform.setter
+    def taintedform(self, value):
+        if self._pending_fields:
+            self._processPendingFields()
+        self._taintedform = value
+
+    def _parseCookies(self):
+        # Cookie values should *not* be appended to existing form
+        # vars with the same name - they are more like default values
+        # for names not otherwise specified in the form.
+        cookies = {}
+        taintedcookies = {}
+        k = self.environ.get('HTTP_COOKIE', '')
+        if k:
+            parse_cookie(k, cookies)
+            for k, v in cookies.items():
+                istainted = 0
+                if '<' in k:
+                    k = TaintedString(k)
+                    istainted = 1
+                if '<' in v:
+                    v = TaintedString(v)
+                    istainted = 1
+                if istainted:
+                    taintedcookies[k] = v
+        self._cookies = cookies
+        self._taintedcookies = taintedcookies
+
+    @property
+    def cookies(self):
+        if self._cookies is None:
+            self._parseCookies()
+        return self._cookies
+
+    @cookies.setter
+    def cookies(self, value):
+        if self._cookies is None:
+            self._parseCookies()
+        self._cookies = value
+
+    @property
+    def taintedcookies(self):
+        if self._taintedcookies is None:
+            self._parseCookies()
+        return self._taintedcookies
+
+    @taintedcookies.setter
+    def taintedcookies(self, value):
+        if self._taintedcookies is None:
+            self._parseCookies()
+        self._taintedcookies = value
 
     def postProcessInputs(self):
         """Process the values in request.form to decode strings to unicode.
@@ -1269,10 +1502,7 @@ class HTTPRequest(BaseRequest):
 
     get_header = getHeader  # BBB
 
-    def get(self, key, default=None, returnTaints=0,
-            URLmatch=re.compile('URL(PATH)?([0-9]+)$').match,
-            BASEmatch=re.compile('BASE(PATH)?([0-9]+)$').match,
-            ):
+    def get(self, key, default=None, returnTaints=0):
         """Get a variable value
 
         Return a value for the required variable name.
@@ -1286,71 +1516,61 @@ class HTTPRequest(BaseRequest):
                 return self
             return other[key]
 
-        if key[:1] == 'U':
-            match = URLmatch(key)
-            if match is not None:
-                pathonly, n = match.groups()
-                path = self._script + self._steps
-                n = len(path) - int(n)
-                if n < 0:
-                    raise KeyError(key)
-                if pathonly:
-                    path = [''] + path[:n]
-                else:
-                    path = [other['SERVER_URL']] + path[:n]
-                URL = '/'.join(path)
-                if 'PUBLISHED' in other:
-                    # Don't cache URLs until publishing traversal is done.
-                    other[key] = URL
-                    self._urls = self._urls + (key,)
-                return URL
-
-        if key in isCGI_NAMEs or key[:5] == 'HTTP_':
+        kind = _key_kinds.get(key) or _keyKind(key)
+        kind_id = kind[0]
+        if kind_id == _PLAIN_KEY:
+            # Most keys are looked up in the request data below.
+            pass
+
+        elif kind_id == _URL_KEY:
+            prefixes = self._urlPrefixes()
+            n = prefixes[1] + len(self._script) - kind[2]
+            if n < 0:
+                raise KeyError(key)
+            URL = prefixes[4][n] if kind[1] else prefixes[3][n]
+            if 'PUBLISHED' in other:
+                # Don't cache URLs until publishing traversal is done.
+                other[key] = URL
+                self._urls = self._urls + (key,)
+            return URL
+
+        elif kind_id == _CGI_KEY:
             environ = self.environ
             if key in environ and (key not in hide_key):
                 return environ[key]
             return ''
 
-        if key == 'REQUEST':
+        elif kind_id == _REQUEST_KEY:
             return self
 
-        if key[:1] == 'B':
-            match = BASEmatch(key)
-            if match is not None:
-                pathonly, n = match.groups()
-                path = self._steps
-                n = int(n)
-                if n:
-                    n = n - 1
-                    if len(path) < n:
-                        raise KeyError(key)
-
-                    v = self._script + path[:n]
-                else:
-                    v = self._script[:-1]
-                if pathonly:
-                    v.insert(0, '')
-                else:
-                    v.insert(0, other['SERVER_URL'])
-                URL = '/'.join(v)
-                if 'PUBLISHED' in other:
-                    # Don't cache URLs until publishing traversal is done.
-                    other[key] = URL
-                    self._urls = self._urls + (key,)
-                return URL
-
-            if key == 'BODY' and self._file is not None:
+        elif kind_id == _BASE_KEY:
+            prefixes = self._urlPrefixes()
+            n = kind[2]
+            if n:
+                n = n - 1
+                if len(self._steps) < n:
+                    raise KeyError(key)
+                n = len(self._script) + n
+            else:
+                n = max(len(self._script) - 1, 0)
+            URL = prefixes[4][n] if kind[1] else prefixes[3][n]
+            if 'PUBLISHED' in other:
+                # Don't cache URLs until publishing traversal is done.
+                other[key] = URL
+                self._urls = self._urls + (key,)
+            return URL
+
+        elif kind_id == _BODY_KEY and self._file is not None:
+            if key == 'BODY':
                 p = self._file.tell()
                 self._file.seek(0)
                 v = self._file.read()
                 self._file.seek(p)
                 self.other[key] = v
                 return v
-
-            if key == 'BODYFILE' and self._file is not None:
-                v = self._file
-                self.other[key] = v
-                return v
+            v = self._file
+            self.other[key] = v
+            return v
 
         v = self.common.get(key, _marker)
         if v is not _marker:
@@ -1365,15 +1585,18 @@ class HTTPRequest(BaseRequest):
                 del self._lazies[key]
                 return v
 
+        if self._pending_fields:
+            self._processPendingFields(key)
+
         # Return tainted data first (marked as suspect)
         if returnTaints:
-            v = self.taintedform.get(key, _marker)
+            v = self._taintedform.get(key, _marker)
             if v is not _marker:
                 other[key] = v
                 return v
 
         # Untrusted data *after* trusted data
-        v = self.form.get(key, _marker)
+        v = self._form.get(key, _marker)
         if v is not _marker:
             other[key] = v
             return v
@@ -1670,6 +1893,298 @@ class ZopeFieldStorage(FieldStorage):
         handle, name = mkstemp()
         return TemporaryFileWrapper(os.fdopen(handle, 'w+b'), name)
 
+
+class MultipartPart(object):
+    """A single field of a multipart/form-data request body.
+
+    Provides the attributes of a FieldStorage item which are used by
+    processInputs and FileUpload.
+    """
+
+    def __init__(self, name, filename=None, headers=None, file=None):
+        self.name = name
+        self.filename = filename
+        self.headers = headers if headers is not None else {}
+        self.file = file
+        self.size = 0
+
+    @property
+    def value(self):
+        if self.file is None:
+            return None
+        self.file.seek(0)
+        value = self.file.read()
+        self.file.seek(0)
+        if PY3 and self.filename is None:
+            value = value.decode('utf-8', 'replace')
+        return value
+
+
+class ZopeMultipartForm(object):
+    """Streaming parser for multipart/form-data request bodies.
+
+    The body is read in chunks of `chunk_size` bytes and scanned for the
+    boundary, instead of line by line. Field data is kept in memory until
+    `memory_limit` bytes of the request are buffered, later data is
+    spooled to temporary files. If `disk_limit` is given, a request
+    spooling more than that raises BadRequest.
+
+    Like FieldStorage, lines may end with CRLF or LF and the fields of
+    the query string are listed before the fields of the body.
+    """
+
+    chunk_size = 1 << 20
+    max_header_size = 1 << 16
+
+    def __init__(self, fp, environ, memory_limit=None, disk_limit=None,
+                 chunk_size=None):
+        ctype, params = parse_header(environ.get('CONTENT_TYPE', ''))
+        boundary = params.get('boundary', '')
+        if not valid_boundary(boundary):
+            raise ValueError(
+                'Invalid boundary in multipart form: %r' % (boundary, ))
+        if not isinstance(boundary, binary_type):
+            boundary = boundary.encode('latin-1')
+        self._delimiter = b'\n--' + boundary
+        # Enough bytes to hold a partial delimiter, its CR and one more
+        # byte telling a delimiter from data which starts like one.
+        self._keep = len(self._delimiter) + 2
+
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self.memory_size = 0
+        self.disk_size = 0
+
+        try:
+            remaining = int(environ.get('CONTENT_LENGTH') or '')
+        except ValueError:
+            remaining = None
+        self._remaining = remaining
+        self._eof = False
+
+        self.list = []
+        qs = environ.get('QUERY_STRING')
+        if qs:
+            for key, value in parse_qsl(qs, keep_blank_values=1):
+                self.list.append(
+                    MultipartPart(key, file=BytesIO(value.encode('utf-8')
+                                                    if PY3 else value)))
+
+        self._fp = fp
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+        finally:
+            self._fp = None
+
+    def _read(self):
+        size = self.chunk_size
+        if self._remaining is not None:
+            size = min(size, self._remaining)
+            if size <= 0:
+                return b''
+        data = self._fp.read(size)
+        if self._remaining is not None:
+            self._remaining -= len(data)
+        return data
+
+    def _search(self, buf, start):
+        # Return the end of the data and the position after the boundary
+        # for the next delimiter in buf, or None if there is none yet.
+        delimiter = self._delimiter
+        size = len(delimiter)
+        pos = buf.find(delimiter, start)
+        while pos >= 0:
+            after = pos + size
+            tail = buf[after:after + 1]
+            if not tail:
+                if not self._eof:
+                    return None
+            elif tail not in b'-\r\n \t':
+                pos = buf.find(delimiter, pos + 1)
+                continue
+            if pos > start and buf[pos - 1:pos] == b'\r':
+                pos -= 1
+            return pos, after
+        return None
+
+    def _parse(self):
+        # Start with a newline so that a boundary on the very first line
+        # matches the delimiter.
+        buf = b'\n'
+        pos = 0
+        state = _PREAMBLE
+        part = None
+        while True:
+            more = False
+            if state is _PREAMBLE or state is _BODY:
+                found = self._search(buf, pos)
+                if found is None:
+                    if self._eof:
+                        if part is not None:
+                            # An unterminated last part: drop the line end
+                            # which FieldStorage would drop, too.
+                            end = len(buf)
+                            if buf.endswith(b'\r\n'):
+                                end -= 2
+                            elif buf.endswith(b'\n'):
+                                end -= 1
+                            self._write(part, buf[pos:end])
+                            self._finish(part)
+                        return
+                    cut = max(pos, len(buf) - self._keep)
+                    if part is not None:
+                        self._write(part, buf[pos:cut])
+                    pos = cut
+                    more = True
+                else:
+                    end, after = found
+                    if part is not None:
+                        self._write(part, buf[pos:end])
+                        self._finish(part)
+                        part = None
+                    pos = after
+                    state = _BOUNDARY
+            elif state is _BOUNDARY:
+                if len(buf) - pos < 2 and not self._eof:
+                    more = True
+                elif buf[pos:pos + 2] == b'--':
+                    return
+                else:
+                    eol = buf.find(b'\n', pos)
+                    if eol < 0:
+                        more = True
+                    else:
+                        pos = eol + 1
+                        state = _HEADERS
+            else:
+                if buf.startswith(b'\n', pos):
+                    end, start = pos, pos + 1
+                elif buf.startswith(b'\r\n', pos):
+                    end, start = pos, pos + 2
+                else:
+                    mo = _blank_line(buf, pos)
+                    if mo is None:
+                        end = None
+                    else:
+                        end, start = mo.start() + 1, mo.end()
+                if end is None:
+                    if len(buf) - pos > self.max_header_size:
+                        raise BadRequest('Multipart headers too large')
+                    more = True
+                else:
+                    part = self._make_part(buf[pos:end])
+                    self.list.append(part)
+                    pos = start
+                    state = _BODY
+
+            if more:
+                if self._eof:
+                    return
+                data = self._read()
+                if data:
+                    buf = buf[pos:] + data
+                    pos = 0
+                else:
+                    self._eof = True
+
+    def _make_part(self, raw):
+        if PY3:
+            raw = raw.decode('utf-8', 'replace')
+        headers = Message()
+        name = value = None
+        for line in raw.splitlines():
+            if line[:1] in (' ', '\t') and name is not None:
+                value = value + ' ' + line.strip()
+                continue
+            if name is not None:
+                headers[name] = value
+            name, sep, value = line.partition(':')
+            if not sep:
+                name = None
+                continue
+            name, value = name.strip(), value.strip()
+        if name is not None:
+            headers[name] = value
+
+        disposition, params = parse_header(
+            headers.get('content-disposition', ''))
+        return MultipartPart(params.get('name'), params.get('filename'),
+                             headers, BytesIO())
+
+    def _write(self, part, data):
+        if not data:
+            return
+        size = len(data)
+        part.size += size
+        if isinstance(part.file, BytesIO):
+            limit = self.memory_limit
+            if limit is None or self.memory_size + size <= limit:
+                self.memory_size += size
+                part.file.write(data)
+                return
+            buffered = part.file.getvalue()
+            self.memory_size -= len(buffered)
+            part.file = self.make_file()
+            self._spool(part, buffered)
+        self._spool(part, data)
+
+    def _spool(self, part, data):
+        self.disk_size += len(data)
+        if self.disk_limit is not None and self.disk_size > self.disk_limit:
+            raise BadRequest('Uploaded data exceeds the allowed size')
+        part.file.write(data)
+
+    def _finish(self, part):
+        part.file.seek(0)
+
+    def close(self):
+        for part in self.list:
+            if part.file is not None:
+                part.file.close()
+
+    def make_file(self):
+        handle, name = mkstemp()
+        return TemporaryFileWrapper(os.fdopen(handle, 'w+b'), name)
+
+
+def _field_value(item):
+    """Return the value of a parsed form field and whether it is a file.
+    """
+    if (hasattr(item, 'file') and hasattr(item, 'filename') and
+            hasattr(item, 'headers')):
+        if (item.file and
+            (item.filename is not None
+             # RFC 1867 says that all fields get a content-type.
+             # or 'content-type' in map(lower, item.headers.keys())
+             )):
+            return FileUpload(item), 1
+        return item.value, 0
+    return item, 0
+
+
+def _form_group(key):
+    # Fields which can be marshalled into the same form entry, like the
+    # attributes of a record, share the start of their key.
+    return key.split(':', 1)[0].split('.', 1)[0]
+
+
+_PREAMBLE = 'preamble'
+_BOUNDARY = 'boundary'
+_HEADERS = 'headers'
+_BODY = 'body'
+_blank_line = re.compile(b'\n\r?\n').search
+
+
+def is_multipart(environ):
+    """Return True if the request body is multipart/form-data."""
+    ctype = environ.get('CONTENT_TYPE', '')
+    return ctype[:19].lower() == 'multipart/form-data'
+
 # Original version: zope.publisher.browser.FileUpload
 class FileUpload(object):
     '''File upload objects
@@ -1750,40 +2265,36 @@ def parse_cookie(text,
                  parmre=PARMRE,
                  paramlessre=PARAMLESSRE,
                  ):
+    """Add the cookies of the Cookie header `text` to the dict `result`.
 
+    The header is scanned once from left to right. The first cookie of a
+    name wins.
+    """
     if result is None:
         result = {}
 
-    mo_q = qparmre.match(text)
-
-    if mo_q:
+    pos = 0
+    while True:
         # Match quoted correct cookies
-        l = len(mo_q.group(1))
-        name = mo_q.group(2)
-        value = mo_q.group(3)
-
-    else:
-        # Match evil MSIE cookies ;)
-        mo_p = parmre.match(text)
-
-        if mo_p:
-            l = len(mo_p.group(1))
-            name = mo_p.group(2)
-            value = mo_p.group(3)
+        mo = qparmre.match(text, pos)
+        if mo is not None:
+            value = mo.group(3)
         else:
-            # Broken Cookie without = nor value.
-            broken_p = paramlessre.match(text)
-            if broken_p:
-                l = len(broken_p.group(1))
-                name = broken_p.group(2)
-                value = ''
+            # Match evil MSIE cookies ;)
+            mo = parmre.match(text, pos)
+            if mo is not None:
+                value = mo.group(3)
             else:
-                return result
-
-    if name not in result:
-        result[name] = unquote(value)
+                # Broken Cookie without = nor value.
+                mo = paramlessre.match(text, pos)
+                if mo is None:
+                    return result
+                value = ''
 
-    return parse_cookie(text[l:], result)
+        name = mo.group(2)
+        if name not in result:
+            result[name] = unquote(value)
+        pos = mo.end()
 
 
 class record(object):
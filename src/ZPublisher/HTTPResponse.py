@@ -13,12 +13,11 @@
 """ CGI Response Output formatter
 """
 from io import BytesIO
+import codecs
 import os
 import re
-import struct
 import sys
 import time
-import zlib
 
 from six import class_types
 from six import PY2
@@ -38,6 +37,7 @@ from zExceptions import (
 from zExceptions.ExceptionFormatter import format_exception
 from ZPublisher.BaseResponse import BaseResponse
 from ZPublisher.Iterators import IUnboundStreamIterator, IStreamIterator
+from ZPublisher import compression
 from ZPublisher import pubevents
 
 try:
@@ -77,6 +77,10 @@ status_codes['resourcelockederror'] = 423
 start_of_header_search = re.compile('(<head[^>]*>)', re.IGNORECASE).search
 base_re_search = re.compile('(<base.*?>)', re.I).search
 bogus_str_search = re.compile(b" [a-fA-F0-9]+>$").search
+# The same searches on encoded bodies, see _isASCIICompatible.
+_head_search = re.compile(b'(<head[^>]*>)', re.IGNORECASE).search
+_base_search = re.compile(b'(<base.*?>)', re.I).search
+_leading_space_match = re.compile(br'\s*').match
 latin1_alias_match = re.compile(
     r'text/html(\s*;\s*charset=((latin)|(latin[-_]?1)|'
     r'(cp1252)|(cp819)|(csISOLatin1)|(IBM819)|(iso-ir-100)|'
@@ -88,24 +92,26 @@ charset_re_match = re.compile(
 absuri_match = re.compile(r'\w+://[\w\.]+').match
 tag_search = re.compile('[a-zA-Z]>').search
 
-_gzip_header = (b"\037\213"  # magic
-                b"\010"  # compression method
-                b"\000"  # flags
-                b"\000\000\000\000"  # time
-                b"\002"
-                b"\377")
-
-# these mime major types should not be gzip content encoded
-uncompressableMimeMajorTypes = ('image',)
+_CRLF = re.compile(r'[\r\n]')
 
-# The environment variable DONT_GZIP_MAJOR_MIME_TYPES can be set to a list
-# of comma seperated mime major types which should also not be compressed
+# Charsets in which markup characters are encoded as ASCII bytes and
+# every other character as non-ASCII bytes, so an encoded body can be
+# searched for markup without decoding it.
+_ascii_compatible_codecs = frozenset(
+    ('ascii', 'utf-8', 'iso8859-1', 'iso8859-15', 'cp1252'))
+_ascii_compatible_charsets = {}
 
-otherTypes = os.environ.get('DONT_GZIP_MAJOR_MIME_TYPES', '').lower()
-if otherTypes:
-    uncompressableMimeMajorTypes += tuple(otherTypes.split(','))
 
-_CRLF = re.compile(r'[\r\n]')
+def _isASCIICompatible(charset):
+    result = _ascii_compatible_charsets.get(charset)
+    if result is None:
+        try:
+            name = codecs.lookup(charset).name
+        except LookupError:
+            name = None
+        result = _ascii_compatible_charsets[charset] = (
+            name in _ascii_compatible_codecs)
+    return result
 
 
 def _scrubHeader(name, value):
@@ -163,6 +169,8 @@ class HTTPBaseResponse(BaseResponse):
     # 1 - compress if accept-encoding ok
     # 2 - ignore accept-encoding (i.e. force)
     use_HTTP_content_compression = 0
+    # The content coding chosen by enableHTTPCompression.
+    _content_coding = None
 
     def __init__(self,
                  body=b'',
@@ -415,7 +423,23 @@ class HTTPBaseResponse(BaseResponse):
         if content_type and (content_type != 'text/html'):
             return
 
-        if self.base and self.body:
+        if not (self.base and self.body):
+            return
+
+        body = self.body
+        if _isASCIICompatible(self.charset):
+            # Search and change the body without decoding it.
+            match = _head_search(body)
+            if match is not None and _base_search(body) is None:
+                index = match.end(0)
+                base = ('\n<base href="%s" />\n' %
+                        escape(self.base, True)).encode(self.charset)
+                if not PY2:
+                    # Join slices of a memoryview, not copies of the body.
+                    body = memoryview(body)
+                self.body = b''.join((body[:index], base, body[index:]))
+                self.setHeader('content-length', len(self.body))
+        else:
             text = self.text
             match = start_of_header_search(text)
             if match is not None:
@@ -443,6 +467,16 @@ class HTTPBaseResponse(BaseResponse):
             return True
         return False
 
+    def _isHTMLBody(self, body):
+        # isHTML for the encoded body, without decoding all of it.
+        if not _isASCIICompatible(self.charset):
+            return self.isHTML(body.decode(self.charset))
+        start = _leading_space_match(body).end()
+        if (body[start:start + 6].lower() == b'<html>' or
+                body[start:start + 14].lower() == b'<!doctype html'):
+            return True
+        return body.find(b'</') > 0
+
     def setBody(self, body, title='', is_error=False, lock=None):
         """ Set the body of the response
 
@@ -514,7 +548,7 @@ class HTTPBaseResponse(BaseResponse):
         content_type = self.headers.get('content-type')
 
         if content_type is None:
-            if self.isHTML(body.decode(self.charset)):
+            if self._isHTMLBody(body):
                 content_type = 'text/html; charset=%s' % self.charset
             else:
                 content_type = 'text/plain; charset=%s' % self.charset
@@ -526,45 +560,48 @@ class HTTPBaseResponse(BaseResponse):
                                                    self.charset)
                 self.setHeader('content-type', content_type)
 
-        self.setHeader('content-length', len(self.body))
-
         self.insertBase()
+        self.setHeader('content-length', len(self.body))
 
-        if (self.use_HTTP_content_compression and
-                self.headers.get('content-encoding', 'gzip') == 'gzip'):
-            # use HTTP content encoding to compress body contents unless
-            # this response already has another type of content encoding
-            if content_type.split('/')[0] not in uncompressableMimeMajorTypes:
-                # only compress if not listed as uncompressable
-                body = self.body
-                startlen = len(body)
-                co = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS,
-                                      zlib.DEF_MEM_LEVEL, 0)
-                chunks = [_gzip_header, co.compress(body),
-                          co.flush(),
-                          struct.pack("<LL",
-                                      zlib.crc32(body) & 0xffffffff,
-                                      startlen)]
-                z = b''.join(chunks)
-                newlen = len(z)
-                if newlen < startlen:
-                    self.body = z
-                    self.setHeader('content-length', newlen)
-                    self.setHeader('content-encoding', 'gzip')
-                    if self.use_HTTP_content_compression == 1:
-                        # use_HTTP_content_compression == 1 if force was
-                        # NOT used in enableHTTPCompression().
-                        # If we forced it, then Accept-Encoding
-                        # was ignored anyway, so cache should not
-                        # vary on it. Otherwise if not forced, cache should
-                        # respect Accept-Encoding client header
-                        vary = self.getHeader('Vary')
-                        if vary is None or 'Accept-Encoding' not in vary:
-                            self.appendHeader('Vary', 'Accept-Encoding')
+        encoder = self._getContentEncoder(len(self.body))
+        if encoder is not None:
+            body = self.body
+            z = encoder.compress(body) + encoder.finish()
+            if len(z) < len(body):
+                self.body = z
+                self.setHeader('content-length', len(z))
+                self._setContentEncoding(encoder.name)
         return self
 
+    def _getContentEncoder(self, size=None):
+        # Return an encoder if compression was enabled and the body,
+        # of `size` bytes if known, should be compressed.
+        if (not self.use_HTTP_content_compression or
+                self._content_coding is None or
+                'content-encoding' in self.headers or
+                'content-range' in self.headers or
+                self.status in (204, 206, 304)):
+            return None
+        if not compression.isCompressible(
+                self.headers.get('content-type'), size):
+            return None
+        return compression.getEncoder(self._content_coding)
+
+    def _setContentEncoding(self, coding):
+        self.setHeader('content-encoding', coding)
+        if self.use_HTTP_content_compression == 1:
+            # use_HTTP_content_compression == 1 if force was
+            # NOT used in enableHTTPCompression().
+            # If we forced it, then Accept-Encoding
+            # was ignored anyway, so cache should not
+            # vary on it. Otherwise if not forced, cache should
+            # respect Accept-Encoding client header
+            vary = self.getHeader('Vary')
+            if vary is None or 'Accept-Encoding' not in vary:
+                self.appendHeader('Vary', 'Accept-Encoding')
+
     def enableHTTPCompression(self, REQUEST={}, force=0, disable=0, query=0):
-        """Enable HTTP Content Encoding with gzip compression if possible
+        """Enable HTTP Content Encoding with compression if possible
 
            REQUEST -- used to check if client can accept compression
            force   -- set true to ignore REQUEST headers
@@ -582,21 +619,21 @@ class HTTPBaseResponse(BaseResponse):
            on a request-by-request basis that the response content should
            be compressed.
 
-           The REQUEST headers are used to determine if the client accepts
-           gzip content encoding. The force parameter can force the use
+           The Accept-Encoding header of REQUEST is used to choose one of
+           the br (if the brotli package is installed), gzip or deflate
+           content codings. The force parameter can force the use
            of gzip encoding regardless of REQUEST, and the disable parameter
            can be used to "turn off" previously enabled encoding (but note
            that any existing content-encoding header will not be changed).
            The query parameter can be used to determine the if compression
            has been previously requested.
 
-           In setBody, the major mime type is used to determine if content
-           encoding should actually be performed.
-
-           By default, image types are not compressed.
-           Additional major mime types can be specified by setting the
-           environment variable DONT_GZIP_MAJOR_MIME_TYPES to a comma-seperated
-           list of major mime types that should also not be gzip compressed.
+           Whether a body is actually compressed depends on its content type
+           and size, see `excluded_types` and `minimum_size` in
+           ZPublisher.compression. By default, image types and bodies of
+           less than 200 bytes are not compressed. Bodies set as files or
+           stream iterators and output written with `write` are compressed
+           while they are sent.
         """
         if query:
             return self.use_HTTP_content_compression
@@ -606,11 +643,14 @@ class HTTPBaseResponse(BaseResponse):
             # compression is off
             self.use_HTTP_content_compression = 0
 
-        elif (force or
-              (REQUEST.get('HTTP_ACCEPT_ENCODING', '').find('gzip') != -1)):
+        else:
+            coding = compression.negotiate(
+                REQUEST.get('HTTP_ACCEPT_ENCODING', ''))
             if force:
+                self._content_coding = coding or 'gzip'
                 self.use_HTTP_content_compression = 2
-            else:
+            elif coding is not None:
+                self._content_coding = coding
                 self.use_HTTP_content_compression = 1
 
         return self.use_HTTP_content_compression
@@ -971,6 +1011,8 @@ class WSGIResponse(HTTPBaseResponse):
     _streaming = 0
     _http_version = None
     _server_version = None
+    # The encoder compressing the body while it is streamed.
+    _content_encoder = None
 
     # Append any "cleanup" functions to this list.
     after_list = ()
@@ -1068,30 +1110,108 @@ class WSGIResponse(HTTPBaseResponse):
         This allows the browser to display partial results while
         computation of a response proceeds.
         """
+        start = getattr(self.stdout, 'start', None)
         if not self._streaming:
             notify(pubevents.PubBeforeStreaming(self))
+            encoder = self._getContentEncoder()
+            if encoder is not None:
+                self._content_encoder = encoder
+                self._startEncoding(encoder)
             self._streaming = 1
+            if start is not None:
+                # The output stream forwards data to the WSGI server as it
+                # is written, so the headers have to go out first.
+                start(*self.finalize())
             self.stdout.flush()
 
+        encoder = self._content_encoder
+        if encoder is not None:
+            data = encoder.compress(data)
+            if start is not None:
+                # Send what was written so far instead of waiting for
+                # the compressor to fill a block.
+                data += encoder.flush()
+            if not data:
+                return
         self.stdout.write(data)
 
+    def _getContentEncoder(self, size=None):
+        # Once streaming started, the body has to be sent as announced
+        # by the headers.
+        if self._streaming:
+            return None
+        return super(WSGIResponse, self)._getContentEncoder(size)
+
+    def _startEncoding(self, encoder):
+        self._setContentEncoding(encoder.name)
+        if 'content-length' in self.headers:
+            del self.headers['content-length']
+
+    def _finishStreaming(self):
+        """Return the chunks of the body which follow the data written
+        to the output stream.
+
+        If the written data was compressed, the body is compressed with
+        the same encoder and the end of the compressed data is added.
+        """
+        body = self.body
+        encoder = self._content_encoder
+        if encoder is None:
+            if isinstance(body, bytes):
+                yield body
+            else:
+                try:
+                    for chunk in body:
+                        yield chunk
+                finally:
+                    getattr(body, 'close', lambda: None)()
+            return
+        if isinstance(body, bytes):
+            yield encoder.compress(body)
+        else:
+            try:
+                for chunk in body:
+                    yield encoder.compress(chunk)
+            finally:
+                getattr(body, 'close', lambda: None)()
+        yield encoder.finish()
+
     def setBody(self, body, title='', is_error=False):
         if isinstance(body, IOBase):
             body.seek(0, 2)
             length = body.tell()
             body.seek(0)
-            self.setHeader('Content-Length', '%d' % length)
-            self.body = body
+            encoder = self._getContentEncoder(length)
+            if encoder is None:
+                self.setHeader('Content-Length', '%d' % length)
+                self.body = body
+            else:
+                self._setEncodingIterator(body, encoder)
         elif IStreamIterator.providedBy(body):
-            self.body = body
+            encoder = self._getContentEncoder(len(body))
+            if encoder is None:
+                self.body = body
+            else:
+                self._setEncodingIterator(body, encoder)
             super(WSGIResponse, self).setBody(b'', title, is_error)
         elif IUnboundStreamIterator.providedBy(body):
-            self.body = body
-            self._streaming = 1
+            encoder = self._getContentEncoder()
+            if encoder is None:
+                self.body = body
+                self._streaming = 1
+            else:
+                self._setEncodingIterator(body, encoder)
             super(WSGIResponse, self).setBody(b'', title, is_error)
         else:
             super(WSGIResponse, self).setBody(body, title, is_error)
 
+    def _setEncodingIterator(self, body, encoder):
+        # The compressed size is not known in advance, so the body is
+        # streamed without a Content-Length.
+        self._startEncoding(encoder)
+        self.body = compression.EncodingIterator(body, encoder)
+        self._streaming = 1
+
     def __bytes__(self):
         raise NotImplementedError
 
@@ -12,10 +12,12 @@
 ##############################################################################
 """ Python Object Publisher -- Publish Python objects on web servers
 """
+from collections import deque
 from contextlib import contextmanager, closing
 from io import BytesIO
 from io import IOBase
 import sys
+import threading
 
 from AccessControl.SecurityManagement import newSecurityManager
 from AccessControl.SecurityManagement import noSecurityManager
@@ -48,6 +50,8 @@ else:
 
 _DEFAULT_DEBUG_MODE = False
 _DEFAULT_REALM = None
+_DEFAULT_STREAMING = False
+_DEFAULT_STREAM_BUFFER_SIZE = 1 << 20
 _MODULE_LOCK = allocate_lock()
 _MODULES = {}
 
@@ -80,6 +84,13 @@ def set_default_authentication_realm(realm):
     _DEFAULT_REALM = realm
 
 
+def set_default_streaming(streaming, buffer_size=None):
+    global _DEFAULT_STREAMING, _DEFAULT_STREAM_BUFFER_SIZE
+    _DEFAULT_STREAMING = streaming
+    if buffer_size is not None:
+        _DEFAULT_STREAM_BUFFER_SIZE = buffer_size
+
+
 def get_module_info(module_name='Zope2'):
     global _MODULES
     info = _MODULES.get(module_name)
@@ -224,6 +235,179 @@ def load_app(module_info):
         app._p_jar.close()
 
 
+class ResponseStream(object):
+    """Bounded hand-off of streamed output to the WSGI server.
+
+    The publishing thread uses it as the ``stdout`` of the response:
+    ``start`` is called with the status and headers once streaming
+    begins and ``write`` blocks while more than ``buffer_size`` bytes
+    are waiting to be sent. The WSGI server iterates over it to pull the
+    body in the order it was written.
+    """
+
+    def __init__(self, buffer_size=None):
+        if buffer_size is None:
+            buffer_size = _DEFAULT_STREAM_BUFFER_SIZE
+        self.buffer_size = buffer_size
+        self._cond = threading.Condition()
+        self._chunks = deque()
+        self._buffered = 0
+        self._started = None
+        self._exc_info = None
+        self._done = False
+        self._closed = False
+
+    @property
+    def started(self):
+        return self._started is not None
+
+    # Called from the publishing thread.
+
+    def start(self, status, headers, result=None):
+        with self._cond:
+            self._started = (status, headers,
+                             self if result is None else result)
+            self._cond.notify_all()
+
+    def write(self, data):
+        if not data:
+            return
+        with self._cond:
+            while (self._buffered >= self.buffer_size and
+                   not self._closed):
+                self._cond.wait()
+            if self._closed:
+                raise IOError('The client closed the connection.')
+            self._chunks.append(data)
+            self._buffered += len(data)
+            self._cond.notify_all()
+
+    def flush(self):
+        pass
+
+    def fail(self, exc_info):
+        with self._cond:
+            self._exc_info = exc_info
+            self._done = True
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self._done = True
+            self._cond.notify_all()
+
+    # Called from the WSGI server thread.
+
+    def wait(self):
+        """Wait for the response to start and return the status, the
+        headers and the result iterable.
+        """
+        with self._cond:
+            while self._started is None and not self._done:
+                self._cond.wait()
+            if self._started is None:
+                exc_info, self._exc_info = self._exc_info, None
+                try:
+                    reraise(*exc_info)
+                finally:
+                    del exc_info
+            return self._started
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._cond:
+            while not self._chunks and not self._done:
+                self._cond.wait()
+            if self._chunks:
+                data = self._chunks.popleft()
+                self._buffered -= len(data)
+                self._cond.notify_all()
+                return data
+            if self._exc_info is not None:
+                exc_info, self._exc_info = self._exc_info, None
+                try:
+                    reraise(*exc_info)
+                finally:
+                    del exc_info
+            raise StopIteration
+
+    next = __next__
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._chunks.clear()
+            self._buffered = 0
+            self._cond.notify_all()
+
+
+def _publish_with_retry(request, response, module_info, _publish):
+    for i in range(getattr(request, 'retry_max_count', 3) + 1):
+        setRequest(request)
+        try:
+            with load_app(module_info) as new_mod_info:
+                with transaction_pubevents(request, response):
+                    response = _publish(request, new_mod_info)
+            break
+        except (ConflictError, TransientError) as exc:
+            # Output which already went to the client can't be retracted.
+            streamed = (isinstance(response.stdout, ResponseStream) and
+                        response.stdout.started)
+            if request.supports_retry() and not streamed:
+                new_request = request.retry()
+                request.close()
+                request = new_request
+                response = new_request.response
+            else:
+                raise
+        finally:
+            request.close()
+            clearRequest()
+    return response
+
+
+def _publish_streaming(start_response, response, request, module_info,
+                       _publish):
+    stream = response.stdout
+
+    def run():
+        try:
+            with closing(response.stderr):
+                new_response = _publish_with_retry(
+                    request, response, module_info, _publish)
+                body = new_response.body
+                if stream.started:
+                    # Streaming has started, what is left of the body is
+                    # appended to the output written so far.
+                    for chunk in new_response._finishStreaming():
+                        stream.write(chunk)
+                else:
+                    status, headers = new_response.finalize()
+                    if (isinstance(body, _FILE_TYPES) or
+                            IUnboundStreamIterator.providedBy(body)):
+                        result = body
+                    else:
+                        result = (body, )
+                    stream.start(status, headers, result)
+
+                for func in new_response.after_list:
+                    func()
+        except BaseException:
+            stream.fail(sys.exc_info())
+        else:
+            stream.finish()
+
+    thread = threading.Thread(target=run, name='ZPublisher streaming')
+    thread.daemon = True
+    thread.start()
+
+    status, headers, result = stream.wait()
+    start_response(status, headers)
+    return result
+
+
 def publish_module(environ, start_response,
                    _publish=publish,  # only for testing
                    _response=None,
@@ -234,6 +418,21 @@ def publish_module(environ, start_response,
     module_info = get_module_info(_module_name)
     result = ()
 
+    if _DEFAULT_STREAMING:
+        stream = ResponseStream()
+        if _response is not None:
+            response = _response
+            response.stdout = stream
+        else:
+            response = _response_factory(stdout=stream, stderr=BytesIO())
+        response._http_version = environ['SERVER_PROTOCOL'].split('/')[1]
+        response._server_version = environ.get('SERVER_SOFTWARE')
+
+        request = (_request if _request is not None else
+                   _request_factory(environ['wsgi.input'], environ, response))
+        return _publish_streaming(start_response, response, request,
+                                  module_info, _publish)
+
     with closing(BytesIO()) as stdout, closing(BytesIO()) as stderr:
         response = (_response if _response is not None else
                     _response_factory(stdout=stdout, stderr=stderr))
@@ -243,30 +442,19 @@ def publish_module(environ, start_response,
         request = (_request if _request is not None else
                    _request_factory(environ['wsgi.input'], environ, response))
 
-        for i in range(getattr(request, 'retry_max_count', 3) + 1):
-            setRequest(request)
-            try:
-                with load_app(module_info) as new_mod_info:
-                    with transaction_pubevents(request, response):
-                        response = _publish(request, new_mod_info)
-                break
-            except (ConflictError, TransientError) as exc:
-                if request.supports_retry():
-                    new_request = request.retry()
-                    request.close()
-                    request = new_request
-                    response = new_request.response
-                else:
-                    raise
-            finally:
-                request.close()
-                clearRequest()
+        response = _publish_with_retry(request, response, module_info,
+                                       _publish)
 
         # Start the WSGI server response
         status, headers = response.finalize()
         start_response(status, headers)
 
-        if (isinstance(response.body, _FILE_TYPES) or
+        if getattr(response, '_content_encoder', None) is not None:
+            # The data written with response.write was compressed, the
+            # body has to be compressed with the same encoder.
+            result = [stdout.getvalue()]
+            result.extend(response._finishStreaming())
+        elif (isinstance(response.body, _FILE_TYPES) or
                 IUnboundStreamIterator.providedBy(response.body)):
             result = response.body
         else:
@@ -0,0 +1,191 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""HTTP content encoding of response bodies.
+
+The encoders compress a body chunk by chunk, so streamed bodies are
+compressed while they are sent instead of being held in memory.
+The 'br' coding is only offered if the `brotli` package is installed.
+"""
+
+from functools import partial
+import zlib
+
+from zope.interface import implementer
+
+from ZPublisher.Iterators import IUnboundStreamIterator
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies of less bytes are not compressed.
+minimum_size = 200
+
+# Content types which are not compressed, either a major type like
+# 'image' or a full type like 'application/zip'.
+excluded_types = ('image', )
+
+
+class GzipEncoder(object):
+    """Compress to the gzip format."""
+
+    name = 'gzip'
+    wbits = 16 + zlib.MAX_WBITS
+
+    def __init__(self, level=6):
+        self._compressor = zlib.compressobj(
+            level, zlib.DEFLATED, self.wbits, zlib.DEF_MEM_LEVEL, 0)
+
+    def compress(self, data):
+        """Return the compressed data available so far."""
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """Return all pending compressed data, without ending the stream.
+        """
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """Return the rest of the compressed data."""
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class DeflateEncoder(GzipEncoder):
+    """Compress to the zlib format, which HTTP calls 'deflate'."""
+
+    name = 'deflate'
+    wbits = zlib.MAX_WBITS
+
+
+class BrotliEncoder(object):
+    """Compress to the brotli format."""
+
+    name = 'br'
+
+    def __init__(self, quality=5):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+encoders = {
+    'gzip': GzipEncoder,
+    'deflate': DeflateEncoder,
+}
+if brotli is not None:
+    encoders['br'] = BrotliEncoder
+
+# The codings in the order they are preferred at equal quality.
+preferred_codings = ('br', 'gzip', 'deflate')
+
+
+def negotiate(accept_encoding):
+    """Return the name of the preferred available content coding
+    accepted according to an Accept-Encoding header, or None.
+    """
+    qualities = {}
+    for item in accept_encoding.split(','):
+        parts = item.split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        if coding == 'x-gzip':
+            coding = 'gzip'
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    default = qualities.get('*', 0.0)
+    best = None
+    best_quality = 0.0
+    for coding in preferred_codings:
+        if coding in encoders:
+            quality = qualities.get(coding, default)
+            if quality > best_quality:
+                best = coding
+                best_quality = quality
+    return best
+
+
+def getEncoder(coding):
+    """Return a new encoder for the content coding `coding`."""
+    return encoders[coding]()
+
+
+def isCompressible(content_type, size=None):
+    """Check the content type and, if known, the size of a body against
+    `excluded_types` and `minimum_size`.
+    """
+    if size is not None and size < minimum_size:
+        return False
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    major = content_type.split('/')[0]
+    for excluded in excluded_types:
+        if excluded in (content_type, major):
+            return False
+    return True
+
+
+@implementer(IUnboundStreamIterator)
+class EncodingIterator(object):
+    """Compress the chunks of a body as they are iterated over.
+
+    The body is an iterable of bytes or a file which is read in chunks
+    of `chunk_size` bytes. It is closed when the iterator is closed.
+    """
+
+    def __init__(self, body, encoder, chunk_size=1 << 16):
+        self._body = body
+        self._encoder = encoder
+        if (IUnboundStreamIterator.providedBy(body) or
+                not hasattr(body, 'read')):
+            self._chunks = iter(body)
+        else:
+            self._chunks = iter(partial(body.read, chunk_size), b'')
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        encoder = self._encoder
+        while not self._done:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._done = True
+                return encoder.finish()
+            data = encoder.compress(chunk)
+            if data:
+                return data
+        raise StopIteration
+
+    next = __next__
+
+    def close(self):
+        close = getattr(self._body, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,97 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Compare the recursive and the iterative Cookie header parser.
+
+Usage: python -m ZPublisher.tests.bench_cookie [header size in KB ...]
+
+The header sizes default to 1, 4, 8 and 64 KB. The headers mix quoted,
+unquoted and valueless cookies like the ones set by analytics scripts.
+"""
+
+import sys
+import timeit
+
+from six.moves.urllib.parse import unquote
+
+
+def make_header(size):
+    cookies = []
+    length = 0
+    i = 0
+    while length < size:
+        if i % 3 == 0:
+            cookie = '_ga_%d=GA1.2.%d.1500000000' % (i, i * 7919)
+        elif i % 3 == 1:
+            cookie = 'pref%d="lang=en&theme=dark"' % i
+        else:
+            cookie = 'flag%d' % i
+        cookies.append(cookie)
+        length += len(cookie) + 2
+        i += 1
+    return '; '.join(cookies)
+
+
+def recursive_parse_cookie(text, result=None):
+    # The parser before it was made iterative.
+    from ZPublisher.HTTPRequest import PARAMLESSRE
+    from ZPublisher.HTTPRequest import PARMRE
+    from ZPublisher.HTTPRequest import QPARMRE
+    if result is None:
+        result = {}
+    mo = QPARMRE.match(text)
+    if mo:
+        value = mo.group(3)
+    else:
+        mo = PARMRE.match(text)
+        if mo:
+            value = mo.group(3)
+        else:
+            mo = PARAMLESSRE.match(text)
+            if not mo:
+                return result
+            value = ''
+    name = mo.group(2)
+    if name not in result:
+        result[name] = unquote(value)
+    return recursive_parse_cookie(text[len(mo.group(1)):], result)
+
+
+def run(size):
+    from ZPublisher.HTTPRequest import parse_cookie
+    header = make_header(size)
+    count = len(parse_cookie(header))
+    number = max(1, (1 << 20) // len(header))
+    for name, func in (('recursive', recursive_parse_cookie),
+                       ('iterative', parse_cookie)):
+        try:
+            best = min(timeit.repeat(lambda: func(header),
+                                     number=number, repeat=5))
+        except RuntimeError:  # RecursionError
+            print('%6d KB %5d cookies  %-9s  recursion limit exceeded' % (
+                size >> 10, count, name))
+            continue
+        print('%6d KB %5d cookies  %-9s %9.3f ms' % (
+            size >> 10, count, name, best / number * 1000))
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    sizes = [int(arg) << 10 for arg in args] or [1 << 10, 4 << 10,
+                                                 8 << 10, 64 << 10]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
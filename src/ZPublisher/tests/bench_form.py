@@ -0,0 +1,108 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Compare eager and lazy form processing of HTTPRequest.
+
+Usage: python -m ZPublisher.tests.bench_form [rows of the huge form]
+
+A typical edit form and a bulk edit form with one record per row are
+processed, and either one field or the whole form is looked up.
+"""
+
+from io import BytesIO
+import sys
+import timeit
+
+from six.moves.urllib.parse import urlencode
+
+
+def typical_form():
+    return [
+        ('title', 'A title'),
+        ('description', 'Some <b>text</b>'),
+        ('size:int', '42'),
+        ('tags:lines', 'one\ntwo\nthree'),
+        ('ids:list', 'a'), ('ids:list', 'b'),
+        ('options.width:record:int', '10'),
+        ('options.height:record:int', '20'),
+        ('enabled:boolean', 'on'),
+        ('enabled:boolean:default', ''),
+        ('manage_edit:method', 'Save'),
+    ]
+
+
+def huge_form(rows):
+    fields = typical_form()
+    for i in range(rows):
+        fields.extend([
+            ('ids:list', 'item%d' % i),
+            ('rows.id:records', 'item%d' % i),
+            ('rows.title:records', 'Item %d' % i),
+            ('rows.position:records:int', str(i)),
+            ('rows.visible:records:boolean', 'on'),
+            ('title_%d' % i, 'Item %d' % i),
+        ])
+    return fields
+
+
+def make_request(body):
+    from ZPublisher.HTTPRequest import HTTPRequest
+    from ZPublisher.HTTPResponse import HTTPResponse
+    environ = {
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'REQUEST_METHOD': 'POST',
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'PATH_INFO': '/folder',
+    }
+    return HTTPRequest(BytesIO(body), environ, HTTPResponse(), clean=1)
+
+
+def run(name, fields, lazy, access):
+    from ZPublisher import HTTPRequest
+    body = urlencode(fields).encode('ascii')
+
+    def process():
+        request = make_request(body)
+        request.processInputs()
+        if access == 'field':
+            request.get('title')
+        else:
+            request.form
+        request.clear()
+
+    orig = HTTPRequest.lazy_form_processing
+    HTTPRequest.lazy_form_processing = lazy
+    try:
+        number = max(1, 20000 // len(fields))
+        best = min(timeit.repeat(process, number=number, repeat=5))
+    finally:
+        HTTPRequest.lazy_form_processing = orig
+    print('%-8s %5d fields  %-5s %-6s %9.3f ms' % (
+        name, len(fields), lazy and 'lazy' or 'eager', access,
+        best / number * 1000))
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    rows = int(args[0]) if args else 1000
+    for name, fields in (('typical', typical_form()),
+                         ('huge', huge_form(rows))):
+        for access in ('field', 'form'):
+            for lazy in (False, True):
+                run(name, fields, lazy, access)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Compare ZopeFieldStorage and ZopeMultipartForm on a large file upload.
+
+Usage: python -m ZPublisher.tests.bench_multipart [size in MB]
+
+The upload defaults to 1024 MB of random data. It is generated while it is
+read, so only the spooled copy of the upload needs disk space.
+"""
+
+import os
+import sys
+import time
+
+BOUNDARY = b'----------bench-multipart-boundary'
+BLOCK_SIZE = 1 << 20
+
+
+class UploadStream(object):
+    """A file-like multipart/form-data body of `size` bytes of data."""
+
+    def __init__(self, size):
+        block = os.urandom(BLOCK_SIZE)
+        while BOUNDARY in block + block:
+            block = os.urandom(BLOCK_SIZE)
+        self.block = block
+        self.head = (
+            b'--' + BOUNDARY + b'\r\n'
+            b'Content-Disposition: form-data; name="title"\r\n\r\n'
+            b'Benchmark\r\n'
+            b'--' + BOUNDARY + b'\r\n'
+            b'Content-Disposition: form-data; name="file"; '
+            b'filename="upload.bin"\r\n'
+            b'Content-Type: application/octet-stream\r\n\r\n')
+        self.tail = b'\r\n--' + BOUNDARY + b'--\r\n'
+        self.size = size
+        self.length = len(self.head) + size + len(self.tail)
+        self.pos = 0
+
+    def _get(self, pos, size):
+        # Return up to size bytes at pos without crossing a segment.
+        head = len(self.head)
+        if pos < head:
+            return self.head[pos:pos + size]
+        pos -= head
+        if pos < self.size:
+            offset = pos % BLOCK_SIZE
+            size = min(size, self.size - pos, BLOCK_SIZE - offset)
+            return self.block[offset:offset + size]
+        pos -= self.size
+        return self.tail[pos:pos + size]
+
+    def read(self, size=-1):
+        if size < 0:
+            size = self.length - self.pos
+        result = []
+        while size > 0 and self.pos < self.length:
+            data = self._get(self.pos, size)
+            self.pos += len(data)
+            size -= len(data)
+            result.append(data)
+        return b''.join(result)
+
+    def readline(self, size=-1):
+        if size < 0:
+            size = self.length - self.pos
+        result = []
+        while size > 0 and self.pos < self.length:
+            data = self._get(self.pos, size)
+            eol = data.find(b'\n')
+            if eol >= 0:
+                data = data[:eol + 1]
+                size = 0
+            self.pos += len(data)
+            size -= len(data)
+            result.append(data)
+        return b''.join(result)
+
+
+def environ(stream):
+    return {
+        'REQUEST_METHOD': 'POST',
+        'QUERY_STRING': '',
+        'CONTENT_TYPE': 'multipart/form-data; boundary=%s' % (
+            BOUNDARY.decode('ascii'), ),
+        'CONTENT_LENGTH': str(stream.length),
+    }
+
+
+def parse_fieldstorage(stream):
+    from ZPublisher.HTTPRequest import ZopeFieldStorage
+    fs = ZopeFieldStorage(fp=stream, environ=environ(stream),
+                          keep_blank_values=1)
+    return fs, fs.list
+
+
+def parse_multipart(stream):
+    from ZPublisher.HTTPRequest import ZopeMultipartForm
+    from ZPublisher.HTTPRequest import form_memory_limit
+    form = ZopeMultipartForm(stream, environ(stream),
+                             memory_limit=form_memory_limit)
+    return form, form.list
+
+
+def run(name, parse, size):
+    stream = UploadStream(size)
+    start = time.time()
+    form, fields = parse(stream)
+    elapsed = time.time() - start
+    upload = fields[-1].file
+    upload.seek(0, 2)
+    assert upload.tell() == size, (upload.tell(), size)
+    print('%-18s %8.2f s %8.1f MB/s' % (
+        name, elapsed, size / float(1 << 20) / elapsed))
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    size = int(args[0]) if args else 1024
+    print('Parsing a %d MB upload' % size)
+    size = size << 20
+    run('FieldStorage', parse_fieldstorage, size)
+    run('ZopeMultipartForm', parse_multipart, size)
+
+
+if __name__ == '__main__':
+    main()
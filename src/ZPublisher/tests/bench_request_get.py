@@ -0,0 +1,110 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Time HTTPRequest.get for the kinds of keys and in a page template.
+
+Usage: python -m ZPublisher.tests.bench_request_get [rows]
+
+First single keys are looked up before traversal is done, so URLn and
+BASEn are not stored in request.other. Then a page template rendering a
+listing of `rows` rows (100 by default) looks up URLs, form fields,
+headers and missing keys in the request for every row.
+"""
+
+from io import BytesIO
+import sys
+import timeit
+
+ENVIRON = {
+    'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '8080',
+    'REQUEST_METHOD': 'GET',
+    'SCRIPT_NAME': '',
+    'PATH_INFO': '/site/folder/listing',
+    'QUERY_STRING': 'b_start=20&sort_on=title',
+    'HTTP_ACCEPT_LANGUAGE': 'en',
+    'HTTP_COOKIE': '__ac=secret; lang=en',
+}
+
+KEYS = ('URL1', 'URLPATH2', 'BASE2', 'HTTP_ACCEPT_LANGUAGE', 'SERVER_NAME',
+        'sort_on', 'REQUEST', 'missing', '__conform__')
+
+TEMPLATE = '''\
+<html><body><table>
+<tr tal:repeat="i rows">
+ <td><a tal:attributes="href string:${request/URL1}/item${i}"
+        tal:content="string:Item ${i}">Item</a></td>
+ <td tal:content="python:request.get('sort_on', 'id')">sort</td>
+ <td tal:content="request/b_start | nothing">start</td>
+ <td tal:condition="python:request.get('show_details')">details</td>
+ <td tal:content="request/HTTP_ACCEPT_LANGUAGE">language</td>
+ <td tal:content="python:request['BASEPATH1']">base</td>
+</tr>
+</table></body></html>
+'''
+
+
+def make_request(published=False):
+    from ZPublisher.HTTPRequest import HTTPRequest
+    from ZPublisher.HTTPResponse import HTTPResponse
+    request = HTTPRequest(BytesIO(b''), dict(ENVIRON), HTTPResponse(),
+                          clean=1)
+    request.processInputs()
+    request._steps = ['site', 'folder', 'listing']
+    request._resetURLS()
+    request['PARENTS'] = [None]
+    if published:
+        request['PUBLISHED'] = None
+    return request
+
+
+def run_keys():
+    request = make_request()
+    number = 100000
+    for key in KEYS:
+        best = min(timeit.repeat(lambda: request.get(key),
+                                 number=number, repeat=5))
+        print('%-28s %8.0f ns' % ('get(%r)' % key, best / number * 1e9))
+
+
+def run_template(rows):
+    from zope.component import provideAdapter
+    from zope.interface import Interface
+    from zope.traversing.adapters import DefaultTraversable
+    from zope.traversing.interfaces import ITraversable
+    from Products.PageTemplates.PageTemplate import PageTemplate
+    provideAdapter(DefaultTraversable, (Interface, ), ITraversable)
+
+    template = PageTemplate()
+    template.write(TEMPLATE)
+    rows = range(rows)
+
+    def render():
+        request = make_request(published=True)
+        template.pt_render(extra_context={'request': request, 'rows': rows})
+
+    number = 20
+    best = min(timeit.repeat(render, number=number, repeat=5))
+    print('%-28s %8.3f ms' % ('render %d rows' % len(rows),
+                              best / number * 1000))
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    rows = int(args[0]) if args else 100
+    run_keys()
+    run_template(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Time HTTPResponse.setBody on generated HTML pages.
+
+Usage: python -m ZPublisher.tests.bench_setbody [size in KB ...]
+
+The sizes default to 10 KB, 1 MB and 20 MB. Each page is set as the body
+of a response without a content type and with a base, so its content
+type is sniffed and a base tag is inserted. For comparison, the same is
+done on the decoded body, as setBody did before.
+"""
+
+import sys
+import timeit
+
+try:
+    from html import escape
+except ImportError:  # PY2
+    from cgi import escape
+
+ROW = (u'<tr><td class="title">Caf\xe9 %06d</td>'
+       u'<td><a href="item">edit</a></td></tr>\n')
+
+
+def make_page(size):
+    head = u'<!DOCTYPE html>\n<html><head><title>Page</title></head><body>'
+    tail = u'</body></html>'
+    rows = []
+    length = len(head) + len(tail)
+    i = 0
+    while length < size:
+        row = ROW % i
+        rows.append(row)
+        length += len(row)
+        i += 1
+    return (head + u''.join(rows) + tail).encode('utf-8')
+
+
+def make_response():
+    from ZPublisher.HTTPResponse import HTTPResponse
+    response = HTTPResponse()
+    response.setBase('http://localhost/folder/page')
+    return response
+
+
+def decoding_setBody(response, body):
+    # What setBody did before: decode the body to sniff it and again to
+    # insert the base.
+    from ZPublisher.HTTPResponse import base_re_search
+    from ZPublisher.HTTPResponse import start_of_header_search
+    charset = response.charset
+    if response.isHTML(body.decode(charset)):
+        response.setHeader('content-type', 'text/html; charset=%s' % charset)
+    response.body = body
+    response.setHeader('content-length', len(body))
+    text = body.decode(charset)
+    match = start_of_header_search(text)
+    if match is not None and base_re_search(text) is None:
+        index = match.end(0)
+        text = (text[:index] + '\n<base href="' +
+                escape(response.base, True) + '" />\n' + text[index:])
+        response.body = text.encode(charset)
+        response.setHeader('content-length', len(response.body))
+
+
+def run(size):
+    body = make_page(size)
+    number = max(1, (1 << 22) // len(body))
+
+    def single_pass():
+        make_response().setBody(body)
+
+    def decoding():
+        decoding_setBody(make_response(), body)
+
+    for name, func in (('decoding', decoding), ('setBody', single_pass)):
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print('%8d KB  %-9s %10.3f ms' % (
+            len(body) // 1024, name, best / number * 1000))
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    sizes = [int(arg) << 10 for arg in args] or [10 << 10, 1 << 20, 20 << 20]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
@@ -1159,6 +1159,40 @@ class HTTPRequestTests(unittest.TestCase, HTTPRequestFactoryMixin):
                          '{"intkey":123,"stringkey":"blah"}')
         self.assertEqual(req.cookies['anothercookie'], 'boring')
 
+    def test_parse_cookie_many_cookies(self):
+        from ZPublisher.HTTPRequest import parse_cookie
+        text = '; '.join('c%d="v %d"' % (i, i) for i in range(5000))
+        result = parse_cookie(text)
+        self.assertEqual(len(result), 5000)
+        self.assertEqual(result['c4999'], 'v 4999')
+
+    def test_parse_cookie_first_cookie_wins(self):
+        from ZPublisher.HTTPRequest import parse_cookie
+        self.assertEqual(parse_cookie('a=1; b=2; a=3, c'),
+                         {'a': '1', 'b': '2'})
+        self.assertEqual(parse_cookie('a=1; b=2; a=3; c;'),
+                         {'a': '1', 'b': '2', 'c': ''})
+        self.assertEqual(parse_cookie(''), {})
+
+    def test_cookies_parsed_on_first_access(self):
+        from AccessControl.tainted import TaintedString
+        env = {'SERVER_NAME': 'testingharnas', 'SERVER_PORT': '80',
+               'HTTP_COOKIE': 'foo=bar; evil=<script>'}
+        req = self._makeOne(environ=env)
+        self.assertEqual(req._cookies, None)
+        self.assertEqual(req.get('foo'), 'bar')
+        self.assertEqual(req._cookies['foo'], 'bar')
+        self.assertEqual(req.taintedcookies['evil'], '<script>')
+        self.assertTrue(isinstance(req.taintedcookies['evil'], TaintedString))
+
+    def test_cookies_set(self):
+        env = {'SERVER_NAME': 'testingharnas', 'SERVER_PORT': '80',
+               'HTTP_COOKIE': 'evil=<script>'}
+        req = self._makeOne(environ=env)
+        req.cookies = {'foo': 'bar'}
+        self.assertEqual(req.cookies, {'foo': 'bar'})
+        self.assertEqual(req.taintedcookies['evil'], '<script>')
+
     def test_getVirtualRoot(self):
         # https://bugs.launchpad.net/zope2/+bug/193122
         req = self._makeOne()
@@ -1169,6 +1203,246 @@ class HTTPRequestTests(unittest.TestCase, HTTPRequestFactoryMixin):
         req._script = ['foo', 'bar']
         self.assertEqual(req.getVirtualRoot(), '/foo/bar')
 
+    def test_get_URLn_BASEn(self):
+        env = {'SERVER_NAME': 'example.com', 'SERVER_PORT': '80',
+               'SCRIPT_NAME': '/app'}
+        req = self._makeOne(environ=env)
+        req._steps = ['a', 'b']
+        self.assertEqual(req['URL0'], 'http://example.com/app/a/b')
+        self.assertEqual(req['URL1'], 'http://example.com/app/a')
+        self.assertEqual(req['URL3'], 'http://example.com')
+        self.assertEqual(req['URLPATH1'], '/app/a')
+        self.assertEqual(req['URLPATH3'], '')
+        self.assertRaises(KeyError, req.__getitem__, 'URL4')
+        self.assertEqual(req['BASE0'], 'http://example.com')
+        self.assertEqual(req['BASE1'], 'http://example.com/app')
+        self.assertEqual(req['BASE2'], 'http://example.com/app/a')
+        self.assertEqual(req['BASEPATH3'], '/app/a/b')
+        self.assertRaises(KeyError, req.__getitem__, 'BASE4')
+
+        # A traversal step was added.
+        req._steps.append('c')
+        self.assertEqual(req['URL1'], 'http://example.com/app/a/b')
+        self.assertEqual(req['BASE4'], 'http://example.com/app/a/b/c')
+
+        req.setServerURL(hostname='example.org')
+        self.assertEqual(req['URL1'], 'http://example.org/app/a/b')
+
+        req['PARENTS'] = [None]
+        req['PUBLISHED'] = None
+        self.assertEqual(req['URL2'], 'http://example.org/app/a')
+        self.assertEqual(req.other['URL2'], 'http://example.org/app/a')
+        req.setServerURL(hostname='example.net')
+        self.assertFalse('URL2' in req.other)
+        self.assertEqual(req['URL2'], 'http://example.net/app/a')
+
+    def test_get_URLn_virtual_root(self):
+        from OFS.SimpleItem import SimpleItem
+        env = {'SERVER_NAME': 'example.com', 'SERVER_PORT': '80'}
+        req = self._makeOne(environ=env)
+        req._steps = ['a', 'b']
+        self.assertEqual(req['URL1'], 'http://example.com/a')
+        root = SimpleItem()
+        root.getPhysicalPath = lambda: ('', 'a')
+        req['PARENTS'] = [root]
+        req.setVirtualRoot('/site')
+        self.assertEqual(req['URL0'], 'http://example.com/site')
+        self.assertEqual(req['BASEPATH1'], '/site')
+        req._steps.append('c')
+        self.assertEqual(req['URL0'], 'http://example.com/site/c')
+
+    def test_physicalPathToURL(self):
+        from OFS.SimpleItem import SimpleItem
+        env = {'SERVER_NAME': 'example.com', 'SERVER_PORT': '80'}
+        req = self._makeOne(environ=env)
+        self.assertEqual(req.physicalPathToURL(('',)), 'http://example.com')
+        self.assertEqual(req.physicalPathToURL(('', 'a b', 'c')),
+                         'http://example.com/a%20b/c')
+        self.assertEqual(req.physicalPathToURL(('', 'a b', 'd'), 1),
+                         '/a%20b/d')
+        self.assertEqual(req.physicalPathToURL(['', 'a', 'c']),
+                         'http://example.com/a/c')
+        root = SimpleItem()
+        root.getPhysicalPath = lambda: ('', 'a', 'b')
+        req['PARENTS'] = [root]
+        req.setVirtualRoot('/site')
+        # The URLs of a path and its items are computed again, the items
+        # of a prefix of the virtual root match more of it.
+        self.assertEqual(req.physicalPathToURL(('', 'a')),
+                         'http://example.com/site')
+        self.assertEqual(req.physicalPathToURL(('', 'a', 'b')),
+                         'http://example.com/site')
+        self.assertEqual(req.physicalPathToURL(('', 'a', 'b', 'c')),
+                         'http://example.com/site/c')
+        self.assertEqual(req.physicalPathToURL(('', 'a', 'x', 'c')),
+                         'http://example.com/site/x/c')
+        req.setServerURL(hostname='example.org')
+        self.assertEqual(req.physicalPathToURL(('', 'a', 'b', 'c')),
+                         'http://example.org/site/c')
+        self.assertEqual(req.physicalPathToURL(('', 'a', 'b', 'c'), 1),
+                         '/site/c')
+
+    def test_get_key_kinds(self):
+        env = {'SERVER_NAME': 'example.com', 'SERVER_PORT': '80',
+               'HTTP_X_TEST': 'header'}
+        req = self._makeOne(environ=env)
+        req.form['URLX'] = 'form'
+        req.form['BODY'] = 'body'
+        self.assertEqual(req.get('URLX'), 'form')
+        self.assertEqual(req.get('BODY'), 'body')
+        self.assertEqual(req.get('HTTP_X_TEST'), 'header')
+        self.assertEqual(req.get('HTTP_X_MISSING'), '')
+        self.assertTrue(req.get('REQUEST') is req)
+        self.assertEqual(req.get('missing', 'default'), 'default')
+
+
+class LazyHTTPRequestTests(HTTPRequestTests):
+    # Run all HTTPRequest tests again with lazy form processing.
+
+    def setUp(self):
+        from ZPublisher import HTTPRequest
+        self._lazy_form_processing = HTTPRequest.lazy_form_processing
+        HTTPRequest.lazy_form_processing = True
+
+    def tearDown(self):
+        from ZPublisher import HTTPRequest
+        HTTPRequest.lazy_form_processing = self._lazy_form_processing
+        cleanUp()
+
+    def _makeLazy(self, query_string, **kw):
+        env = {'SERVER_NAME': 'testingharnas', 'SERVER_PORT': '80',
+               'QUERY_STRING': query_string}
+        env.update(kw)
+        req = self._makeOne(environ=env)
+        req.processInputs()
+        return req
+
+    def test_fields_marshalled_on_lookup(self):
+        req = self._makeLazy('num:int=abc&name=x')
+        self.assertEqual(req._form, {})
+        self.assertEqual(req.get('name'), 'x')
+        self.assertEqual(req._form, {'name': 'x'})
+        self.assertRaises(ValueError, req.get, 'num')
+
+    def test_record_fields_marshalled_together(self):
+        req = self._makeLazy('rec.a:record=1&rec.b:int:record=2&other=3')
+        rec = req['rec']
+        self.assertEqual((rec.a, rec.b), ('1', 2))
+        self.assertEqual(list(req._pending_fields.keys()), ['other'])
+        self.assertEqual(req.form['other'], '3')
+        self.assertFalse(req._pending_fields)
+
+    def test_tainted_lookup(self):
+        req = self._makeLazy('tag=%3Cb%3E&name=x')
+        tainted = req.get('tag', returnTaints=1)
+        self.assertTrue(self._valueIsOrHoldsTainted(tainted))
+        self.assertEqual(list(req._taintedform.keys()), ['tag'])
+
+    def test_method_without_marshalling(self):
+        req = self._makeLazy('edit:method=Save&num:int=abc',
+                             PATH_INFO='/folder/')
+        self.assertEqual(req.other['PATH_INFO'], '/folder/edit')
+        self.assertEqual(req._form, {})
+
+    def test_form_assignment_keeps_taints(self):
+        req = self._makeLazy('tag=%3Cb%3E')
+        req.form = {}
+        self.assertEqual(list(req.taintedform.keys()), ['tag'])
+
+    def test_clear_drops_pending_fields(self):
+        req = self._makeLazy('num:int=abc')
+        req.clear()
+        self.assertEqual(req.form, {})
+
+
+class ZopeMultipartFormTests(unittest.TestCase):
+
+    def _makeOne(self, body, **kw):
+        from ZPublisher.HTTPRequest import ZopeMultipartForm
+        environ = TEST_POST_ENVIRON.copy()
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['QUERY_STRING'] = kw.pop('query_string', '')
+        return ZopeMultipartForm(BytesIO(body), environ, **kw)
+
+    def _fields(self, form):
+        result = []
+        for part in form.list:
+            result.append((part.name, part.filename, part.value))
+        return result
+
+    def test_crlf_body(self):
+        form = self._makeOne(TEST_CRLF_DATA)
+        self.assertEqual(self._fields(form), [
+            ('title', None, u'A title'),
+            ('file', 'data.bin', b'line one\r\n--1234 no boundary\r\n'),
+            ('empty', '', b''),
+        ])
+        self.assertEqual(form.list[1].headers['content-type'],
+                         'application/octet-stream')
+
+    def test_lf_body(self):
+        form = self._makeOne(TEST_FILE_DATA)
+        self.assertEqual(self._fields(form),
+                         [('smallfile', 'smallfile', b'test\n')])
+
+    def test_small_chunks(self):
+        expected = self._fields(self._makeOne(TEST_CRLF_DATA))
+        for chunk_size in (1, 2, 3, 7, 13):
+            form = self._makeOne(TEST_CRLF_DATA, chunk_size=chunk_size)
+            self.assertEqual(self._fields(form), expected)
+
+    def test_unterminated_part(self):
+        form = self._makeOne(TEST_LARGEFILE_DATA, chunk_size=100)
+        self.assertEqual(len(form.list[0].value), 4006)
+
+    def test_query_string_fields_first(self):
+        form = self._makeOne(TEST_FILE_DATA, query_string='a=1&b=')
+        self.assertEqual(
+            [(part.name, part.value) for part in form.list[:2]],
+            [('a', u'1'), ('b', u'')])
+        self.assertEqual(form.list[2].name, 'smallfile')
+
+    def test_memory_limit_spools_to_disk(self):
+        form = self._makeOne(TEST_CRLF_DATA, memory_limit=10)
+        title, upload, empty = form.list
+        self.assertIsInstance(title.file, BytesIO)
+        self.assertFalse(isinstance(upload.file, BytesIO))
+        self.assertEqual(upload.file.read(),
+                         b'line one\r\n--1234 no boundary\r\n')
+        self.assertEqual(form.memory_size, 7)
+        self.assertEqual(form.disk_size, 30)
+
+    def test_disk_limit(self):
+        from zExceptions import BadRequest
+        with self.assertRaises(BadRequest):
+            self._makeOne(TEST_CRLF_DATA, memory_limit=10, disk_limit=20)
+
+    def test_invalid_boundary(self):
+        from ZPublisher.HTTPRequest import ZopeMultipartForm
+        environ = {'CONTENT_TYPE': 'multipart/form-data'}
+        with self.assertRaises(ValueError):
+            ZopeMultipartForm(BytesIO(), environ)
+
+    def test_processInputs_memory_limit(self):
+        from ZPublisher import HTTPRequest
+        from ZPublisher.HTTPRequest import FileUpload
+        orig = HTTPRequest.form_memory_limit
+        HTTPRequest.form_memory_limit = 0
+        try:
+            environ = TEST_POST_ENVIRON.copy()
+            environ['CONTENT_LENGTH'] = str(len(TEST_CRLF_DATA))
+            request = HTTPRequestFactoryMixin()._makeOne(
+                stdin=BytesIO(TEST_CRLF_DATA), environ=environ)
+            request.processInputs()
+        finally:
+            HTTPRequest.form_memory_limit = orig
+        self.assertEqual(request.form['title'], 'A title')
+        upload = request.form['file']
+        self.assertIsInstance(upload, FileUpload)
+        self.assertEqual(upload.filename, 'data.bin')
+        self.assertEqual(upload.read(),
+                         b'line one\r\n--1234 no boundary\r\n')
+
 
 class TestHTTPRequestZope3Views(TestRequestViewsBase):
 
@@ -1215,6 +1489,25 @@ test
 --12345--
 '''
 
+TEST_CRLF_DATA = (
+    b'preamble\r\n'
+    b'--12345\r\n'
+    b'Content-Disposition: form-data; name="title"\r\n'
+    b'\r\n'
+    b'A title\r\n'
+    b'--12345\r\n'
+    b'Content-Disposition: form-data; name="file";\r\n'
+    b' filename="data.bin"\r\n'
+    b'Content-Type: application/octet-stream\r\n'
+    b'\r\n'
+    b'line one\r\n--1234 no boundary\r\n\r\n'
+    b'--12345\r\n'
+    b'Content-Disposition: form-data; name="empty"; filename=""\r\n'
+    b'\r\n'
+    b'\r\n'
+    b'--12345--\r\n'
+    b'epilogue')
+
 TEST_LARGEFILE_DATA = b'''
 --12345
 Content-Disposition: form-data; name="largefile"; filename="largefile"
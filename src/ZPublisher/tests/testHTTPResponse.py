@@ -534,6 +534,20 @@ class HTTPResponseTests(unittest.TestCase):
         self.assertEqual(int(response.getHeader('Content-Length')),
                          len(MUNGED))
 
+    def test_insertBase_HTML_other_charset_munged(self):
+        HTML = u'<html><head></head><body>\xe4scii</body></html>'
+        MUNGED = (u'<html><head>\n'
+                  u'<base href="http://example.com/base/" />\n'
+                  u'</head><body>\xe4scii</body></html>')
+        response = self._makeOne()
+        response.setHeader('Content-Type', 'text/html; charset=utf-16')
+        response.body = HTML.encode('utf-16')
+        response.setBase('http://example.com/base/')
+        response.insertBase()
+        self.assertEqual(response.body.decode('utf-16'), MUNGED)
+        self.assertEqual(int(response.getHeader('Content-Length')),
+                         len(MUNGED.encode('utf-16')))
+
     def test_setBody_w_locking(self):
         response = self._makeOne()
         response.setBody(b'BEFORE', lock=True)
@@ -596,6 +610,24 @@ class HTTPResponseTests(unittest.TestCase):
                          'text/html; charset=utf-8')
         self.assertEqual(response.getHeader('Content-Length'), str(len(HTML)))
 
+    def test_setBody_bytes_HTML_sniffed_without_decoding(self):
+        HTML = b'  \n<!DOCTYPE html><p>\xff</p>'
+        response = self._makeOne()
+        response.setBody(HTML)
+        self.assertEqual(response.body, HTML)
+        self.assertEqual(response.getHeader('Content-Type'),
+                         'text/html; charset=utf-8')
+
+    def test_setBody_bytes_HTML_w_base(self):
+        HTML = b'<html><head></head><body>' + b'x' * 1000 + b'</body></html>'
+        response = self._makeOne()
+        response.setBase('http://example.com/base/')
+        response.setBody(HTML)
+        self.assertTrue(response.body.startswith(
+            b'<html><head>\n<base href="http://example.com/base/" />\n'))
+        self.assertEqual(response.getHeader('Content-Length'),
+                         str(len(response.body)))
+
     def test_setBody_object_with_asHTML(self):
         HTML = '<html><head></head><body></body></html>'
 
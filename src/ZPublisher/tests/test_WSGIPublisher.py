@@ -146,6 +146,76 @@ class WSGIResponseTests(unittest.TestCase):
         self.assertEqual(response.getHeader('Content-Length'),
                          '%d' % len(TestStreamIterator.data))
 
+    def _makeCompressing(self, content_type='text/plain'):
+        response = self._makeOne()
+        response.setStatus(200)
+        response.setHeader('Content-Type', content_type)
+        response.enableHTTPCompression({'HTTP_ACCEPT_ENCODING': 'gzip'})
+        return response
+
+    def _decompress(self, chunks):
+        import zlib
+        return zlib.decompress(b''.join(chunks), 16 + zlib.MAX_WBITS)
+
+    def test_setBody_file_compressed(self):
+        from io import BytesIO
+        data = b'x' * 100000
+        response = self._makeCompressing()
+        response.setBody(BytesIO(data))
+        response.finalize()
+        self.assertEqual(response._streaming, 1)
+        self.assertEqual(response.getHeader('Content-Encoding'), 'gzip')
+        self.assertEqual(response.getHeader('Vary'), 'Accept-Encoding')
+        self.assertEqual(response.getHeader('Content-Length'), None)
+        self.assertEqual(self._decompress(response.body), data)
+
+    def test_setBody_small_file_not_compressed(self):
+        from io import BytesIO
+        response = self._makeCompressing()
+        body = BytesIO(b'x' * 10)
+        response.setBody(body)
+        self.assertTrue(response.body is body)
+        self.assertEqual(response.getHeader('Content-Encoding'), None)
+        self.assertEqual(response.getHeader('Content-Length'), '10')
+
+    def test_setBody_image_file_not_compressed(self):
+        from io import BytesIO
+        response = self._makeCompressing('image/png')
+        body = BytesIO(b'x' * 1000)
+        response.setBody(body)
+        self.assertTrue(response.body is body)
+        self.assertEqual(response.getHeader('Content-Encoding'), None)
+
+    def test_setBody_IStreamIterator_compressed(self):
+        from ZPublisher.Iterators import filestream_iterator
+        import tempfile
+        data = b'line\n' * 1000
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            response = self._makeCompressing()
+            response.setBody(filestream_iterator(f.name, 'rb'))
+            response.finalize()
+            self.assertEqual(response._streaming, 1)
+            self.assertEqual(response.getHeader('Content-Length'), None)
+            self.assertEqual(self._decompress(response.body), data)
+            response.body.close()
+
+    def test_write_compressed(self):
+        from io import BytesIO
+        stdout = BytesIO()
+        response = self._makeOne(stdout=stdout)
+        response.setStatus(200)
+        response.setHeader('Content-Type', 'text/plain')
+        response.enableHTTPCompression({'HTTP_ACCEPT_ENCODING': 'gzip'})
+        response.write(b'first ' * 100)
+        response.write(b'second ' * 100)
+        response.setBody(b'rest ' * 100)
+        self.assertEqual(response.getHeader('Content-Encoding'), 'gzip')
+        chunks = [stdout.getvalue()] + list(response._finishStreaming())
+        self.assertEqual(self._decompress(chunks),
+                         b'first ' * 100 + b'second ' * 100 + b'rest ' * 100)
+
     def test___str___raises(self):
         response = self._makeOne()
         response.setBody('TESTING')
@@ -518,6 +588,223 @@ class TestPublishModule(ZopeTestCase):
         self.assertEqual(headers['Location'], 'http://localhost:9/')
 
 
+class TestResponseStream(unittest.TestCase):
+
+    def _makeOne(self, buffer_size=None):
+        from ZPublisher.WSGIPublisher import ResponseStream
+        return ResponseStream(buffer_size)
+
+    def test_wait_returns_started_stream(self):
+        stream = self._makeOne()
+        stream.start('200 OK', [('X-Foo', 'bar')])
+        self.assertEqual(stream.wait(), ('200 OK', [('X-Foo', 'bar')], stream))
+        self.assertTrue(stream.started)
+
+    def test_wait_returns_complete_result(self):
+        stream = self._makeOne()
+        stream.start('200 OK', [], (b'body', ))
+        self.assertEqual(stream.wait(), ('200 OK', [], (b'body', )))
+
+    def test_wait_reraises_failure_before_start(self):
+        import sys
+        stream = self._makeOne()
+        try:
+            raise ValueError('TESTING')
+        except ValueError:
+            stream.fail(sys.exc_info())
+        self.assertRaises(ValueError, stream.wait)
+
+    def test_iteration_yields_written_data(self):
+        stream = self._makeOne()
+        stream.start('200 OK', [])
+        stream.write(b'foo')
+        stream.write(b'')
+        stream.write(b'bar')
+        stream.finish()
+        self.assertEqual(list(stream), [b'foo', b'bar'])
+
+    def test_iteration_reraises_failure_after_written_data(self):
+        import sys
+        stream = self._makeOne()
+        stream.start('200 OK', [])
+        stream.write(b'foo')
+        try:
+            raise ValueError('TESTING')
+        except ValueError:
+            stream.fail(sys.exc_info())
+        self.assertEqual(next(stream), b'foo')
+        self.assertRaises(ValueError, next, stream)
+
+    def test_write_blocks_until_buffer_is_drained(self):
+        import threading
+        stream = self._makeOne(buffer_size=4)
+        written = []
+
+        def produce():
+            for chunk in (b'aaaa', b'bbbb', b'cccc'):
+                stream.write(chunk)
+                written.append(chunk)
+            stream.finish()
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        self.assertEqual(next(stream), b'aaaa')
+        self.assertEqual(list(stream), [b'bbbb', b'cccc'])
+        thread.join()
+        self.assertEqual(written, [b'aaaa', b'bbbb', b'cccc'])
+
+    def test_write_after_close_raises(self):
+        stream = self._makeOne()
+        stream.close()
+        self.assertRaises(IOError, stream.write, b'foo')
+
+
+class TestPublishModuleStreaming(TestPublishModule):
+
+    def setUp(self):
+        from ZPublisher import WSGIPublisher
+        super(TestPublishModuleStreaming, self).setUp()
+        self._old_streaming = WSGIPublisher._DEFAULT_STREAMING
+        WSGIPublisher.set_default_streaming(True)
+
+    def tearDown(self):
+        from ZPublisher import WSGIPublisher
+        WSGIPublisher.set_default_streaming(self._old_streaming)
+        super(TestPublishModuleStreaming, self).tearDown()
+
+    def test_calls_setDefaultSkin(self):
+        from zope.traversing.interfaces import ITraversable
+        from zope.traversing.namespace import view
+
+        class TestView(object):
+            __name__ = 'testing'
+
+            def __init__(self, context, request):
+                pass
+
+            def __call__(self):
+                return 'foobar'
+
+        self._registerView(TestView, 'testing')
+        self._registerView(view, 'view', ITraversable)
+
+        environ = self._makeEnviron(PATH_INFO='/@@testing')
+        self.assertEqual(self._callFUT(environ, noopStartResponse),
+                         (b'foobar', ))
+
+    def test_publish_can_return_new_response(self):
+        _response = DummyResponse()
+        _response.body = b'BODY'
+        _after1 = DummyCallable()
+        _response.after_list = (_after1, )
+        environ = self._makeEnviron()
+        start_response = DummyCallable()
+        _publish = DummyCallable()
+        _publish._result = _response
+        app_iter = self._callFUT(environ, start_response, _publish)
+        self.assertEqual(app_iter, (b'BODY', ))
+        (status, headers), kw = start_response._called_with
+        self.assertEqual(status, '204 No Content')
+        self.assertEqual(_after1._called_with, ((), {}))
+
+    def test_write_starts_response_before_publishing_ends(self):
+        import threading
+        resumed = threading.Event()
+
+        class TestView(object):
+            __name__ = 'testing'
+
+            def __init__(self, context, request):
+                self.request = request
+
+            def __call__(self):
+                response = self.request.response
+                response.setHeader('Content-Type', 'text/plain')
+                response.write(b'first')
+                resumed.wait(10)
+                response.write(b'second')
+                return 'rest'
+
+        from zope.traversing.interfaces import ITraversable
+        from zope.traversing.namespace import view
+        self._registerView(TestView, 'testing')
+        self._registerView(view, 'view', ITraversable)
+
+        environ = self._makeEnviron(PATH_INFO='/@@testing')
+        start_response = DummyCallable()
+        app_iter = self._callFUT(environ, start_response)
+        (status, headers), kw = start_response._called_with
+        self.assertEqual(status, '200 OK')
+        headers = dict(headers)
+        self.assertEqual(headers['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertNotIn('Content-Length', headers)
+        self.assertEqual(next(app_iter), b'first')
+        resumed.set()
+        self.assertEqual(list(app_iter), [b'second', b'rest'])
+
+    def test_exception_view_after_write_is_appended(self):
+        from zope.interface.common.interfaces import IValueError
+
+        class TestView(object):
+            __name__ = 'testing'
+
+            def __init__(self, context, request):
+                self.request = request
+
+            def __call__(self):
+                self.request.response.write(b'first')
+                raise ValueError('TESTING')
+
+        from zope.traversing.interfaces import ITraversable
+        from zope.traversing.namespace import view
+        self._registerView(TestView, 'testing')
+        self._registerView(view, 'view', ITraversable)
+        registerExceptionView(IValueError)
+
+        environ = self._makeEnviron(PATH_INFO='/@@testing')
+        app_iter = self._callFUT(environ, DummyCallable())
+        self.assertEqual(next(app_iter), b'first')
+        self.assertTrue(b''.join(app_iter).startswith(
+            b'Exception View: ValueError'))
+
+    def test_write_compressed_while_streaming(self):
+        import zlib
+
+        class TestView(object):
+            __name__ = 'testing'
+
+            def __init__(self, context, request):
+                self.request = request
+
+            def __call__(self):
+                response = self.request.response
+                response.setHeader('Content-Type', 'text/plain')
+                response.enableHTTPCompression(self.request)
+                response.write(b'first')
+                response.write(b'second')
+                return 'rest'
+
+        from zope.traversing.interfaces import ITraversable
+        from zope.traversing.namespace import view
+        self._registerView(TestView, 'testing')
+        self._registerView(view, 'view', ITraversable)
+
+        environ = self._makeEnviron(PATH_INFO='/@@testing',
+                                    HTTP_ACCEPT_ENCODING='gzip, deflate')
+        start_response = DummyCallable()
+        app_iter = self._callFUT(environ, start_response)
+        (status, headers), kw = start_response._called_with
+        headers = dict(headers)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', headers)
+        # Every write is flushed, so it can be decompressed on its own.
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(next(app_iter)), b'first')
+        self.assertEqual(decompressor.decompress(b''.join(app_iter)),
+                         b'secondrest')
+        self.assertTrue(decompressor.eof)
+
+
 class TestLoadApp(unittest.TestCase):
 
     def _getTarget(self):
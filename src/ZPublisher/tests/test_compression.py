@@ -0,0 +1,91 @@
+import unittest
+import zlib
+
+
+class NegotiateTests(unittest.TestCase):
+
+    def _callFUT(self, accept_encoding):
+        from ZPublisher.compression import negotiate
+        return negotiate(accept_encoding)
+
+    def test_empty(self):
+        self.assertEqual(self._callFUT(''), None)
+
+    def test_gzip(self):
+        self.assertEqual(self._callFUT('gzip'), 'gzip')
+        self.assertEqual(self._callFUT('x-gzip'), 'gzip')
+        self.assertEqual(self._callFUT('deflate, gzip'), 'gzip')
+
+    def test_qualities(self):
+        self.assertEqual(self._callFUT('gzip;q=0.5, deflate'), 'deflate')
+        self.assertEqual(self._callFUT('gzip;q=0, identity'), None)
+        self.assertEqual(self._callFUT('gzip;q=bogus'), None)
+
+    def test_wildcard(self):
+        from ZPublisher.compression import encoders
+        expected = 'br' if 'br' in encoders else 'gzip'
+        self.assertEqual(self._callFUT('*'), expected)
+        self.assertEqual(self._callFUT('*;q=0.5, gzip;q=0'), 'deflate')
+
+    def test_unavailable(self):
+        from ZPublisher import compression
+        if 'br' in compression.encoders:
+            self.assertEqual(self._callFUT('br'), 'br')
+        else:
+            self.assertEqual(self._callFUT('br'), None)
+
+
+class IsCompressibleTests(unittest.TestCase):
+
+    def _callFUT(self, content_type, size=None):
+        from ZPublisher.compression import isCompressible
+        return isCompressible(content_type, size)
+
+    def test_size(self):
+        self.assertFalse(self._callFUT('text/html', 10))
+        self.assertTrue(self._callFUT('text/html', 1000))
+        self.assertTrue(self._callFUT('text/html'))
+
+    def test_excluded_types(self):
+        from ZPublisher import compression
+        self.assertFalse(self._callFUT('image/png'))
+        self.assertTrue(self._callFUT('application/zip'))
+        old = compression.excluded_types
+        compression.excluded_types = ('image', 'application/zip')
+        try:
+            self.assertFalse(self._callFUT('application/zip; x=y'))
+            self.assertTrue(self._callFUT('application/json'))
+        finally:
+            compression.excluded_types = old
+
+
+class EncodingIteratorTests(unittest.TestCase):
+
+    def _makeOne(self, body, coding='gzip', chunk_size=1 << 16):
+        from ZPublisher.compression import EncodingIterator
+        from ZPublisher.compression import getEncoder
+        return EncodingIterator(body, getEncoder(coding), chunk_size)
+
+    def test_interface(self):
+        from ZPublisher.Iterators import IUnboundStreamIterator
+        from zope.interface.verify import verifyObject
+        verifyObject(IUnboundStreamIterator, self._makeOne([]))
+
+    def test_iterable(self):
+        chunks = [b'abc' * 100, b'def' * 100]
+        result = b''.join(self._makeOne(chunks))
+        self.assertEqual(zlib.decompress(result, 16 + zlib.MAX_WBITS),
+                         b''.join(chunks))
+
+    def test_file(self):
+        from io import BytesIO
+        data = b'0123456789' * 10000
+        body = BytesIO(data)
+        iterator = self._makeOne(body, 'deflate', chunk_size=1000)
+        self.assertEqual(zlib.decompress(b''.join(iterator)), data)
+        iterator.close()
+        self.assertTrue(body.closed)
+
+    def test_empty(self):
+        result = b''.join(self._makeOne([]))
+        self.assertEqual(zlib.decompress(result, 16 + zlib.MAX_WBITS), b'')
@@ -46,8 +46,29 @@ class LazyFilter(Lazy):
         if not (skip is None or str(skip) == skip):
             raise TypeError('Skip must be None or a string')
         self._skip = skip
+        # Without a test and skipping, no item is left out, so items can
+        # be looked up by index without accessing the preceding ones.
+        self._direct = (test is None and skip is None and
+                        hasattr(seq, '__len__'))
+
+    def __len__(self):
+        if self._direct:
+            return len(self._seq)
+        return super(LazyFilter, self).__len__()
 
     def __getitem__(self, index):
+        if self._direct:
+            s = self._seq
+            i = index
+            if i < 0:
+                i = len(s) + i
+            if i < 0:
+                raise IndexError(index)
+            try:
+                return guarded_getitem(s, i)
+            except Unauthorized as vv:
+                raise Unauthorized('(item %s): %s' % (index, vv))
+
         data = self._data
         try:
             s = self._seq
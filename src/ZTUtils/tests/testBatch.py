@@ -46,3 +46,16 @@ class BatchTests(unittest.TestCase):
             b = Batch(list(range(bsize)),
                       size=10, start=1, end=0, orphan=3, overlap=0)
             assert length == b.length
+
+    def testLazySequence(self):
+        '''Test that only the batched items are accessed'''
+        from ZTUtils.Lazy import LazyMap
+        accessed = []
+
+        def access(i):
+            accessed.append(i)
+            return i
+        b = Batch(LazyMap(access, list(range(100))), 5, start=50)
+        self.assertEqual(list(b), [50, 51, 52, 53, 54])
+        self.assertEqual(b.sequence_length, 100)
+        self.assertEqual(sorted(accessed), [50, 51, 52, 53, 54, 55])
@@ -72,6 +72,13 @@ def http_realm(value):
     return value
 
 
+def template_cache_directory(value):
+    if value is not None:
+        from Products.PageTemplates import engine
+        engine.setCacheDirectory(value)
+    return value
+
+
 def root_wsgi_handler(cfg):
     # Set environment variables
     for k, v in cfg.environment.items():
@@ -36,6 +36,7 @@ class WSGIStarter(object):
         self.setupPublisher()
         self.setupInterpreter()
         self.startZope()
+        self.setupFileWatch()
         from App.config import getConfiguration
         config = getConfiguration()  # NOQA
         notify(ProcessStarting())
@@ -79,16 +80,32 @@ class WSGIStarter(object):
                     'more\ninformation on locale support.' % locale_id)
 
     def setupPublisher(self):
+        import OFS.Traversable
+        import ZPublisher.compression
         import ZPublisher.HTTPRequest
         from ZPublisher import WSGIPublisher
         WSGIPublisher.set_default_debug_mode(self.cfg.debug_mode)
         WSGIPublisher.set_default_authentication_realm(
             self.cfg.http_realm)
+        WSGIPublisher.set_default_streaming(
+            self.cfg.response_streaming,
+            self.cfg.response_streaming_buffer_size)
         if self.cfg.trusted_proxies:
             mapped = []
             for name in self.cfg.trusted_proxies:
                 mapped.extend(_name_to_ips(name))
             ZPublisher.HTTPRequest.trusted_proxies = tuple(mapped)
+        ZPublisher.HTTPRequest.form_memory_limit = self.cfg.form_memory_limit
+        ZPublisher.HTTPRequest.form_disk_limit = self.cfg.form_disk_limit
+        ZPublisher.HTTPRequest.lazy_form_processing = \
+            self.cfg.lazy_form_processing
+        ZPublisher.compression.minimum_size = \
+            self.cfg.http_compression_minimum_size
+        ZPublisher.compression.excluded_types = tuple(
+            t.strip().lower() for t in self.cfg.http_compression_exclude_types)
+        OFS.Traversable.traversal_cache_enabled = self.cfg.traversal_cache
+        OFS.Traversable.physical_path_cache_enabled = \
+            self.cfg.physical_path_cache
 
     def setupSecurityOptions(self):
         import AccessControl
@@ -99,6 +116,11 @@ class WSGIStarter(object):
             not self.cfg.skip_authentication_checking,
             self.cfg.verbose_security)
 
+    def setupFileWatch(self):
+        if self.cfg.file_watch:
+            from App import filewatch
+            filewatch.start()
+
     def startZope(self):
         # Import Zope
         import Zope2
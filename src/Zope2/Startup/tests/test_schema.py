@@ -119,3 +119,110 @@ class WSGIStartupTestCase(unittest.TestCase):
             default-zpublisher-encoding iso-8859-15
             """)
         self.assertEqual(conf.default_zpublisher_encoding, 'iso-8859-15')
+
+    def test_response_streaming(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertFalse(conf.response_streaming)
+        self.assertEqual(conf.response_streaming_buffer_size, 1 << 20)
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            response-streaming on
+            response-streaming-buffer-size 64KB
+            """)
+        self.assertTrue(conf.response_streaming)
+        self.assertEqual(conf.response_streaming_buffer_size, 1 << 16)
+
+    def test_form_limits(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertEqual(conf.form_memory_limit, 1 << 20)
+        self.assertEqual(conf.form_disk_limit, None)
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            form-memory-limit 64KB
+            form-disk-limit 2GB
+            """)
+        self.assertEqual(conf.form_memory_limit, 1 << 16)
+        self.assertEqual(conf.form_disk_limit, 2 << 30)
+
+    def test_http_compression(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertEqual(conf.http_compression_minimum_size, 200)
+        self.assertEqual(conf.http_compression_exclude_types, ['image'])
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            http-compression-minimum-size 1KB
+            http-compression-exclude-type image
+            http-compression-exclude-type application/zip
+            """)
+        self.assertEqual(conf.http_compression_minimum_size, 1024)
+        self.assertEqual(conf.http_compression_exclude_types,
+                         ['image', 'application/zip'])
+
+    def test_traversal_cache(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertFalse(conf.traversal_cache)
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            traversal-cache on
+            """)
+        self.assertTrue(conf.traversal_cache)
+
+    def test_template_cache_directory(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertEqual(conf.template_cache_directory, None)
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            template-cache-directory <<INSTANCE_HOME>>/var
+            """)
+        self.assertEqual(conf.template_cache_directory, TEMPVAR)
+
+    def test_file_watch(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertFalse(conf.file_watch)
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            file-watch on
+            """)
+        self.assertTrue(conf.file_watch)
+
+    def test_physical_path_cache(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertFalse(conf.physical_path_cache)
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            physical-path-cache on
+            """)
+        self.assertTrue(conf.physical_path_cache)
+
+    def test_lazy_form_processing(self):
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            """)
+        self.assertFalse(conf.lazy_form_processing)
+
+        conf, dummy = self.load_config_text("""\
+            instancehome <<INSTANCE_HOME>>
+            lazy-form-processing on
+            """)
+        self.assertTrue(conf.lazy_form_processing)
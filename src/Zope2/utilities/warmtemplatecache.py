@@ -0,0 +1,162 @@
+##############################################################################
+#
+# Copyright (c) 2017 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+
+"""%(program)s:  Compile page templates into the template cache.
+
+usage:  %(program)s [options] [path ...]
+
+Options:
+-h/--help -- print this help text
+-C/--config -- the configuration file of the instance
+-d/--dir -- the cache directory, by default template-cache-directory
+            of the configuration file
+-z/--zodb -- also compile the Page Templates stored in the ZODB
+
+Each path is a template file or a directory which is searched for .pt
+and .zpt files. They are compiled both the way PageTemplateFile and the
+way ViewPageTemplateFile compile them.
+
+The configuration file is only read if --zodb is given or --dir is not.
+"""
+
+import getopt
+import logging
+import os
+import sys
+
+from Zope2.utilities.finder import ZopeFinder
+
+logger = logging.getLogger('Zope2.utilities.warmtemplatecache')
+
+extensions = ('.pt', '.zpt')
+
+
+def iterTemplateFiles(paths):
+    """Yield the absolute names of the template files found in `paths`.
+    """
+    for path in paths:
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1] in extensions:
+                    yield os.path.join(dirpath, filename)
+
+
+def compileFiles(paths):
+    """Compile the template files found in `paths`, return the number
+    of templates compiled and of errors.
+    """
+    from Products.Five.browser.pagetemplatefile import ViewPageTemplateFile
+    from Products.PageTemplates.PageTemplateFile import PageTemplateFile
+    compiled = errors = 0
+    for filename in iterTemplateFiles(paths):
+        for factory in (PageTemplateFile, ViewPageTemplateFile):
+            try:
+                template = factory(filename)
+                template._cook_check()
+            except Exception:
+                logger.exception('Could not compile %s', filename)
+                errors += 1
+                continue
+            if template._v_errors:
+                errors += 1
+            else:
+                compiled += 1
+    return compiled, errors
+
+
+def compileZODB(app):
+    """Compile the Page Templates stored in the ZODB, return the number
+    of templates compiled and of errors.
+    """
+    compiled = errors = 0
+    for path, ob in app.ZopeFind(app, obj_metatypes=['Page Template'],
+                                 search_sub=1):
+        try:
+            ob._cook()
+        except Exception:
+            logger.exception('Could not compile %s', path)
+            errors += 1
+            continue
+        if ob._v_errors:
+            errors += 1
+        else:
+            compiled += 1
+    return compiled, errors
+
+
+def main(argv=sys.argv):
+    try:
+        opts, args = getopt.getopt(
+            argv[1:], "hC:d:z", ["help", "config=", "dir=", "zodb"])
+    except getopt.GetoptError as msg:
+        usage(sys.stderr, msg)
+        sys.exit(2)
+
+    config_file = directory = None
+    zodb = False
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            usage(sys.stdout)
+            sys.exit()
+        if opt in ("-C", "--config"):
+            config_file = arg
+        if opt in ("-d", "--dir"):
+            directory = os.path.abspath(os.path.expanduser(arg))
+            if not os.path.isdir(directory):
+                usage(sys.stderr, "%s is not a directory" % directory)
+                sys.exit(2)
+        if opt in ("-z", "--zodb"):
+            zodb = True
+
+    from Products.PageTemplates import engine
+    app = None
+    if zodb or directory is None:
+        finder = ZopeFinder(argv)
+        finder.filter_warnings()
+        app = finder.get_app(config_file)
+    else:
+        from zope.component import provideUtility
+        provideUtility(engine.Program)
+    if directory is not None:
+        engine.setCacheDirectory(directory)
+    if engine.cache_directory is None:
+        usage(sys.stderr, "no template cache directory is configured")
+        sys.exit(2)
+
+    compiled, errors = compileFiles(args)
+    if zodb:
+        result = compileZODB(app)
+        compiled += result[0]
+        errors += result[1]
+    print("Compiled %d templates into %s, %d errors." % (
+        compiled, engine.cache_directory, errors))
+    if errors:
+        sys.exit(1)
+
+
+def usage(stream, msg=None):
+    if msg:
+        stream.write(str(msg))
+        stream.write('\n')
+
+    program = os.path.basename(sys.argv[0])
+    stream.write(__doc__ % {"program": program})
+
+
+if __name__ == '__main__':
+    main()